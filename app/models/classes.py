@@ -9,12 +9,20 @@ class Brawler:
     def __init__(self, name, category=""):
         self.name = name
         self.counters = []  # Lista de brawlers que counterea
+        self._counter_set = set()  # Los mismos brawlers, para comprobar duplicados sin recorrer la lista
         self.tier = None    # Tier del brawler: S, A, B, C, D
         self.category = category  # Categoría del brawler (puede estar vacía si no tiene)
 
     def add_counter(self, brawler):
-        """Agrega un brawler a la lista de counters de este brawler."""
-        self.counters.append(brawler)
+        """Agrega un brawler a la lista de counters de este brawler (sin duplicados)."""
+        if brawler not in self._counter_set:
+            self._counter_set.add(brawler)
+            self.counters.append(brawler)
+
+    def set_counters(self, counters):
+        """Reemplaza la lista de counters de este brawler (ya sin duplicados y en su orden)."""
+        self.counters = list(counters)
+        self._counter_set = set(self.counters)
 
     def set_category(self, category):
         """Asigna una categoría al brawler."""
@@ -4,7 +4,7 @@ Módulo que define los modelos de datos para la API.
 Modelos:
 - DraftRequest: Representa la solicitud de draft con los datos necesarios para procesarlo.
 """
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
 class DraftRequest(BaseModel):
@@ -17,9 +17,11 @@ class DraftRequest(BaseModel):
     - banned_brawlers (List[str]): Lista de brawlers que han sido baneados.
     - team (str): Equipo que está eligiendo en esta fase ('blue' o 'red').
     - picks (List[str]): Lista de brawlers seleccionados hasta el momento.
+    - season (Optional[str]): Temporada del meta (carpeta de `data/meta`). Si no se indica, se usa la activa.
     """
     phase: int
     selected_map: str
     banned_brawlers: List[str]
     team: str
     picks: List[str]
+    season: Optional[str] = None
@@ -0,0 +1,145 @@
+"""
+Este módulo define el registro compacto de brawlers con identificadores enteros y bitsets.
+
+Cada brawler recibe un identificador entero denso (0..N-1) y todos los conjuntos de brawlers (counters,
+categorías, tiers, picks recomendados de cada mapa, bans y picks de un draft) se representan como
+enteros de Python usados como bitsets. Así, filtrar disponibles, consultar counters o construir claves
+de caché son operaciones de bits en lugar de recorridos de listas.
+
+Clases:
+- BrawlerRegistry: Registro (de solo lectura) construido a partir de los diccionarios de `load_data` y `load_maps`.
+"""
+
+TIERS = ("S", "A", "B", "C", "D")
+
+
+class BrawlerRegistry:
+    """Registro de brawlers con identificadores enteros y conjuntos representados como bitsets."""
+
+    def __init__(self, brawlers, maps, categories=None):
+        """
+        Construye el registro.
+
+        Parámetros:
+        - brawlers (dict): Diccionario nombre -> Brawler (de `load_data`).
+        - maps (dict): Diccionario nombre -> Map (de `load_maps`).
+        - categories (dict): Opcional, categoría -> lista de nombres (de `load_categories`). Si no se indica,
+          se usa la categoría asignada a cada brawler.
+        """
+        self.names = tuple(brawlers)
+        self.ids = {name: brawler_id for brawler_id, name in enumerate(self.names)}
+        self.size = len(self.names)
+        self.all_mask = (1 << self.size) - 1
+        self.slot_bits = (self.size + 1).bit_length()
+
+        # countered_by[i]: brawlers que counterean a i; counters_of[i]: brawlers a los que i counterea
+        self.countered_by = [0] * self.size
+        self.counters_of = [0] * self.size
+        for name, brawler in brawlers.items():
+            brawler_id = self.ids[name]
+            for counter in brawler.counters:
+                counter_id = self.ids.get(counter.name)
+                if counter_id is not None:
+                    self.countered_by[brawler_id] |= 1 << counter_id
+                    self.counters_of[counter_id] |= 1 << brawler_id
+
+        # Categorías
+        if categories is None:
+            categories = {}
+            for name, brawler in brawlers.items():
+                if brawler.category:
+                    categories.setdefault(brawler.category, []).append(name)
+        self.category_masks = {category: self.mask(names) for category, names in categories.items()}
+
+        # Tiers: máscara por tier y tier de cada brawler por identificador
+        self.tier_of = tuple(brawlers[name].tier for name in self.names)
+        self.tier_masks = {tier: 0 for tier in TIERS}
+        for brawler_id, tier in enumerate(self.tier_of):
+            if tier is not None:
+                self.tier_masks[tier] = self.tier_masks.get(tier, 0) | (1 << brawler_id)
+
+        # Mapas: identificador y máscaras de picks recomendados por fase
+        self.map_names = tuple(maps)
+        self.map_ids = {name: map_id for map_id, name in enumerate(self.map_names)}
+        self.map_masks = {
+            name: {
+                "first_pick": self.mask(brawler.name for brawler in map_obj.first_pick),
+                "other_picks": self.mask(brawler.name for brawler in map_obj.other_picks),
+                "last_pick": self.mask(brawler.name for brawler in map_obj.last_pick),
+            }
+            for name, map_obj in maps.items()
+        }
+
+    def mask(self, names):
+        """Convierte una colección de nombres en un bitset (los nombres desconocidos se ignoran)."""
+        result = 0
+        ids = self.ids
+        for name in names:
+            brawler_id = ids.get(name)
+            if brawler_id is not None:
+                result |= 1 << brawler_id
+        return result
+
+    def names_of(self, mask):
+        """Devuelve la lista de nombres de un bitset, en orden de identificador."""
+        names = []
+        while mask:
+            low_bit = mask & -mask
+            names.append(self.names[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return names
+
+    def available_mask(self, banned_mask, picked_mask=0):
+        """Devuelve el bitset de brawlers que no están baneados ni elegidos."""
+        return self.all_mask & ~(banned_mask | picked_mask)
+
+    def countered_by_mask(self, name):
+        """Devuelve el bitset de brawlers que counterean a `name` (0 si no existe)."""
+        brawler_id = self.ids.get(name)
+        return self.countered_by[brawler_id] if brawler_id is not None else 0
+
+    def encode_picks(self, picks):
+        """
+        Codifica los picks en orden de slot en un único entero (cada slot guarda identificador + 1).
+
+        Retorna None si algún pick no existe en el registro.
+        """
+        code = 0
+        for slot, name in enumerate(picks):
+            brawler_id = self.ids.get(name)
+            if brawler_id is None:
+                return None
+            code |= (brawler_id + 1) << (self.slot_bits * slot)
+        return code
+
+    def decode_picks(self, code):
+        """Devuelve la lista de nombres codificada con `encode_picks`."""
+        picks = []
+        slot_mask = (1 << self.slot_bits) - 1
+        while code:
+            picks.append(self.names[(code & slot_mask) - 1])
+            code >>= self.slot_bits
+        return picks
+
+    def draft_key(self, selected_map, phase, banned_brawlers, picks):
+        """
+        Representa un draft como una tupla de enteros: (mapa, fase, bitset de bans, picks codificados).
+
+        Los bans no dependen del orden y los picks conservan el orden de los slots. Retorna None si el mapa,
+        algún ban o algún pick no existen en el registro.
+        """
+        ids = self.ids
+        try:
+            map_id = self.map_ids[selected_map]
+            banned_mask = 0
+            for name in banned_brawlers:
+                banned_mask |= 1 << ids[name]
+            picks_code = 0
+            shift = 0
+            for name in picks:
+                picks_code |= (ids[name] + 1) << shift
+                shift += self.slot_bits
+        except KeyError:
+            return None
+
+        return (map_id, phase, banned_mask, picks_code)
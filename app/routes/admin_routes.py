@@ -0,0 +1,137 @@
+"""
+Módulo que define las rutas de administración de la API.
+
+Rutas:
+- `GET /admin/cache`: Devuelve el estado de la caché de recomendaciones (tamaño, aciertos, fallos...).
+- `DELETE /admin/cache`: Vacía la caché de recomendaciones.
+- `GET /admin/singleflight`: Devuelve las métricas del agrupamiento de peticiones idénticas en curso.
+- `GET /admin/context-cache`: Devuelve las métricas de la caché de contexto del proveedor (prefijos por mapa y fase).
+- `GET /admin/circuit-breaker`: Devuelve el estado del circuit breaker de Gemini.
+- `GET /admin/scheduler`: Devuelve el estado del planificador de llamadas a Gemini (cuota, cola por carril y concurrencia).
+- `GET /admin/hedging`: Devuelve las métricas de las llamadas extra a Gemini (hedging), o `enabled: False` si está desactivado.
+- `POST /admin/cache/compact`: Compacta la caché persistente (borra versiones antiguas del meta y ejecuta `VACUUM`).
+- `GET /admin/meta`: Devuelve la versión del meta activa y el estado de la recarga en caliente.
+- `GET /admin/seasons`: Devuelve las temporadas disponibles y las que están cargadas en memoria.
+- `GET /admin/traces/{trace_id}`: Devuelve los spans de una traza (si las trazas se guardan en memoria, `TRACE_EXPORTER=memory`).
+- `POST /admin/meta/reload`: Fuerza la recarga del meta sin esperar a la siguiente comprobación de los ficheros.
+
+Notas:
+- Las rutas están protegidas con la misma clave que `/draft` (cabecera `x-api-key`).
+- Las cachés se crean en `main.py` y se acceden desde `request.app.state.draft_cache`
+  y `request.app.state.persistent_cache` (esta última es `None` si no está activada).
+"""
+import os
+from fastapi import APIRouter, HTTPException, Request, Header
+from fastapi.concurrency import run_in_threadpool
+
+router = APIRouter(prefix="/admin")
+
+def check_api_key(x_api_key):
+    """Lanza un 403 si la clave de la API no es válida."""
+    if x_api_key != os.getenv("BRAWLGPT_API_KEY"):
+        raise HTTPException(status_code=403, detail="Forbidden: Invalid API key")
+
+@router.get("/cache")
+def cache_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve las estadísticas de la caché de recomendaciones."""
+    check_api_key(x_api_key)
+    stats = request.app.state.draft_cache.stats()
+
+    persistent_cache = request.app.state.persistent_cache
+    stats["persistent"] = persistent_cache.stats() if persistent_cache is not None else None
+    return stats
+
+@router.delete("/cache")
+def flush_cache(request: Request, x_api_key: str = Header(None)):
+    """Vacía la caché de recomendaciones y devuelve cuántas entradas se eliminaron."""
+    check_api_key(x_api_key)
+    removed = request.app.state.draft_cache.clear()
+
+    persistent_cache = request.app.state.persistent_cache
+    persistent_removed = persistent_cache.clear() if persistent_cache is not None else 0
+    return {"flushed": removed, "persistent_flushed": persistent_removed}
+
+@router.post("/cache/compact")
+async def compact_cache(request: Request, x_api_key: str = Header(None)):
+    """Compacta la caché persistente en SQLite."""
+    check_api_key(x_api_key)
+
+    persistent_cache = request.app.state.persistent_cache
+    if persistent_cache is None:
+        raise HTTPException(status_code=404, detail="Persistent cache is not enabled (set DRAFT_CACHE_DB)")
+
+    return await run_in_threadpool(persistent_cache.compact)
+
+@router.get("/singleflight")
+def singleflight_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve cuántas llamadas a Gemini se han ejecutado y cuántas se han ahorrado."""
+    check_api_key(x_api_key)
+    return request.app.state.draft_singleflight.stats()
+
+@router.get("/context-cache")
+def context_cache_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve las métricas de la caché de contexto, o `enabled: False` si está desactivada."""
+    check_api_key(x_api_key)
+
+    context_cache = request.app.state.context_cache
+    if context_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **context_cache.stats()}
+
+@router.get("/circuit-breaker")
+def circuit_breaker_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve el estado del circuit breaker que protege las llamadas a Gemini."""
+    check_api_key(x_api_key)
+    return request.app.state.circuit_breaker.stats()
+
+@router.get("/scheduler")
+def scheduler_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve el estado del planificador de llamadas a la IA."""
+    check_api_key(x_api_key)
+    return request.app.state.llm_scheduler.stats()
+
+@router.get("/hedging")
+def hedging_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve las métricas de las llamadas cubiertas a la IA, o `enabled: False` si están desactivadas."""
+    check_api_key(x_api_key)
+
+    hedger = request.app.state.llm_hedger
+    if hedger is None:
+        return {"enabled": False}
+    return {"enabled": True, **hedger.stats()}
+
+@router.get("/meta")
+def meta_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve la versión del meta activa y el estado de la recarga en caliente."""
+    check_api_key(x_api_key)
+    return request.app.state.meta_reloader.stats()
+
+@router.post("/meta/reload")
+async def reload_meta(request: Request, x_api_key: str = Header(None)):
+    """Recarga el meta; si la carga falla, se mantiene la versión activa y se devuelve un 500."""
+    check_api_key(x_api_key)
+    reloader = request.app.state.meta_reloader
+    reloaded = await reloader.reload()
+    if not reloaded and reloader.last_error is not None:
+        raise HTTPException(status_code=500, detail=f"Meta reload failed: {reloader.last_error}")
+    return {"reloaded": reloaded, **reloader.stats()}
+
+@router.get("/seasons")
+def seasons_stats(request: Request, x_api_key: str = Header(None)):
+    """Devuelve las temporadas disponibles y las que están cargadas en memoria."""
+    check_api_key(x_api_key)
+    return request.app.state.seasons.stats()
+
+@router.get("/traces/{trace_id}")
+def get_trace(trace_id: str, request: Request, x_api_key: str = Header(None)):
+    """Devuelve los spans de una traza (identificador de la cabecera `X-Trace-Id`) ordenados por inicio."""
+    check_api_key(x_api_key)
+
+    exporter = request.app.state.tracer.exporter
+    if not hasattr(exporter, "get_trace"):
+        raise HTTPException(status_code=404, detail="Traces are not kept in memory (set TRACE_EXPORTER=memory)")
+
+    spans = exporter.get_trace(trace_id.lower())
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"Trace not found: {trace_id}")
+    return {"trace_id": trace_id.lower(), "spans": spans}
@@ -3,40 +3,266 @@ Módulo encargado de definir las rutas de la API en FastAPI.
 
 Rutas:
 - `POST /draft`: Maneja el draft, generando un resumen del proceso y obteniendo recomendaciones de Gemini.
+- `POST /draft/stream`: Como `POST /draft`, pero envía cada sugerencia como un evento SSE en cuanto Gemini la genera.
+- `POST /draft/batch`: Recomendaciones de varios drafts en una petición (agrupando los idénticos y con concurrencia limitada).
+- `POST /draft/score`: Puntúa localmente (sin IA) todos los brawlers disponibles del draft.
+- `POST /draft/lookahead`: Busca localmente (alfa-beta) las mejores parejas de las fases 2 y 3 anticipando la respuesta del rival.
 
 Funciones:
 - handle_draft(request: Request, draft_request: DraftRequest):
-    - Procesa la solicitud del draft, generando el resumen y el prompt para la IA.
+    - Procesa la solicitud del draft de forma asíncrona, generando el resumen y el prompt para la IA.
     - Llama a `execute_draft()` para manejar la lógica del draft.
-    - Envía el prompt a `call_gemini()` para obtener recomendaciones de brawlers.
+    - Consulta la caché de recomendaciones y, si no hay acierto, envía el prompt a `call_gemini()`.
+    - Las peticiones idénticas que llegan a la vez comparten una única llamada (single-flight).
+- log_draft_event(state, event, meta, draft_request, **fields): Encola un registro del draft en el registro estructurado.
+- count_draft_request(endpoint, meta, draft_request): Cuenta la petición por mapa y fase en las métricas de `GET /metrics`.
+- resolve_meta(request, draft_request, pin): Devuelve la instantánea del meta de la temporada pedida (o la activa).
+- get_cached_recommendation(state, cache_key): Busca la recomendación en la caché en memoria y en la persistente.
+- build_draft_prompt(meta, draft_request): Construye el `DraftPrompt` (con el análisis con anticipación si está activado).
+- fetch_recommendation(state, meta, draft_request, cache_key):
+    - Construye el prompt (prefijo estático por mapa y fase + sufijo del draft), llama a Gemini y guarda la respuesta en las cachés.
+    - La llamada sale cuando el planificador (`app.state.llm_scheduler`) le da paso según la cuota (RPM y TPM) y la
+      prioridad de la fase; si no puede salir a tiempo, la ruta responde 429 con `Retry-After` (`quota_exceeded()`).
+    - Si el circuit breaker está abierto, Gemini falla o no devuelve sugerencias, responde con la recomendación local (`"fallback": True`).
+      Con el circuito abierto no se pasa por el planificador, así que la petición no espera en la cola ni gasta cuota.
     - Devuelve un JSON con el resumen del draft y la recomendación de Gemini.
+- stream_draft(request: Request, draft_request: DraftRequest):
+    - Devuelve un `StreamingResponse` (`text/event-stream`) con un evento `suggestion` por sugerencia y un `done` final.
+    - Las líneas de Gemini se parsean de forma incremental con `stream_suggestions()`.
+- batch_draft(request: Request, draft_requests: List[DraftRequest], stream: bool):
+    - Valida todo el lote con `prepare_batch()`, agrupa los drafts idénticos y los reparte con `run_batch()`
+      con como mucho `BATCH_CONCURRENCY` llamadas a la IA a la vez.
+    - Devuelve los resultados en el orden de entrada con un error por draft, o NDJSON según terminan.
+- score_draft(request: Request, draft_request: DraftRequest, top: int):
+    - Devuelve el ranking local de brawlers calculado por el `ScoringEngine` (counters, tier y mapa).
+- lookahead_draft(request: Request, draft_request: DraftRequest, time_budget: float):
+    - Devuelve las mejores jugadas de la búsqueda `DraftSearch` con la respuesta esperada del rival.
 
 Dependencias:
 - FastAPI para la gestión de rutas.
 - `DraftRequest` de `app.models.draft_model` para validar la estructura de la solicitud.
-- `execute_draft` de `app.services.draft_service` para manejar la lógica del draft.
-- `call_gemini` de `app.services.gemini_service` para obtener recomendaciones de IA.
+- `draft_logger` de `app.state` (`app.services.log_service`) para registrar el resumen del draft y las sugerencias.
+- `call_gemini` de `app.services.gemini_service` para obtener recomendaciones de IA, con el backend compartido `app.state.llm_backend`.
+- `draft_cache_key` de `app.services.cache_service` para cachear las recomendaciones por draft.
 
 Notas:
-- `maps` y `brawlers` no se cargan aquí, sino en `main.py` y se acceden desde `request.app.state`.
+- `draft_cache`, `persistent_cache` y `draft_singleflight` no se cargan aquí, sino en `main.py` y se acceden desde `request.app.state`.
+- Los datos del meta (`maps`, `brawlers`, registro, motores locales y plantillas) se leen de la instantánea
+  `request.state.meta`, fijada al empezar la petición: una recarga en caliente no afecta a las peticiones en curso.
+- Si el draft indica `season`, se usa esa temporada (cargada bajo demanda por `app.state.seasons`); todas
+  las respuestas indican la temporada usada en el campo `season`.
+- `handle_draft` es asíncrono: la espera a Gemini no ocupa ningún hilo del threadpool, y el trabajo
+  de CPU (construcción del prompt) se ejecuta con `run_in_threadpool`.
+- El resumen del draft y las sugerencias no se imprimen en la petición: se encolan en `app.state.draft_logger`
+  y un hilo de fondo los escribe como líneas JSON (`DRAFT_LOG`).
+- Cada etapa del pipeline (construcción del prompt, espera en el threadpool, caché persistente, llamada a la
+  IA y parseo) registra su latencia en `app.services.metrics_service`, que se exporta en `GET /metrics`.
+- Cada etapa abre además un span en la traza de la petición (`app.services.tracing_service`): `cache_lookup`,
+  `prompt_build`, `draft_summary`, `llm_call`, `parse` y `fallback`, con atributos como el mapa, la fase,
+  el tamaño del prompt y el número de sugerencias.
+- Las plantillas de los prompts forman parte de la instantánea del meta, así que la ruta no lee disco.
 - Maneja excepciones como `ValueError`, `FileNotFoundError` y `KeyError`, devolviendo respuestas HTTP adecuadas.
 """
 import os
-from fastapi import APIRouter, HTTPException, Request, Header
+import json
+import math
+import time
+import asyncio
+from typing import List
+from fastapi import APIRouter, HTTPException, Request, Header, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from app.models.draft_model import DraftRequest
-from app.services.draft_service import print_draft_summary
-from app.utils.config import generate_final_prompt
-from app.services.gemini_service import call_gemini
+from app.utils.config import generate_prompt_parts
+from app.services.gemini_service import call_gemini, stream_gemini, stream_suggestions, prompt_size
+from app.services.cache_service import draft_cache_key
+from app.services.scheduler_service import QuotaExceededError, estimate_tokens, phase_priority
+from app.services.circuit_breaker_service import CircuitOpenError
+from app.services.fallback_service import local_recommendation
+from app.services.lookahead_service import format_lookahead, LOOKAHEAD_IN_PROMPT, DEFAULT_TIME_BUDGET
+from app.services.metrics_service import (
+    run_in_threadpool_timed, DRAFT_STAGE_SECONDS, DRAFT_REQUEST_SECONDS, DRAFT_REQUESTS, CACHE_LOOKUPS, FALLBACKS
+)
+from app.services.tracing_service import span, set_attributes
 
 router = APIRouter()
 
+# Configuración de `/draft/batch`, modificable con variables de entorno
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "50"))
+
+# Máximo de brawlers que puede devolver `/draft/score` (por encima del tamaño del roster)
+SCORE_MAX_TOP = 200
+
 @router.get("/")
 def root():
     """Endpoint para la raíz de la API."""
     return {"message": "Brawl Stars API is working"}
 
+def log_draft_event(state, event, meta, draft_request, **fields):
+    """
+    Encola un registro del draft (temporada, mapa y fase más `fields`) en el registro estructurado, si está
+    activado. Solo añade un diccionario a una cola: la escritura la hace un hilo de fondo.
+    """
+    if state.draft_logger is not None:
+        state.draft_logger.log(event, season=meta.season, map=draft_request.selected_map, phase=draft_request.phase, **fields)
+
+def count_draft_request(endpoint, meta, draft_request):
+    """
+    Cuenta la petición en `brawlgpt_draft_requests_total` por mapa y fase. Los mapas y fases que no existen
+    se cuentan como "unknown" para que un cliente no pueda crear series sin límite.
+    """
+    map_label = draft_request.selected_map if draft_request.selected_map in meta.maps else "unknown"
+    phase_label = str(draft_request.phase) if draft_request.phase in (1, 2, 3, 4) else "unknown"
+    DRAFT_REQUESTS.inc(endpoint, map_label, phase_label)
+
+async def resolve_meta(request, draft_request, pin=True):
+    """
+    Devuelve la instantánea del meta de la temporada pedida en `draft_request.season`.
+
+    Si no se indica temporada (o es la activa), se usa la instantánea fijada al empezar la petición.
+    Con `pin`, la instantánea elegida pasa a ser la de la petición (y su versión va en `X-Meta-Version`).
+
+    Lanza:
+    - ValueError: Si la temporada no existe.
+    """
+    meta = request.state.meta
+    if draft_request.season is None or draft_request.season == meta.season:
+        return meta
+
+    meta = await request.app.state.seasons.get(draft_request.season)
+    if pin:
+        request.state.meta = meta
+    return meta
+
+async def get_cached_recommendation(state, cache_key):
+    """
+    Busca la recomendación en la caché en memoria y, si no está, en la caché persistente (si está activada).
+
+    Retorna:
+    - dict | None: Respuesta cacheada o None si no hay acierto.
+    """
+    with span("cache_lookup") as cache_span:
+        result = "miss"
+        cached_response = state.draft_cache.get(cache_key)
+        if cached_response is not None:
+            result = "memory_hit"
+        elif state.persistent_cache is not None:
+            cached_response = await run_in_threadpool_timed("persistent_cache_get", state.persistent_cache.get, cache_key)
+            if cached_response is not None:
+                state.draft_cache.set(cache_key, cached_response)
+                result = "persistent_hit"
+
+        CACHE_LOOKUPS.inc(result)
+        cache_span.set("result", result)
+        return cached_response
+
+async def build_draft_prompt(meta, draft_request):
+    """
+    Construye el `DraftPrompt` del draft (fuera del event loop) y, si está activado, le añade el análisis
+    local con anticipación de las fases 2 y 3.
+
+    Lanza:
+    - ValueError: Si el mapa, la fase o algún dato del draft no es válido.
+    """
+    with span("prompt_build", map=draft_request.selected_map, phase=draft_request.phase) as prompt_span:
+        # Ejecutar la lógica del draft
+        draft_prompt = await run_in_threadpool_timed(
+            "prompt_build",
+            generate_prompt_parts,
+            draft_request.phase,
+            draft_request.selected_map,
+            meta.maps,
+            meta.brawlers,
+            draft_request.banned_brawlers,
+            draft_request.team,
+            draft_request.picks,
+            meta.prompt_templates,
+            meta.version,
+            meta.prompt_prefixes
+        )
+
+        # Añadir al prompt el análisis local con anticipación de las fases 2 y 3 (si está activado)
+        if LOOKAHEAD_IN_PROMPT and draft_request.phase in (2, 3):
+            try:
+                lookahead = await run_in_threadpool_timed(
+                    "lookahead",
+                    meta.draft_search.search,
+                    draft_request.phase,
+                    draft_request.selected_map,
+                    draft_request.banned_brawlers,
+                    draft_request.picks
+                )
+                draft_prompt = draft_prompt._replace(suffix=draft_prompt.suffix + "\n" + format_lookahead(lookahead))
+            except ValueError:
+                # Draft con brawlers desconocidos: se envía el prompt sin el análisis
+                pass
+
+        prompt_span.set("prompt_chars", prompt_size(draft_prompt))
+    return draft_prompt
+
+async def fetch_recommendation(state, meta, draft_request, cache_key, draft_prompt=None):
+    """
+    Construye el prompt, llama a Gemini y guarda la respuesta en las cachés.
+
+    Parámetros:
+    - state: `app.state`, con `llm_backend`, `llm_hedger`, `llm_scheduler`, `context_cache`, `circuit_breaker` y las cachés.
+    - meta (MetaSnapshot): Instantánea del meta fijada para la petición.
+    - draft_request (DraftRequest): Datos del draft.
+    - cache_key (tuple): Clave canónica del draft.
+    - draft_prompt (DraftPrompt): Prompt ya construido (opcional); si no se indica, se construye aquí.
+
+    Retorna:
+    - dict: Respuesta parseada de Gemini, o la recomendación local si Gemini no está disponible.
+
+    Lanza:
+    - QuotaExceededError: Si la cuota de la IA no permite hacer la llamada a tiempo.
+    """
+    if draft_prompt is None:
+        draft_prompt = await build_draft_prompt(meta, draft_request)
+
+    # Obtener respuesta de Gemini cuando el planificador le dé paso (cuota y prioridad de la fase), a través
+    # del circuit breaker (timeout y umbrales de errores/latencia). Con el circuito abierto no se pasa por el
+    # planificador: la recomendación local sale al momento, sin esperar en la cola ni gastar cuota
+    try:
+        if state.circuit_breaker.is_open():
+            raise CircuitOpenError("Circuit breaker is open")
+        gemini_response = await state.llm_scheduler.run(
+            lambda: state.circuit_breaker.call(lambda: call_gemini(draft_prompt, state.context_cache, state.llm_backend, state.llm_hedger)),
+            estimate_tokens(draft_prompt),
+            phase_priority(draft_request.phase)
+        )
+    except QuotaExceededError:
+        raise
+    except Exception:
+        # Circuito abierto, timeout o error de Gemini: se responde con la recomendación local
+        gemini_response = None
+
+    # Si Gemini no responde o no hay ninguna sugerencia válida, usar la recomendación local (no se cachea)
+    if not isinstance(gemini_response, dict) or not gemini_response.get("gemini_suggestions"):
+        with span("fallback"):
+            fallback = local_recommendation(
+                meta.scoring_engine,
+                draft_request.phase,
+                draft_request.selected_map,
+                draft_request.banned_brawlers,
+                draft_request.picks
+            )
+        FALLBACKS.inc()
+        log_draft_event(state, "draft_suggestions", meta, draft_request, fallback=True, suggestions=fallback["gemini_suggestions"])
+        return fallback
+
+    log_draft_event(state, "draft_suggestions", meta, draft_request, fallback=False, suggestions=gemini_response["gemini_suggestions"])
+
+    # Cachear la respuesta de Gemini
+    state.draft_cache.set(cache_key, gemini_response)
+    if state.persistent_cache is not None:
+        await run_in_threadpool_timed("persistent_cache_set", state.persistent_cache.set, cache_key, gemini_response)
+
+    return gemini_response
+
 @router.post("/draft")
-def handle_draft(request: Request, draft_request: DraftRequest, x_api_key: str = Header(None)):
+async def handle_draft(request: Request, draft_request: DraftRequest, x_api_key: str = Header(None)):
     """
     Maneja el draft, genera el resumen y obtiene sugerencias de Gemini.
 
@@ -45,39 +271,54 @@ def handle_draft(request: Request, draft_request: DraftRequest, x_api_key: str =
     - draft_request (DraftRequest): Datos enviados en la petición.
 
     Retorna:
-    - dict: JSON con el resumen del draft y la recomendación de Gemini.
+    - dict: JSON con la temporada usada y la recomendación de Gemini.
     """
 
     if x_api_key != os.getenv("BRAWLGPT_API_KEY"):
         raise HTTPException(status_code=403, detail="Forbidden: Invalid API key")
 
+    started = time.perf_counter()
     try:
-        # Obtener `maps` y `brawlers` desde la aplicación
-        maps = request.app.state.maps
-        brawlers = request.app.state.brawlers
+        # Consultar la caché antes de construir el prompt: un acierto se devuelve al momento
+        meta = await resolve_meta(request, draft_request)
+        count_draft_request("draft", meta, draft_request)
+        set_attributes(season=meta.season, map=draft_request.selected_map, phase=draft_request.phase, cached=False)
+        cache_key = draft_cache_key(draft_request, meta.registry, meta.version)
+        cached_response = await get_cached_recommendation(request.app.state, cache_key)
 
-        # Ejecutar la lógica del draft
-        draft_prompt = generate_final_prompt(
-            draft_request.phase,
-            draft_request.selected_map,
-            maps,
-            brawlers,
-            draft_request.banned_brawlers,
-            draft_request.team,
-            draft_request.picks
-        )
+        if cached_response is not None:
+            set_attributes(cached=True)
+            DRAFT_REQUEST_SECONDS.observe(time.perf_counter() - started, "draft", "true")
+            return {
+                "season": meta.season,
+                "gemini_response": cached_response
+            }
+
+        # Construir el prompt antes de registrar el resumen: un draft no válido responde 400 sin registrarse
+        draft_prompt = await build_draft_prompt(meta, draft_request)
 
-        # Imprimir el resumen en consola
-        print_draft_summary(draft_request.selected_map, draft_request.phase, draft_request.team, draft_request.banned_brawlers, draft_request.picks)
+        # Registrar el resumen del draft (sin bloquear la petición)
+        with span("draft_summary"):
+            log_draft_event(request.app.state, "draft_summary", meta, draft_request, team=draft_request.team, banned_brawlers=draft_request.banned_brawlers, picks=draft_request.picks)
 
-        # Obtener respuesta de Gemini
-        gemini_response = call_gemini(draft_prompt)
+        # Obtener la recomendación; las peticiones idénticas en curso comparten una sola llamada a Gemini
+        gemini_response = await request.app.state.draft_singleflight.do(
+            cache_key,
+            lambda: fetch_recommendation(request.app.state, meta, draft_request, cache_key, draft_prompt)
+        )
+        DRAFT_REQUEST_SECONDS.observe(time.perf_counter() - started, "draft", "false")
+        if isinstance(gemini_response, dict):
+            set_attributes(suggestions=len(gemini_response.get("gemini_suggestions", [])), fallback=bool(gemini_response.get("fallback")))
 
         # Devolver el resultado en formato JSON
         return {
+            "season": meta.season,
             "gemini_response": gemini_response
         }
 
+    except QuotaExceededError as e:
+        raise quota_exceeded(e) from e
+
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Value error: {str(e)}") from e
 
@@ -89,3 +330,336 @@ def handle_draft(request: Request, draft_request: DraftRequest, x_api_key: str =
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}") from e
+
+def quota_exceeded(error):
+    """Convierte un `QuotaExceededError` en un 429 con la cabecera `Retry-After` (segundos)."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Quota exceeded: {str(error)}, retry later",
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+def sse_event(event, data):
+    """Formatea un evento Server-Sent Events con `data` serializado en JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_recommendation(state, meta, draft_request, cache_key, draft_prompt):
+    """
+    Genera los eventos SSE de la recomendación: una `suggestion` por cada línea de Gemini en cuanto se
+    completa y un `done` final.
+
+    Si el circuit breaker está abierto o Gemini falla antes de enviar ninguna sugerencia válida, se
+    envían las sugerencias de la recomendación local. Si falla a mitad, se cierra con `done` marcado
+    como incompleto. Solo se cachean las respuestas completas de Gemini.
+    """
+    suggestions = []
+    complete = True
+    started = time.perf_counter()
+
+    try:
+        if state.circuit_breaker.is_open():
+            raise CircuitOpenError("Circuit breaker is open")
+        chunks = state.llm_scheduler.stream(
+            lambda: state.circuit_breaker.stream(lambda: stream_gemini(draft_prompt, state.context_cache, state.llm_backend)),
+            estimate_tokens(draft_prompt),
+            phase_priority(draft_request.phase)
+        )
+        async for suggestion in stream_suggestions(chunks):
+            if not suggestions:
+                DRAFT_STAGE_SECONDS.observe(time.perf_counter() - started, "llm_first_suggestion")
+            suggestions.append(suggestion)
+            yield sse_event("suggestion", suggestion)
+    except Exception:
+        # Sin cuota a tiempo, circuito abierto, timeout o error de Gemini
+        complete = False
+
+    if not suggestions:
+        with span("fallback"):
+            fallback = local_recommendation(
+                meta.scoring_engine,
+                draft_request.phase,
+                draft_request.selected_map,
+                draft_request.banned_brawlers,
+                draft_request.picks
+            )
+        FALLBACKS.inc()
+        for suggestion in fallback["gemini_suggestions"]:
+            yield sse_event("suggestion", suggestion)
+        log_draft_event(state, "draft_suggestions", meta, draft_request, fallback=True, suggestions=fallback["gemini_suggestions"])
+        yield sse_event("done", {"season": meta.season, "count": len(fallback["gemini_suggestions"]), "fallback": True, "cached": False, "complete": True})
+        return
+
+    log_draft_event(state, "draft_suggestions", meta, draft_request, fallback=False, complete=complete, suggestions=suggestions)
+    if complete:
+        gemini_response = {"gemini_suggestions": suggestions}
+        state.draft_cache.set(cache_key, gemini_response)
+        if state.persistent_cache is not None:
+            await run_in_threadpool_timed("persistent_cache_set", state.persistent_cache.set, cache_key, gemini_response)
+
+    yield sse_event("done", {"season": meta.season, "count": len(suggestions), "fallback": False, "cached": False, "complete": complete})
+
+async def stream_cached(meta, cached_response):
+    """Genera los eventos SSE de una recomendación que ya estaba en caché."""
+    suggestions = cached_response["gemini_suggestions"]
+    for suggestion in suggestions:
+        yield sse_event("suggestion", suggestion)
+    yield sse_event("done", {"season": meta.season, "count": len(suggestions), "fallback": False, "cached": True, "complete": True})
+
+@router.post("/draft/stream")
+async def stream_draft(request: Request, draft_request: DraftRequest, x_api_key: str = Header(None)):
+    """
+    Igual que `POST /draft`, pero devuelve la recomendación como Server-Sent Events.
+
+    Cada sugerencia se envía como un evento `suggestion` en cuanto Gemini termina de generar su línea,
+    así la aplicación puede mostrar la primera sin esperar a la respuesta completa. El último evento es
+    `done`, con la temporada usada, el número de sugerencias y si vienen de la caché o de la recomendación local.
+
+    Parámetros:
+    - request (Request): Petición de FastAPI para acceder a `app.state`.
+    - draft_request (DraftRequest): Datos enviados en la petición.
+
+    Retorna:
+    - StreamingResponse: Flujo `text/event-stream`.
+    """
+
+    if x_api_key != os.getenv("BRAWLGPT_API_KEY"):
+        raise HTTPException(status_code=403, detail="Forbidden: Invalid API key")
+
+    try:
+        state = request.app.state
+        meta = await resolve_meta(request, draft_request)
+        count_draft_request("draft_stream", meta, draft_request)
+        set_attributes(season=meta.season, map=draft_request.selected_map, phase=draft_request.phase)
+        cache_key = draft_cache_key(draft_request, meta.registry, meta.version)
+        cached_response = await get_cached_recommendation(state, cache_key)
+
+        if cached_response is not None:
+            events = stream_cached(meta, cached_response)
+        else:
+            # El prompt se construye antes de empezar el flujo para poder responder 400 si el draft no es válido,
+            # y 429 si la cuota de la IA no permite empezar a tiempo (con el circuito abierto no se llama a la IA)
+            draft_prompt = await build_draft_prompt(meta, draft_request)
+            if not state.circuit_breaker.is_open():
+                state.llm_scheduler.admit(estimate_tokens(draft_prompt), phase_priority(draft_request.phase))
+            with span("draft_summary"):
+                log_draft_event(state, "draft_summary", meta, draft_request, team=draft_request.team, banned_brawlers=draft_request.banned_brawlers, picks=draft_request.picks)
+            events = stream_recommendation(state, meta, draft_request, cache_key, draft_prompt)
+
+    except QuotaExceededError as e:
+        raise quota_exceeded(e) from e
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Value error: {str(e)}") from e
+
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"File not found: {str(e)}") from e
+
+    except KeyError as e:
+        raise HTTPException(status_code=500, detail=f"Key error: {str(e)}") from e
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}") from e
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def prepare_batch(request, draft_requests):
+    """
+    Valida todos los drafts del lote antes de llamar a la IA y agrupa los idénticos.
+
+    Cada draft puede indicar su temporada; los de temporadas distintas nunca se agrupan.
+
+    Retorna:
+    - tuple: (`items`, `errors`), donde `items` asocia cada clave de caché única a
+      `(instantánea del meta, draft_request, draft_prompt o None si estaba en caché, respuesta cacheada, índices del lote)`
+      y `errors` asocia el índice de cada draft no válido a su mensaje de error.
+    """
+    items = {}
+    errors = {}
+
+    for index, draft_request in enumerate(draft_requests):
+        try:
+            meta = await resolve_meta(request, draft_request, pin=False)
+        except ValueError as e:
+            errors[index] = f"Value error: {str(e)}"
+            continue
+
+        count_draft_request("draft_batch", meta, draft_request)
+        cache_key = draft_cache_key(draft_request, meta.registry, meta.version)
+        if cache_key in items:
+            items[cache_key][4].append(index)
+            continue
+
+        cached_response = await get_cached_recommendation(request.app.state, cache_key)
+        draft_prompt = None
+        if cached_response is None:
+            try:
+                draft_prompt = await build_draft_prompt(meta, draft_request)
+            except (ValueError, KeyError) as e:
+                errors[index] = f"Value error: {str(e)}"
+                continue
+
+        items[cache_key] = (meta, draft_request, draft_prompt, cached_response, [index])
+
+    return items, errors
+
+async def resolve_batch_item(state, semaphore, cache_key, item):
+    """
+    Obtiene la recomendación de un draft único del lote, con como mucho `BATCH_CONCURRENCY` llamadas
+    a la IA a la vez. Las peticiones idénticas en curso (de este u otros lotes) comparten una llamada.
+
+    Retorna:
+    - tuple: (índices del lote, resultado con `gemini_response` o `error`).
+    """
+    meta, draft_request, draft_prompt, cached_response, indexes = item
+    if cached_response is not None:
+        return indexes, {"status": 200, "season": meta.season, "gemini_response": cached_response, "cached": True}
+
+    try:
+        async with semaphore:
+            gemini_response = await state.draft_singleflight.do(
+                cache_key,
+                lambda: fetch_recommendation(state, meta, draft_request, cache_key, draft_prompt)
+            )
+        return indexes, {"status": 200, "season": meta.season, "gemini_response": gemini_response, "cached": False}
+    except QuotaExceededError as e:
+        return indexes, {"status": 429, "error": f"Quota exceeded: {str(e)}", "retry_after": math.ceil(e.retry_after)}
+    except Exception as e:
+        return indexes, {"status": 500, "error": f"Unexpected error: {str(e)}"}
+
+async def run_batch(state, items, errors):
+    """
+    Reparte los drafts únicos del lote y devuelve los resultados de cada índice en cuanto terminan.
+
+    Retorna:
+    - Generador asíncrono de diccionarios `{"index": ..., "status": ..., ...}`.
+    """
+    for index, error in errors.items():
+        yield {"index": index, "status": 400, "error": error}
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    tasks = [asyncio.ensure_future(resolve_batch_item(state, semaphore, cache_key, item)) for cache_key, item in items.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indexes, result = await next_done
+            for index in indexes:
+                yield {"index": index, **result}
+    finally:
+        # Si el cliente se desconecta a mitad, no seguir llamando a la IA para este lote
+        for task in tasks:
+            task.cancel()
+
+@router.post("/draft/batch")
+async def batch_draft(request: Request, draft_requests: List[DraftRequest], stream: bool = False, x_api_key: str = Header(None)):
+    """
+    Obtiene las recomendaciones de varios drafts en una sola petición.
+
+    Todos los drafts se validan antes de llamar a la IA, los idénticos se agrupan en una sola llamada
+    y el resto se reparten con como mucho `BATCH_CONCURRENCY` llamadas a la vez.
+
+    Parámetros:
+    - request (Request): Petición de FastAPI para acceder a `app.state`.
+    - draft_requests (List[DraftRequest]): Drafts del lote (como mucho `BATCH_MAX_SIZE`).
+    - stream (bool): Si es True, devuelve NDJSON con una línea por draft en cuanto termina.
+
+    Retorna:
+    - dict: `{"results": [...]}` en el orden de entrada, cada uno con `season` y `gemini_response`, o `error`.
+    - StreamingResponse: Si `stream` es True, flujo `application/x-ndjson` en orden de finalización
+      (cada línea lleva su `index`).
+    """
+
+    if x_api_key != os.getenv("BRAWLGPT_API_KEY"):
+        raise HTTPException(status_code=403, detail="Forbidden: Invalid API key")
+
+    if len(draft_requests) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Value error: the batch has {len(draft_requests)} drafts, the maximum is {BATCH_MAX_SIZE}.")
+
+    items, errors = await prepare_batch(request, draft_requests)
+    results = run_batch(request.app.state, items, errors)
+
+    if stream:
+        async def ndjson():
+            async for result in results:
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    ordered = [None] * len(draft_requests)
+    async for result in results:
+        ordered[result["index"]] = result
+
+    return {
+        "unique": len(items),
+        "results": ordered
+    }
+
+@router.post("/draft/score")
+async def score_draft(request: Request, draft_request: DraftRequest, top: int = Query(10, ge=1, le=SCORE_MAX_TOP), x_api_key: str = Header(None)):
+    """
+    Puntúa localmente todos los brawlers disponibles del draft, sin llamar a la IA.
+
+    Parámetros:
+    - request (Request): Petición de FastAPI para acceder al `scoring_engine` de la instantánea del meta.
+    - draft_request (DraftRequest): Datos enviados en la petición.
+    - top (int): Número máximo de brawlers a devolver (entre 1 y `SCORE_MAX_TOP`; si no, 422).
+
+    Retorna:
+    - dict: JSON con la temporada usada, el ranking de brawlers y el desglose de cada puntuación.
+    """
+
+    if x_api_key != os.getenv("BRAWLGPT_API_KEY"):
+        raise HTTPException(status_code=403, detail="Forbidden: Invalid API key")
+
+    try:
+        # La puntuación vectorizada tarda microsegundos, así que se ejecuta directamente en el event loop
+        meta = await resolve_meta(request, draft_request)
+        scores = meta.scoring_engine.score(
+            draft_request.phase,
+            draft_request.selected_map,
+            draft_request.banned_brawlers,
+            draft_request.picks,
+            top
+        )
+        return {
+            "season": meta.season,
+            "scores": scores
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Value error: {str(e)}") from e
+
+@router.post("/draft/lookahead")
+async def lookahead_draft(request: Request, draft_request: DraftRequest, time_budget: float = DEFAULT_TIME_BUDGET, x_api_key: str = Header(None)):
+    """
+    Busca localmente las mejores jugadas de las fases 2 y 3 anticipando la respuesta del rival.
+
+    Parámetros:
+    - request (Request): Petición de FastAPI para acceder a `draft_search`.
+    - draft_request (DraftRequest): Datos enviados en la petición.
+    - time_budget (float): Segundos máximos de búsqueda (como mucho 5).
+
+    Retorna:
+    - dict: JSON con la profundidad alcanzada y las mejores jugadas con la respuesta esperada del rival.
+    """
+
+    if x_api_key != os.getenv("BRAWLGPT_API_KEY"):
+        raise HTTPException(status_code=403, detail="Forbidden: Invalid API key")
+
+    try:
+        # La búsqueda es CPU intensiva, así que se ejecuta fuera del event loop
+        meta = await resolve_meta(request, draft_request)
+        result = await run_in_threadpool(
+            meta.draft_search.search,
+            draft_request.phase,
+            draft_request.selected_map,
+            draft_request.banned_brawlers,
+            draft_request.picks,
+            min(max(time_budget, 0.0), 5.0)
+        )
+        return {"season": meta.season, **result}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Value error: {str(e)}") from e
@@ -0,0 +1,23 @@
+"""
+Módulo que define la ruta de métricas de la API en formato Prometheus.
+
+Rutas:
+- `GET /metrics`: Devuelve las métricas de la API (latencia de cada etapa del pipeline del draft, peticiones
+  por mapa y fase, caché, llamadas a la IA y ocupación del threadpool) en el formato de texto de Prometheus.
+
+Notas:
+- Las métricas se calculan en el propio proceso (`app.services.metrics_service`); no hace falta ningún servicio externo.
+- A diferencia de las rutas de `/admin`, no pide la cabecera `x-api-key`, como es habitual en los endpoints
+  que consulta Prometheus: solo expone contadores y latencias, nunca datos de los drafts.
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.services.metrics_service import render_metrics, CONTENT_TYPE
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def metrics():
+    """Devuelve las métricas de la API en el formato de texto de Prometheus."""
+    # Se ejecuta en el event loop: las métricas del threadpool se leen del limitador de AnyIO
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,131 @@
+"""
+Módulo encargado de cachear en memoria las recomendaciones de Gemini.
+
+Muchos usuarios envían exactamente el mismo draft (mismo mapa, fase, bans y picks), así que
+guardamos la respuesta ya parseada para no pagar otra llamada a Gemini.
+
+Clases:
+- RecommendationCache: Caché LRU con TTL, acotada en tamaño y con contadores de aciertos y fallos.
+
+Funciones:
+- draft_cache_key(draft_request, registry): Devuelve la clave canónica de un `DraftRequest`.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Valores por defecto, configurables con variables de entorno
+DEFAULT_CACHE_SIZE = int(os.getenv("DRAFT_CACHE_SIZE", "1024"))
+DEFAULT_CACHE_TTL = float(os.getenv("DRAFT_CACHE_TTL", "3600"))
+
+
+def draft_cache_key(draft_request, registry=None, meta_version=None):
+    """
+    Devuelve la forma canónica de un draft para usarla como clave de caché.
+
+    - Los bans no dependen del orden en que se enviaron.
+    - Los picks se mantienen en el orden de los slots (1º, 2º, 3º...).
+    - El color del equipo no forma parte de la clave: un draft y su espejo (azul ↔ rojo)
+      generan las mismas recomendaciones.
+
+    Si se indica el `BrawlerRegistry`, la clave es una tupla de enteros (mapa, fase, bitset de bans,
+    picks codificados). Si el draft contiene nombres que no están en el registro, se usa la forma con nombres.
+
+    Si se indica `meta_version`, la clave empieza por ella: los identificadores del registro y las
+    recomendaciones dependen de la versión del meta, así que no se mezclan entre versiones.
+
+    Parámetros:
+    - draft_request (DraftRequest): Datos del draft.
+    - registry (BrawlerRegistry): Registro de brawlers con identificadores enteros (opcional).
+    - meta_version (str): Versión de la instantánea del meta (opcional).
+
+    Retorna:
+    - tuple: Clave inmutable y hashable.
+    """
+    key = None
+    if registry is not None:
+        key = registry.draft_key(
+            draft_request.selected_map,
+            draft_request.phase,
+            draft_request.banned_brawlers,
+            draft_request.picks
+        )
+
+    if key is None:
+        key = (
+            draft_request.selected_map,
+            draft_request.phase,
+            tuple(sorted(set(draft_request.banned_brawlers))),
+            tuple(draft_request.picks),
+        )
+
+    return key if meta_version is None else (meta_version, *key)
+
+
+class RecommendationCache:
+    """Caché LRU con caducidad (TTL) para las recomendaciones de Gemini."""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # clave -> (instante de caducidad, valor)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve el valor cacheado para `key`, o None si no existe o ha caducado."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                # Entrada caducada: se elimina y cuenta como fallo
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Guarda `value` bajo `key`, expulsando la entrada menos usada si la caché está llena."""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vacía la caché y devuelve el número de entradas eliminadas."""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+    def stats(self):
+        """Devuelve un diccionario con el estado de la caché."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,209 @@
+"""
+Módulo que implementa un circuit breaker para las llamadas a la IA.
+
+Cuando Gemini va lento o devuelve errores, seguir llamándolo solo hace esperar al usuario para acabar en un
+error. El circuit breaker vigila las últimas llamadas y, si la tasa de errores o de llamadas lentas supera
+el umbral, se "abre": durante un tiempo las peticiones no llaman a Gemini y se responden con la
+recomendación local. Pasado ese tiempo pasa a "semiabierto" y deja pasar unas pocas llamadas de prueba;
+si salen bien se cierra de nuevo y, si fallan, vuelve a abrirse.
+
+Clases:
+- CircuitOpenError: Excepción lanzada cuando el circuito está abierto y no se permite la llamada.
+- CircuitBreaker: Circuit breaker con timeout, umbrales de errores y latencia, y sondeo semiabierto.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se llama a la IA."""
+
+
+class CircuitBreaker:
+    """Circuit breaker asíncrono para proteger las llamadas a la IA."""
+
+    def __init__(self,
+                 timeout=float(os.getenv("GEMINI_TIMEOUT", "20")),
+                 failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+                 slow_call_seconds=float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "10")),
+                 slow_call_rate=float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8")),
+                 window_size=int(os.getenv("BREAKER_WINDOW", "20")),
+                 min_calls=int(os.getenv("BREAKER_MIN_CALLS", "5")),
+                 open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+                 half_open_probes=int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))):
+        """
+        Parámetros:
+        - timeout (float): Segundos máximos de una llamada; si se superan cuenta como error.
+        - failure_rate (float): Proporción de errores en la ventana que abre el circuito.
+        - slow_call_seconds (float): Latencia a partir de la cual una llamada se considera lenta.
+        - slow_call_rate (float): Proporción de llamadas lentas en la ventana que abre el circuito.
+        - window_size (int): Número de llamadas recientes que se tienen en cuenta.
+        - min_calls (int): Llamadas mínimas en la ventana antes de poder abrir el circuito.
+        - open_seconds (float): Tiempo que el circuito permanece abierto antes de sondear.
+        - half_open_probes (int): Llamadas de prueba permitidas a la vez en estado semiabierto.
+        """
+        self.timeout = timeout
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._window = deque(maxlen=window_size)  # (fallo, lenta) de cada llamada reciente
+        self._probes_in_flight = 0
+        self._generation = 0  # Cambia con cada cambio de estado; los resultados de generaciones anteriores se descartan
+
+    def is_open(self):
+        """
+        Indica, sin cambiar el estado, si ahora se rechazaría una llamada: circuito abierto y sin cumplir
+        `open_seconds`, o semiabierto con todas las llamadas de prueba en curso.
+        """
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at < self.open_seconds
+        return self.state == HALF_OPEN and self._probes_in_flight >= self.half_open_probes
+
+    def _set_state(self, state):
+        """Cambia de estado, vacía la ventana y empieza una generación nueva."""
+        self.state = state
+        self._window.clear()
+        self._probes_in_flight = 0
+        self._generation += 1
+
+    def _before_call(self):
+        """
+        Decide si se permite la llamada; lanza `CircuitOpenError` si no.
+
+        Retorna:
+        - int: Generación en la que empieza la llamada.
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpenError("Circuit breaker is open")
+            self._set_state(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError("Circuit breaker is half-open and already probing")
+            self._probes_in_flight += 1
+        return self._generation
+
+    def _open(self):
+        """Abre el circuito."""
+        self._set_state(OPEN)
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def _cancel(self, probing, generation):
+        """Libera la plaza de una llamada de prueba cancelada desde fuera (no cuenta como resultado)."""
+        if probing and generation == self._generation:
+            self._probes_in_flight -= 1
+
+    def _record(self, failed, elapsed, probing, generation):
+        """
+        Registra el resultado de una llamada y actualiza el estado del circuito. Los resultados de llamadas
+        que empezaron antes del último cambio de estado (otra generación) se descartan: una llamada lanzada
+        antes de abrirse el circuito no puede volver a abrirlo ni decidir el sondeo semiabierto.
+        """
+        if generation != self._generation:
+            return
+        slow = elapsed >= self.slow_call_seconds
+
+        if probing:
+            self._probes_in_flight -= 1
+            if failed or slow:
+                self._open()
+            elif self._probes_in_flight == 0:
+                self._set_state(CLOSED)
+            return
+
+        self._window.append((failed, slow))
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return
+
+        failures = sum(1 for call_failed, _ in self._window if call_failed)
+        slow_calls = sum(1 for _, call_slow in self._window if call_slow)
+        if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+            self._open()
+
+    async def call(self, func):
+        """
+        Ejecuta `func()` (una función que devuelve una corrutina) protegida por el circuit breaker.
+
+        Lanza:
+        - CircuitOpenError: Si el circuito está abierto.
+        - asyncio.TimeoutError: Si la llamada supera `timeout`.
+        - Cualquier excepción lanzada por la llamada.
+        """
+        generation = self._before_call()
+        probing = self.state == HALF_OPEN
+        start = time.monotonic()
+
+        try:
+            result = await asyncio.wait_for(func(), timeout=self.timeout)
+        except asyncio.CancelledError:
+            # La petición se canceló desde fuera: no es culpa del backend
+            self._cancel(probing, generation)
+            raise
+        except Exception:
+            self._record(True, time.monotonic() - start, probing, generation)
+            raise
+
+        self._record(False, time.monotonic() - start, probing, generation)
+        return result
+
+    async def stream(self, func):
+        """
+        Como `call`, pero para un generador asíncrono: `func()` devuelve el generador y se van devolviendo
+        sus elementos. El `timeout` se aplica a la generación completa.
+        """
+        generation = self._before_call()
+        probing = self.state == HALF_OPEN
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        chunks = func()
+
+        try:
+            while True:
+                remaining = max(self.timeout - (loop.time() - start), 0)
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # El cliente dejó de leer: no es culpa del backend
+            self._cancel(probing, generation)
+            raise
+        except Exception:
+            self._record(True, loop.time() - start, probing, generation)
+            raise
+        finally:
+            await chunks.aclose()
+
+        self._record(False, loop.time() - start, probing, generation)
+
+    def stats(self):
+        """Devuelve un diccionario con el estado del circuit breaker."""
+        calls = len(self._window)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failures": sum(1 for failed, _ in self._window if failed),
+            "window_slow_calls": sum(1 for _, slow in self._window if slow),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
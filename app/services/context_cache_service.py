@@ -0,0 +1,235 @@
+"""
+Módulo encargado de la caché de contexto del proveedor de la IA.
+
+Alrededor del 90% de cada prompt (prompt de la fase, `prompt_3.txt`, categorías y mapa) es idéntico para
+todas las peticiones de un mismo (mapa, fase). Este módulo registra ese prefijo una sola vez en el backend
+(junto con `prompt_1.txt` como instrucción de sistema) y en las siguientes llamadas solo envía el sufijo
+dinámico con el resumen del draft, haciendo referencia al prefijo ya cacheado.
+
+Clases:
+- ContextCacheBackend: Interfaz de un backend con caché de contexto.
+- GeminiContextCacheBackend: Backend que usa la caché de contexto de Gemini (`caches`), con el cliente compartido.
+- LocalContextCacheBackend: Backend local en memoria que imita al proveedor, para pruebas.
+- ContextCacheManager: Registra cada prefijo una sola vez y reutiliza su referencia en las siguientes llamadas.
+
+Funciones:
+- create_context_cache_manager(backend_name, llm_backend): Crea el gestor para el backend configurado, o None si está desactivado.
+
+Notas:
+- Si el proveedor rechaza cachear un prefijo (p. ej. por no llegar al mínimo de tokens), se envía el prompt
+  completo y no se vuelve a intentar registrar ese prefijo hasta que pase `retry_after` segundos.
+"""
+import os
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from app.services.llm_service import GeminiBackend
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "off").lower()
+DEFAULT_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+DEFAULT_CONTEXT_CACHE_MODEL = os.getenv("GEMINI_CONTEXT_CACHE_MODEL", "")
+
+
+class ContextCacheBackend(ABC):
+    """Interfaz de un backend de IA con caché de contexto: cada backend implementa `register`, `generate_cached` y `generate`."""
+
+    model_name = None
+
+    @abstractmethod
+    async def register(self, system_instruction, prefix, ttl):
+        """Registra el prefijo en el backend y devuelve una referencia (handle) para usarlo después."""
+
+    @abstractmethod
+    async def generate_cached(self, handle, suffix):
+        """Genera la respuesta a partir del prefijo cacheado `handle` y el sufijo dinámico."""
+
+    @abstractmethod
+    async def generate(self, system_instruction, prompt):
+        """Genera la respuesta sin caché, enviando el prompt completo."""
+
+    async def stream_cached(self, handle, suffix):
+        """Como `generate_cached`, pero devuelve los fragmentos de texto según se generan."""
+        yield await self.generate_cached(handle, suffix)
+
+    async def stream(self, system_instruction, prompt):
+        """Como `generate`, pero devuelve los fragmentos de texto según se generan."""
+        yield await self.generate(system_instruction, prompt)
+
+
+class GeminiContextCacheBackend(ContextCacheBackend):
+    """
+    Backend que usa la caché de contexto de Gemini, con el cliente (y el pool de conexiones) del `GeminiBackend`
+    indicado. Usa el mismo modelo que el `GeminiBackend` (`GEMINI_MODEL`), salvo que se fije otro en
+    `model_name` (`GEMINI_CONTEXT_CACHE_MODEL`), p. ej. una versión fija: un prefijo cacheado solo sirve con
+    el modelo con el que se registró.
+    """
+
+    def __init__(self, gemini=None, model_name=DEFAULT_CONTEXT_CACHE_MODEL):
+        self.gemini = gemini or GeminiBackend()
+        self.pinned_model = model_name or None
+
+    @property
+    def model_name(self):
+        return self.pinned_model or self.gemini.model_name
+
+    async def register(self, system_instruction, prefix, ttl):
+        return await self.gemini.create_cached_content(system_instruction, [prefix], ttl, self.pinned_model)
+
+    async def generate_cached(self, handle, suffix):
+        return await self.gemini.generate(suffix, cached_content=handle, model_name=self.pinned_model)
+
+    async def generate(self, system_instruction, prompt):
+        return await self.gemini.generate(prompt, system_instruction, model_name=self.pinned_model)
+
+    async def stream_cached(self, handle, suffix):
+        async for chunk in self.gemini.stream(suffix, cached_content=handle, model_name=self.pinned_model):
+            yield chunk
+
+    async def stream(self, system_instruction, prompt):
+        async for chunk in self.gemini.stream(prompt, system_instruction, model_name=self.pinned_model):
+            yield chunk
+
+
+class LocalContextCacheBackend(ContextCacheBackend):
+    """
+    Backend local que imita la caché de contexto del proveedor, para pruebas.
+
+    Guarda los prefijos registrados en memoria y responde con `responder(prompt_completo)`, que por
+    defecto devuelve una línea de sugerencia fija. Cuenta los caracteres enviados para comprobar el ahorro.
+    """
+
+    def __init__(self, responder=None, min_prefix_chars=0):
+        self.responder = responder or (lambda prompt: "1. Hank | 100% | Local stub response | Respuesta local de prueba")
+        self.min_prefix_chars = min_prefix_chars
+        self.prefixes = {}
+        self.sent_chars = 0
+
+    async def register(self, system_instruction, prefix, ttl):
+        if len(prefix) < self.min_prefix_chars:
+            raise ValueError("Prefix too small to be cached")
+        handle = f"local-cache-{len(self.prefixes)}"
+        self.prefixes[handle] = system_instruction + "\n\n" + prefix
+        self.sent_chars += len(system_instruction) + len(prefix)
+        return handle
+
+    async def generate_cached(self, handle, suffix):
+        self.sent_chars += len(suffix)
+        return self.responder(self.prefixes[handle] + suffix)
+
+    async def generate(self, system_instruction, prompt):
+        self.sent_chars += len(system_instruction) + len(prompt)
+        return self.responder(system_instruction + "\n\n" + prompt)
+
+
+class ContextCacheManager:
+    """Registra cada prefijo estático una sola vez en el backend y reutiliza su referencia."""
+
+    def __init__(self, backend, ttl=DEFAULT_CONTEXT_CACHE_TTL, retry_after=600):
+        self.backend = backend
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.registrations = 0
+        self.cached_calls = 0
+        self.uncached_calls = 0
+        self.failures = 0
+        self._handles = {}    # prefix_key -> (instante de caducidad, handle)
+        self._rejected = {}   # prefix_key -> instante a partir del cual se puede reintentar
+        self._locks = {}      # prefix_key -> asyncio.Lock (un único registro por prefijo)
+
+    async def _get_handle(self, draft_prompt):
+        """Devuelve la referencia al prefijo cacheado, registrándolo si hace falta; None si no se puede."""
+        key = draft_prompt.prefix_key
+        now = time.monotonic()
+
+        entry = self._handles.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        if self._rejected.get(key, 0) > now:
+            return None
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Otra petición puede haberlo registrado mientras esperábamos
+            entry = self._handles.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+            try:
+                handle = await self.backend.register(draft_prompt.system_instruction, draft_prompt.prefix, self.ttl)
+            except Exception:
+                self.failures += 1
+                self._rejected[key] = time.monotonic() + self.retry_after
+                return None
+
+            self.registrations += 1
+            # Se deja un margen para no usar una referencia a punto de caducar en el proveedor
+            self._handles[key] = (time.monotonic() + self.ttl * 0.9, handle)
+            return handle
+
+    async def generate(self, draft_prompt):
+        """
+        Genera la respuesta para un `DraftPrompt`, usando el prefijo cacheado si es posible.
+
+        Retorna:
+        - str: Texto de la respuesta del backend.
+        """
+        handle = await self._get_handle(draft_prompt)
+
+        if handle is not None:
+            self.cached_calls += 1
+            return await self.backend.generate_cached(handle, draft_prompt.suffix)
+
+        self.uncached_calls += 1
+        return await self.backend.generate(draft_prompt.system_instruction, draft_prompt.prefix + draft_prompt.suffix)
+
+    async def stream(self, draft_prompt):
+        """Como `generate`, pero devuelve los fragmentos de texto de la respuesta según se generan."""
+        handle = await self._get_handle(draft_prompt)
+
+        if handle is not None:
+            self.cached_calls += 1
+            chunks = self.backend.stream_cached(handle, draft_prompt.suffix)
+        else:
+            self.uncached_calls += 1
+            chunks = self.backend.stream(draft_prompt.system_instruction, draft_prompt.prefix + draft_prompt.suffix)
+
+        async for chunk in chunks:
+            yield chunk
+
+    @property
+    def model_name(self):
+        """Modelo con el que se generan las respuestas (None si el backend no lo indica)."""
+        return self.backend.model_name
+
+    def stats(self):
+        """Devuelve un diccionario con las métricas de la caché de contexto."""
+        return {
+            "backend": type(self.backend).__name__,
+            "model": self.model_name,
+            "prefixes": len(self._handles),
+            "registrations": self.registrations,
+            "cached_calls": self.cached_calls,
+            "uncached_calls": self.uncached_calls,
+            "failures": self.failures,
+        }
+
+
+def create_context_cache_manager(backend_name=DEFAULT_CONTEXT_CACHE, llm_backend=None):
+    """
+    Crea el gestor de caché de contexto para el backend indicado.
+
+    Parámetros:
+    - backend_name (str): "gemini", "local" u "off".
+    - llm_backend (LLMBackend): Backend de la IA de la API; si es de Gemini, se comparte su cliente.
+
+    Retorna:
+    - ContextCacheManager o None si la caché de contexto está desactivada.
+    """
+    if backend_name == "gemini":
+        return ContextCacheManager(GeminiContextCacheBackend(llm_backend if isinstance(llm_backend, GeminiBackend) else None))
+    if backend_name == "local":
+        return ContextCacheManager(LocalContextCacheBackend())
+    if backend_name in ("", "off", "none"):
+        return None
+    raise ValueError(f"Unknown context cache backend: {backend_name}")
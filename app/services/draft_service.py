@@ -1,5 +1,8 @@
 """
-Módulo encargado de gestionar la lógica del sistema de draft en Brawl Stars.
+Módulo encargado de gestionar la lógica del sistema de draft en Brawl Stars desde la consola.
+
+Usa `rich` para mostrar el draft, así que la API no lo importa: sus tablas solo se usan en la versión de
+consola y en el modo de registro `console` (`DRAFT_LOG=console`).
 
 Funciones:
 - ban_phase(team, brawlers): Maneja la fase de baneos de los brawlers.
@@ -16,7 +19,7 @@ from rich import print
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
-from app.utils.config import clean_console
+from app.utils.console import clean_console
 
 
 def ban_phase(team, brawlers):
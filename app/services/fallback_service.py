@@ -0,0 +1,98 @@
+"""
+Módulo encargado de la recomendación local de respaldo, sin IA.
+
+Cuando Gemini no está disponible (circuito abierto, error o timeout) o su respuesta no contiene ninguna
+sugerencia válida, la API responde con una recomendación calculada localmente a partir de los brawlers,
+mapas, tiers y counters cargados. Devuelve la misma estructura que `parse_gemini_response`, marcada con
+`"fallback": True` para que la aplicación pueda indicarlo.
+
+Funciones:
+- local_recommendation(scoring_engine, phase, selected_map, banned_brawlers, picks, size): Genera las sugerencias locales.
+"""
+
+# Número de sugerencias, igual que en los prompts
+DEFAULT_SUGGESTIONS = 5
+
+# Fases en las que se eligen dos brawlers a la vez
+PAIR_PHASES = (2, 3)
+
+
+def describe(entries):
+    """Genera la explicación en inglés y en español a partir del desglose de la puntuación."""
+    reasons_usa = []
+    reasons_esp = []
+
+    tiers = ", ".join(entry["tier"] or "-" for entry in entries)
+    reasons_usa.append(f"tier {tiers}")
+    reasons_esp.append(f"tier {tiers}")
+
+    if any(entry["map_bonus"] for entry in entries):
+        reasons_usa.append("recommended for this map and phase")
+        reasons_esp.append("recomendado para este mapa y fase")
+
+    counters = sum(entry["counters"] for entry in entries)
+    if counters:
+        reasons_usa.append(f"counters {counters} enemy pick(s)")
+        reasons_esp.append(f"counterea {counters} pick(s) enemigo(s)")
+
+    countered_by = sum(entry["countered_by"] for entry in entries)
+    if countered_by:
+        reasons_usa.append(f"countered by {countered_by} enemy pick(s)")
+        reasons_esp.append(f"countereado por {countered_by} pick(s) enemigo(s)")
+
+    return (
+        "Local recommendation (AI unavailable): " + "; ".join(reasons_usa) + ".",
+        "Recomendación local (IA no disponible): " + "; ".join(reasons_esp) + "."
+    )
+
+
+def local_recommendation(scoring_engine, phase, selected_map, banned_brawlers, picks, size=DEFAULT_SUGGESTIONS):
+    """
+    Genera una recomendación determinista a partir del `ScoringEngine`.
+
+    En las fases 2 y 3 se recomiendan parejas de brawlers (las de mayor puntuación conjunta, sin repetir
+    la misma pareja) y en las fases 1 y 4 brawlers individuales.
+
+    Parámetros:
+    - scoring_engine (ScoringEngine): Motor de puntuación local.
+    - phase (int): Fase del draft (1 a 4).
+    - selected_map (str): Nombre del mapa seleccionado.
+    - banned_brawlers (list): Brawlers baneados.
+    - picks (list): Picks realizados hasta el momento, en orden de slot.
+    - size (int): Número de sugerencias.
+
+    Retorna:
+    - dict: `{"gemini_suggestions": [...], "fallback": True}` con el mismo formato que la respuesta de Gemini.
+    """
+    if phase in PAIR_PHASES:
+        # Las mejores parejas salen de los mejores candidatos individuales
+        ranked = scoring_engine.score(phase, selected_map, banned_brawlers, picks, top=size + 1)
+        options = sorted(
+            (
+                (first["score"] + second["score"], [first, second])
+                for i, first in enumerate(ranked)
+                for second in ranked[i + 1:]
+            ),
+            key=lambda option: option[0],
+            reverse=True
+        )[:size]
+    else:
+        ranked = scoring_engine.score(phase, selected_map, banned_brawlers, picks, top=size)
+        options = [(entry["score"], [entry]) for entry in ranked]
+
+    # Probabilidades proporcionales a la puntuación (desplazada para que sean positivas), sumando 100
+    lowest = min((score for score, _ in options), default=0.0)
+    weights = [score - lowest + 1.0 for score, _ in options]
+    total = sum(weights) or 1.0
+
+    suggestions = []
+    for (_, entries), weight in zip(options, weights):
+        explanation_usa, explanation_esp = describe(entries)
+        suggestions.append({
+            "brawlers": " + ".join(entry["brawler"] for entry in entries),
+            "probability": round(100 * weight / total),
+            "explanationUSA": explanation_usa,
+            "explanationESP": explanation_esp
+        })
+
+    return {"gemini_suggestions": suggestions, "fallback": True}
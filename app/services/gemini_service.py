@@ -1,42 +1,95 @@
 """
 Módulo encargado de gestionar la interacción con la API de Gemini.
 
+Las llamadas se hacen con el backend de la IA compartido (`llm_service`): por defecto Gemini, con un cliente
+de larga duración que reutiliza las conexiones; la API usa el de `app.state.llm_backend` y los scripts, el
+configurado en el entorno (`get_default_backend`).
+
+Cada llamada registra en `metrics_service` su latencia (`llm_call`, `llm_stream` y `parse`), su resultado
+(`brawlgpt_llm_calls_total`), las respuestas sin sugerencias y las llamadas en curso; dentro de una petición
+también abre los spans `llm_call`, `parse` y `llm_stream` de su traza (`tracing_service`).
+
 Funciones:
-- call_gemini(prompt): Envía un prompt a la API de Gemini y obtiene la respuesta.
+- call_gemini(prompt, context_cache, backend, hedger): Envía un prompt a la IA de forma asíncrona y obtiene la respuesta.
+- prompt_size(prompt): Devuelve el número de caracteres de un prompt (atributo de los spans).
 - parse_gemini_response(response_text): Procesa la respuesta de Gemini y la estructura en JSON.
+- parse_gemini_line(line): Convierte una línea de la respuesta en una sugerencia.
+- stream_gemini(prompt, context_cache, backend): Envía un prompt a la IA en modo streaming y devuelve los fragmentos de texto.
+- stream_suggestions(chunks): Parsea un flujo de fragmentos y devuelve cada sugerencia en cuanto su línea está completa.
 """
-import os
-import re
-import google.generativeai as genai
-from dotenv import load_dotenv
-from app.services.draft_service import print_json
+import time
+import asyncio
+from app.utils.prompts import DraftPrompt
+from app.utils.parser import parse_suggestions, parse_suggestion_line, SuggestionStreamParser
+from app.services.llm_service import get_default_backend
+from app.services.metrics_service import DRAFT_STAGE_SECONDS, LLM_CALLS, LLM_IN_FLIGHT, LLM_EMPTY_PARSES
+from app.services.tracing_service import span, start_span
 
-# Cargar variables de entorno
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-def call_gemini(prompt):
+async def call_gemini(prompt, context_cache=None, backend=None, hedger=None):
     """
     Envía un prompt a la API de Gemini y devuelve la respuesta estructurada.
 
+    Usa la API asíncrona del backend, por lo que la espera a la IA no bloquea
+    ningún hilo: el event loop puede atender otras peticiones mientras tanto.
+
     Parámetros:
-    - prompt (str): Texto con la información del draft.
+    - prompt (str | DraftPrompt): Texto con la información del draft, o el prompt dividido
+      en instrucción de sistema, prefijo estático y sufijo dinámico.
+    - context_cache (ContextCacheManager): Gestor de la caché de contexto. Si se indica y el prompt
+      es un `DraftPrompt`, el prefijo estático se registra una vez y se reutiliza.
+    - backend (LLMBackend): Backend de la IA; por defecto, el configurado en el entorno.
+    - hedger (HedgedCaller): Si se indica, la llamada se repite en paralelo cuando tarda más que el percentil
+      de latencia configurado y se usa la primera respuesta.
 
     Retorna:
     - dict: Lista de brawlers sugeridos con sus probabilidades.
     """
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
+    backend = backend or get_default_backend()
+    LLM_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        model = (context_cache.model_name if context_cache is not None else None) or backend.model_name
+        with span("llm_call", model=model, prompt_chars=prompt_size(prompt), context_cache=context_cache is not None) as llm_span:
+            if isinstance(prompt, DraftPrompt) and context_cache is not None:
+                generate = lambda: context_cache.generate(prompt)
+            elif isinstance(prompt, DraftPrompt):
+                # `prompt_1` se envía como instrucción de sistema
+                generate = lambda: backend.generate(prompt.prefix + prompt.suffix, prompt.system_instruction)
+            else:
+                generate = lambda: backend.generate(prompt)
+            response_text = await (hedger.call(generate) if hedger is not None else generate())
+            llm_span.set("response_chars", len(response_text or ""))
+    except (asyncio.CancelledError, GeneratorExit):
+        LLM_CALLS.inc("cancelled")
+        raise
+    except Exception:
+        LLM_CALLS.inc("error")
+        raise
+    finally:
+        LLM_IN_FLIGHT.dec()
+        DRAFT_STAGE_SECONDS.observe(time.perf_counter() - started, "llm_call")
 
     # Parsea la respuesta generada por Gemini en un json.
-    parse_response = parse_gemini_response(response.text)
-
-    # Imprime la respuesta generada por Gemini en la consola.
-    print_json(parse_response)
-
-    return parse_response if response.text else "No response from Gemini."
-
-import re
+    started = time.perf_counter()
+    with span("parse") as parse_span:
+        parse_response = parse_gemini_response(response_text)
+        parse_span.set("suggestions", len(parse_response["gemini_suggestions"]))
+    DRAFT_STAGE_SECONDS.observe(time.perf_counter() - started, "parse")
+
+    if parse_response["gemini_suggestions"]:
+        LLM_CALLS.inc("ok")
+    else:
+        LLM_CALLS.inc("empty")
+        LLM_EMPTY_PARSES.inc()
+
+    return parse_response if response_text else "No response from Gemini."
+
+def prompt_size(prompt):
+    """Devuelve el número de caracteres de un prompt (texto o `DraftPrompt`)."""
+    if isinstance(prompt, DraftPrompt):
+        return len(prompt.system_instruction) + len(prompt.prefix) + len(prompt.suffix)
+    return len(prompt)
 
 def parse_gemini_response(response_text):
     """
@@ -48,40 +101,79 @@ def parse_gemini_response(response_text):
     Retorna:
     - dict: Lista de sugerencias con brawlers, probabilidades y explicaciones.
     """
-    suggestions = []
-    lines = response_text.strip().split("\n")
-
-    # Procesamos las líneas de la respuesta
-    for line in lines:
-        # Regular expression para capturar el brawler, porcentaje, explicación en inglés y explicación en español
-        # Este formato es el que ahora esperamos:
-        # "[Brawler Name] | [Percentage]% | [Explanation in English] | [Explanation in Spanish]"
-        
-        match = re.match(r"(\d+\.)?\s*(.*?)\s*\|\s*(\d+)%\s*\|\s*(.*?)\s*\|\s*(.*)", line)
-
-        if match:
-            brawlers = match.group(2).strip()  # Nombre del brawler
-            # Eliminar asteriscos del nombre de los brawlers
-            brawlers = brawlers.replace("**", "").strip()
-
-            probability = int(match.group(3))  # Probabilidad
-            explanationUSA = match.group(4).strip()  # Explicación en inglés
-            explanationESP = match.group(5).strip()  # Explicación en español
-
-            # Eliminar cualquier carácter extra que pueda haberse incluido (como asteriscos)
-            explanationUSA = explanationUSA.replace("**", "").strip()
-            explanationESP = explanationESP.replace("**", "").strip()
-
-            # Manejo del caso en el que el brawler y la probabilidad se repiten antes de la explicación en español
-            duplicate_pattern = rf"^\s*{re.escape(brawlers)}\s*\|\s*{probability}%\s*\|"
-            explanationESP = re.sub(duplicate_pattern, "", explanationESP).strip()
-
-            # Añadir la sugerencia al listado
-            suggestions.append({
-                "brawlers": brawlers,
-                "probability": probability,
-                "explanationUSA": explanationUSA,
-                "explanationESP": explanationESP
-            })
-
-    return {"gemini_suggestions": suggestions}
+    return {"gemini_suggestions": parse_suggestions(response_text)}
+
+def parse_gemini_line(line):
+    """
+    Convierte una línea de la respuesta de Gemini en una sugerencia.
+
+    Parámetros:
+    - line (str): Línea con el formato "[Brawler Name] | [Percentage]% | [Explanation in English] | [Explanation in Spanish]".
+
+    Retorna:
+    - dict | None: Sugerencia con brawlers, probabilidad y explicaciones, o None si la línea no tiene ese formato.
+    """
+    return parse_suggestion_line(line)
+
+async def stream_gemini(prompt, context_cache=None, backend=None):
+    """
+    Envía un prompt a Gemini en modo streaming y va devolviendo los fragmentos de texto según se generan.
+
+    Parámetros:
+    - prompt (DraftPrompt): Prompt dividido del draft.
+    - context_cache (ContextCacheManager): Gestor de la caché de contexto (opcional).
+    - backend (LLMBackend): Backend de la IA; por defecto, el configurado en el entorno.
+
+    Retorna:
+    - Generador asíncrono de fragmentos de texto.
+    """
+    backend = backend or get_default_backend()
+    LLM_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    # El span no se activa: el generador cede el control al consumidor entre fragmentos
+    model = (context_cache.model_name if context_cache is not None else None) or backend.model_name
+    llm_span = start_span("llm_stream", model=model, prompt_chars=prompt_size(prompt), context_cache=context_cache is not None)
+    response_chars = 0
+    try:
+        if context_cache is not None:
+            async for chunk in context_cache.stream(prompt):
+                response_chars += len(chunk)
+                yield chunk
+        else:
+            # `prompt_1` se envía como instrucción de sistema
+            async for chunk in backend.stream(prompt.prefix + prompt.suffix, prompt.system_instruction):
+                response_chars += len(chunk)
+                yield chunk
+        LLM_CALLS.inc("ok")
+    except (asyncio.CancelledError, GeneratorExit) as e:
+        LLM_CALLS.inc("cancelled")
+        llm_span.record_error(e)
+        raise
+    except Exception as e:
+        LLM_CALLS.inc("error")
+        llm_span.record_error(e)
+        raise
+    finally:
+        LLM_IN_FLIGHT.dec()
+        DRAFT_STAGE_SECONDS.observe(time.perf_counter() - started, "llm_stream")
+        llm_span.set("response_chars", response_chars)
+        llm_span.end()
+
+async def stream_suggestions(chunks):
+    """
+    Parsea de forma incremental un flujo de fragmentos de texto y devuelve cada sugerencia en cuanto
+    su línea está completa.
+
+    Parámetros:
+    - chunks: Generador asíncrono de fragmentos de texto (p. ej. `stream_gemini`).
+
+    Retorna:
+    - Generador asíncrono de sugerencias (mismo formato que en `parse_gemini_response`).
+    """
+    parser = SuggestionStreamParser()
+    async for chunk in chunks:
+        for suggestion in parser.feed(chunk):
+            yield suggestion
+
+    for suggestion in parser.close():
+        yield suggestion
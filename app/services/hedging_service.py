@@ -0,0 +1,167 @@
+"""
+Módulo que implementa las peticiones cubiertas (hedging) a la IA para recortar la cola de latencia.
+
+La latencia de Gemini tiene una cola larga: la mayoría de las respuestas llegan en un par de segundos, pero
+unas pocas tardan mucho más y agotan el temporizador del draft del usuario. Si una llamada no ha terminado
+cuando ya ha superado el percentil `percentile` de la latencia reciente, se lanza una segunda llamada
+idéntica, se usa la primera respuesta que llegue y la otra se cancela.
+
+Las llamadas extra están limitadas por un presupuesto: cada llamada normal suma `budget` créditos (p. ej.
+0.05) y cada llamada extra gasta uno, así que a la larga nunca se hace más de un `budget` de llamadas de más
+(con una ráfaga máxima de `max_burst`). Hasta tener `min_samples` latencias no se cubre ninguna llamada.
+
+Clases:
+- HedgedCaller: Ejecuta llamadas con una llamada extra de respaldo si la primera tarda demasiado.
+
+Funciones:
+- create_hedged_caller(mode): Crea el `HedgedCaller` configurado, o None si está desactivado.
+
+Notas:
+- Solo se cubren las llamadas sin streaming: en streaming los primeros fragmentos ya se han enviado al
+  usuario y no se puede cambiar de respuesta a mitad.
+- Si una de las dos llamadas falla, se espera a la otra; solo se lanza el error si fallan las dos.
+- Dentro de una traza, el span `llm_call` lleva los atributos `hedged`, `hedge_delay_ms` y `hedge_won`.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from app.services.metrics_service import LLM_HEDGES_SENT, LLM_HEDGES_WON, LLM_HEDGES_SKIPPED
+from app.services.tracing_service import set_attributes
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_HEDGE_MODE = os.getenv("LLM_HEDGE", "off").lower()
+DEFAULT_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+DEFAULT_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+DEFAULT_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+DEFAULT_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+
+class HedgedCaller:
+    """Ejecuta llamadas asíncronas con una llamada de respaldo cuando la primera supera el percentil de latencia."""
+
+    def __init__(self, percentile=DEFAULT_HEDGE_PERCENTILE, budget=DEFAULT_HEDGE_BUDGET, window_size=DEFAULT_HEDGE_WINDOW,
+                 min_samples=DEFAULT_HEDGE_MIN_SAMPLES, max_burst=10):
+        """
+        Parámetros:
+        - percentile (float): Percentil (0-1) de la latencia reciente a partir del cual se lanza la llamada extra.
+        - budget (float): Proporción máxima de llamadas extra sobre las llamadas normales (0.05 = 5 %).
+        - window_size (int): Número de latencias recientes que se tienen en cuenta.
+        - min_samples (int): Latencias necesarias antes de empezar a cubrir llamadas.
+        - max_burst (int): Créditos acumulados como máximo (llamadas extra seguidas tras un periodo tranquilo).
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_burst = max_burst
+        self.calls = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+        self._credits = 0.0
+        self._latencies = deque(maxlen=window_size)  # Latencias de las llamadas recientes que terminaron bien
+
+    def hedge_delay(self):
+        """Devuelve los segundos tras los que se lanza la llamada extra, o None si aún no hay bastantes latencias."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(self.percentile * len(latencies)))]
+
+    async def _timed(self, func):
+        """Ejecuta `func()` y registra su latencia si termina bien (las llamadas canceladas no se registran)."""
+        start = time.monotonic()
+        result = await func()
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    async def call(self, func):
+        """
+        Ejecuta `func()` (una función que devuelve una corrutina) y, si tarda más que `hedge_delay()` y queda
+        presupuesto, lanza otra llamada igual y devuelve el resultado de la primera que termine bien.
+
+        Lanza:
+        - La excepción de la llamada si no se cubre, o la de la primera llamada si fallan las dos.
+        """
+        self.calls += 1
+        self._credits = min(self.max_burst, self._credits + self.budget)
+        delay = self.hedge_delay()
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._timed(func))
+        tasks = [primary]
+        try:
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            if self._credits < 1:
+                self.hedges_skipped += 1
+                LLM_HEDGES_SKIPPED.inc()
+                return await primary
+
+            self._credits -= 1
+            self.hedges_sent += 1
+            LLM_HEDGES_SENT.inc()
+            set_attributes(hedged=True, hedge_delay_ms=round(delay * 1000, 1))
+            hedge = asyncio.ensure_future(self._timed(func))
+            tasks.append(hedge)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    won = primary not in succeeded
+                    set_attributes(hedge_won=won)
+                    if won:
+                        self.hedges_won += 1
+                        LLM_HEDGES_WON.inc()
+                        if not primary.done():
+                            # La llamada principal se cancela: lo que llevaba (desde su inicio) es un mínimo de su
+                            # latencia real y así la cola lenta no desaparece de la ventana. La de la llamada
+                            # extra perdedora nunca se registra: empezó tarde y su tiempo sería demasiado corto
+                            self._latencies.append(time.monotonic() - started)
+                    return succeeded[0].result()
+            # Han fallado las dos llamadas
+            return primary.result()
+        finally:
+            # La llamada perdedora (o las dos, si se cancela desde fuera) se cancela
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self):
+        """Devuelve un diccionario con las métricas de las llamadas cubiertas."""
+        delay = self.hedge_delay()
+        return {
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "samples": len(self._latencies),
+            "calls": self.calls,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_rate": self.hedges_sent / self.calls if self.calls else 0.0,
+        }
+
+
+def create_hedged_caller(mode=DEFAULT_HEDGE_MODE):
+    """
+    Crea el `HedgedCaller` para el modo indicado.
+
+    Parámetros:
+    - mode (str): "on" u "off".
+
+    Retorna:
+    - HedgedCaller o None si está desactivado.
+    """
+    if mode in ("on", "1", "true"):
+        return HedgedCaller()
+    if mode in ("", "off", "0", "false", "none"):
+        return None
+    raise ValueError(f"Unknown LLM hedge mode: {mode}")
@@ -0,0 +1,273 @@
+"""
+Módulo con los backends de la IA que generan las recomendaciones.
+
+Antes cada llamada creaba un `GenerativeModel` nuevo con el modelo escrito a mano, y la clave se
+configuraba de forma global al importar el SDK, así que no se reutilizaba nada entre peticiones ni se
+podía cambiar de backend. Ahora la API crea un único backend al arrancar (`app.state.llm_backend`) y todas
+las llamadas lo comparten:
+- `GeminiBackend` (por defecto) mantiene un cliente de `google-genai` con un pool de conexiones HTTP
+  keep-alive de tamaño y timeouts configurables. El SDK tarda casi un segundo en importarse, así que el
+  cliente se crea en un hilo la primera vez que hace falta (la API lo precarga en segundo plano al arrancar).
+- `StubBackend` responde de forma determinista y local, sin red ni cuota, para pruebas y benchmarks.
+
+El modelo y los parámetros de generación (temperatura, top-p, top-k y tokens máximos) se leen del entorno.
+
+Clases:
+- LLMBackend: Interfaz de un backend de la IA.
+- GeminiBackend: Backend de Gemini con un cliente de larga duración y pool de conexiones.
+- StubBackend: Backend local determinista que elige brawlers de la lista de disponibles del prompt.
+
+Funciones:
+- generation_config_from_env(): Devuelve los parámetros de generación configurados en el entorno.
+- create_llm_backend(backend_name): Crea el backend configurado.
+- get_default_backend(): Backend compartido para los scripts que llaman a la IA sin la API.
+"""
+import os
+import re
+import zlib
+import asyncio
+from abc import ABC, abstractmethod
+from app.utils.config import load_env_file
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+DEFAULT_GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+DEFAULT_GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+DEFAULT_GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "100"))
+DEFAULT_GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+DEFAULT_GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "20"))
+DEFAULT_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+
+# Parámetros de generación opcionales: (variable de entorno, parámetro del SDK, tipo)
+GENERATION_PARAMETERS = (
+    ("GEMINI_TEMPERATURE", "temperature", float),
+    ("GEMINI_TOP_P", "top_p", float),
+    ("GEMINI_TOP_K", "top_k", int),
+    ("GEMINI_MAX_OUTPUT_TOKENS", "max_output_tokens", int),
+)
+
+# Lista de brawlers disponibles del prompt ("Nombre (Tier), Nombre (Tier), ...") y orden de los tiers
+AVAILABLE_PATTERN = re.compile(r"Available Brawlers[^\n]*\n([^\n]*)")
+BRAWLER_PATTERN = re.compile(r"([^,()]+?) \(([A-Z])\)")
+TIER_ORDER = "SABCDEF"
+
+
+def generation_config_from_env():
+    """
+    Devuelve los parámetros de generación definidos en el entorno (`GEMINI_TEMPERATURE`, `GEMINI_TOP_P`,
+    `GEMINI_TOP_K` y `GEMINI_MAX_OUTPUT_TOKENS`); los que no están definidos usan el valor del modelo.
+    """
+    config = {}
+    for variable, parameter, cast in GENERATION_PARAMETERS:
+        value = os.getenv(variable, "")
+        if value:
+            config[parameter] = cast(value)
+    return config
+
+
+class LLMBackend(ABC):
+    """Interfaz de un backend de la IA: cada backend implementa `generate` y `stream`."""
+
+    model_name = None
+
+    async def load(self):
+        """Prepara el backend (p. ej. crea el cliente) para que la primera llamada no espere."""
+
+    @abstractmethod
+    async def generate(self, prompt, system_instruction=None, cached_content=None):
+        """Genera la respuesta completa al prompt y devuelve su texto."""
+
+    @abstractmethod
+    async def stream(self, prompt, system_instruction=None, cached_content=None):
+        """Como `generate`, pero devuelve (generador asíncrono) los fragmentos de texto según se generan."""
+
+    async def close(self):
+        """Libera las conexiones del backend."""
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Backend de Gemini con un único cliente de `google-genai` para todas las llamadas.
+
+    El cliente usa un `httpx.AsyncClient` propio con hasta `pool_size` conexiones keep-alive, así que las
+    llamadas reutilizan las conexiones TLS abiertas en lugar de abrir una nueva cada vez.
+    """
+
+    def __init__(self, model_name=DEFAULT_GEMINI_MODEL, generation_config=None, base_url=DEFAULT_GEMINI_BASE_URL,
+                 pool_size=DEFAULT_GEMINI_POOL_SIZE, connect_timeout=DEFAULT_GEMINI_CONNECT_TIMEOUT,
+                 timeout=DEFAULT_GEMINI_TIMEOUT, api_key=None):
+        """
+        Parámetros:
+        - model_name (str): Modelo de Gemini (`GEMINI_MODEL`).
+        - generation_config (dict): Parámetros de generación; por defecto, los del entorno.
+        - base_url (str): URL de la API (`GEMINI_BASE_URL`, p. ej. un servidor falso para pruebas de carga);
+          vacía para la de Google.
+        - pool_size (int): Conexiones HTTP abiertas como máximo (`GEMINI_POOL_SIZE`).
+        - connect_timeout (float): Segundos máximos para abrir una conexión (`GEMINI_CONNECT_TIMEOUT`).
+        - timeout (float): Segundos máximos de espera a la respuesta (`GEMINI_TIMEOUT`).
+        - api_key (str): Clave de la API; por defecto, `GEMINI_API_KEY`.
+        """
+        self.model_name = model_name
+        self.generation_config = generation_config if generation_config is not None else generation_config_from_env()
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.api_key = api_key
+        self._client = None
+        self._http_client = None
+        self._types = None
+        self._lock = asyncio.Lock()
+
+    def _create_client(self):
+        """
+        Importa `google-genai` y crea el cliente con su pool de conexiones (se ejecuta en un hilo).
+
+        Lanza:
+        - ValueError: Si no hay clave de la API.
+        - Cualquier excepción al crear el cliente (el pool de conexiones creado se cierra).
+        """
+        import httpx
+        from google import genai
+        from google.genai import types
+
+        load_env_file()
+        api_key = self.api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is not set")
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        )
+        try:
+            http_options = types.HttpOptions(httpx_async_client=http_client)
+            if self.base_url:
+                http_options.base_url = self.base_url
+            client = genai.Client(api_key=api_key, http_options=http_options)
+        except Exception:
+            # El hilo no tiene event loop: el pool (aún sin conexiones) se cierra en uno propio
+            asyncio.run(http_client.aclose())
+            raise
+        return client, http_client, types
+
+    async def get_client(self):
+        """Devuelve el cliente; la primera vez lo crea en un hilo para no bloquear el event loop."""
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    self._client, self._http_client, self._types = await asyncio.to_thread(self._create_client)
+        return self._client
+
+    async def load(self):
+        await self.get_client()
+
+    def _config(self, system_instruction, cached_content):
+        config = dict(self.generation_config)
+        if cached_content is not None:
+            # La instrucción de sistema ya forma parte del contenido cacheado
+            config["cached_content"] = cached_content
+        elif system_instruction:
+            config["system_instruction"] = system_instruction
+        return self._types.GenerateContentConfig(**config)
+
+    async def generate(self, prompt, system_instruction=None, cached_content=None, model_name=None):
+        client = await self.get_client()
+        response = await client.aio.models.generate_content(
+            model=model_name or self.model_name, contents=prompt, config=self._config(system_instruction, cached_content)
+        )
+        return response.text
+
+    async def stream(self, prompt, system_instruction=None, cached_content=None, model_name=None):
+        client = await self.get_client()
+        response = await client.aio.models.generate_content_stream(
+            model=model_name or self.model_name, contents=prompt, config=self._config(system_instruction, cached_content)
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    async def create_cached_content(self, system_instruction, contents, ttl, model_name=None):
+        """Registra `contents` y la instrucción de sistema en la caché de contexto de Gemini y devuelve su nombre."""
+        client = await self.get_client()
+        cached_content = await client.aio.caches.create(
+            model=model_name or self.model_name,
+            config=self._types.CreateCachedContentConfig(system_instruction=system_instruction, contents=contents, ttl=f"{ttl}s")
+        )
+        return cached_content.name
+
+    async def close(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+
+class StubBackend(LLMBackend):
+    """
+    Backend local determinista, para pruebas y benchmarks sin red ni cuota.
+
+    Responde con los `suggestions` mejores brawlers de la lista "Available Brawlers" del prompt (por tier y,
+    dentro de cada tier, en un orden fijo que depende del prompt), en el mismo formato que Gemini, así que el
+    mismo prompt siempre da la misma respuesta. `latency` simula el tiempo de generación.
+    """
+
+    model_name = "stub"
+
+    def __init__(self, latency=DEFAULT_STUB_LATENCY, suggestions=3):
+        self.latency = latency
+        self.suggestions = suggestions
+        self.calls = 0
+
+    def respond(self, prompt):
+        """Devuelve el texto de la respuesta al prompt."""
+        match = AVAILABLE_PATTERN.search(prompt)
+        brawlers = [(name.strip(), tier) for name, tier in BRAWLER_PATTERN.findall(match.group(1))] if match else []
+        brawlers.sort(key=lambda brawler: (TIER_ORDER.find(brawler[1]), zlib.crc32(f"{prompt}{brawler[0]}".encode())))
+        chosen = brawlers[:self.suggestions]
+
+        lines = []
+        for index, (name, tier) in enumerate(chosen):
+            share = 100 // len(chosen) + (100 % len(chosen) if index == 0 else 0)
+            lines.append(f"{index + 1}. {name} | {share}% | Tier {tier} pick for this draft. | Pick de tier {tier} para este draft.")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    async def generate(self, prompt, system_instruction=None, cached_content=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.respond(prompt)
+
+    async def stream(self, prompt, system_instruction=None, cached_content=None):
+        self.calls += 1
+        lines = self.respond(prompt).splitlines(keepends=True)
+        for line in lines:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(lines))
+            yield line
+
+
+def create_llm_backend(backend_name=DEFAULT_LLM_BACKEND):
+    """
+    Crea el backend de la IA indicado.
+
+    Parámetros:
+    - backend_name (str): "gemini" (por defecto) o "stub".
+
+    Retorna:
+    - LLMBackend: El backend creado (sin conectar: el cliente se crea en el primer uso o con `load`).
+    """
+    if backend_name == "gemini":
+        return GeminiBackend()
+    if backend_name == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown LLM backend: {backend_name}")
+
+
+# Backend compartido de los scripts que llaman a la IA sin la API (se crea en el primer uso)
+_default_backend = None
+
+def get_default_backend():
+    """Devuelve el backend configurado en el entorno, creándolo la primera vez."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = create_llm_backend()
+    return _default_backend
@@ -0,0 +1,172 @@
+"""
+Módulo encargado del registro estructurado de los drafts que atiende la API.
+
+Cada petición a `/draft` imprimía en consola el resumen del draft y las sugerencias con tablas de `rich`,
+de forma síncrona: trabajo inútil en un servidor sin terminal y, con carga, todas las peticiones compitiendo
+por el lock de stdout. Ahora la petición solo encola un registro (un diccionario) y un hilo de fondo los
+saca de la cola por lotes y los escribe como líneas JSON. Las tablas de `rich` quedan para la versión de
+consola (`scripts/main_console.py`) o para el modo `console`.
+
+Clases:
+- DraftLogger: Cola acotada de registros con un hilo de fondo que los escribe por lotes.
+- JsonLinesSink: Escribe cada registro como una línea JSON en stdout o en un fichero.
+- RichConsoleSink: Muestra los registros con las tablas de `rich` de la versión de consola.
+
+Funciones:
+- create_draft_logger(mode, log_file): Crea el registro para el modo configurado, o None si está desactivado.
+
+Notas:
+- Si la cola está llena (el destino no da abasto), los registros nuevos se descartan y se cuentan en
+  `dropped`: el registro nunca frena una petición.
+- Además de los drafts, se registran las recargas del meta (`meta_reloaded` y `meta_reload_failed`, de
+  `MetaReloader`); el modo `console` solo muestra los drafts.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import threading
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_LOG_MODE = os.getenv("DRAFT_LOG", "json").lower()
+DEFAULT_LOG_FILE = os.getenv("DRAFT_LOG_FILE", "")
+DEFAULT_LOG_QUEUE_SIZE = int(os.getenv("DRAFT_LOG_QUEUE_SIZE", "10000"))
+
+# Marca que indica al hilo de fondo que termine
+_STOP = object()
+
+
+class JsonLinesSink:
+    """Escribe cada registro como una línea JSON."""
+
+    def __init__(self, log_file=""):
+        """
+        Parámetros:
+        - log_file (str): Fichero en el que se añaden los registros; si está vacío, se usa stdout.
+        """
+        self._owned = bool(log_file)
+        self.stream = open(log_file, "a", encoding="utf-8") if log_file else sys.stdout
+
+    def write(self, records):
+        self.stream.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+        self.stream.flush()
+
+    def close(self):
+        if self._owned:
+            self.stream.close()
+
+
+class RichConsoleSink:
+    """Muestra el resumen del draft y las sugerencias con las tablas de `rich` de la versión de consola."""
+
+    def write(self, records):
+        # `rich` solo se importa si se usa este modo
+        from app.services.draft_service import print_draft_summary, print_json
+
+        for record in records:
+            if record["event"] == "draft_summary":
+                print_draft_summary(record["map"], record["phase"], record["team"], record["banned_brawlers"], record["picks"])
+            elif record["event"] == "draft_suggestions":
+                print_json({"gemini_suggestions": record["suggestions"]})
+
+    def close(self):
+        pass
+
+
+class DraftLogger:
+    """Registro asíncrono: `log` solo encola y un hilo de fondo escribe los registros por lotes."""
+
+    def __init__(self, sink, max_queue=DEFAULT_LOG_QUEUE_SIZE, batch_size=256):
+        """
+        Parámetros:
+        - sink: Destino de los registros (`JsonLinesSink` o `RichConsoleSink`).
+        - max_queue (int): Registros pendientes como máximo; a partir de ahí se descartan.
+        - batch_size (int): Registros que se escriben de una vez como máximo.
+        """
+        self.sink = sink
+        self.batch_size = batch_size
+        self.logged = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="draft-logger", daemon=True)
+        self._thread.start()
+
+    def log(self, event, **fields):
+        """Encola un registro con la hora, el tipo de evento y los campos indicados. No bloquea nunca."""
+        try:
+            self._queue.put_nowait({"ts": time.time(), "event": event, **fields})
+            self.logged += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        """Bucle del hilo de fondo: espera un registro, recoge los que ya estén en cola y los escribe juntos."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            records = [record for record in batch if record is not _STOP]
+            if records:
+                try:
+                    self.sink.write(records)
+                    self.written += len(records)
+                except Exception:
+                    # Un fallo del destino no debe parar el registro
+                    self.errors += 1
+            if stop:
+                return
+
+    def close(self, timeout=5.0):
+        """
+        Escribe los registros pendientes, para el hilo de fondo y cierra el destino, esperando como mucho
+        `timeout` segundos en total. Si el hilo no termina a tiempo (el destino está bloqueado o el hilo ha
+        muerto con la cola llena), se abandonan los registros pendientes y el destino se deja abierto, porque
+        el hilo podría seguir escribiendo en él; al ser un hilo daemon no impide que el proceso termine.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if not self._thread.is_alive():
+            self.sink.close()
+
+    def stats(self):
+        """Devuelve un diccionario con las métricas del registro."""
+        return {
+            "sink": type(self.sink).__name__,
+            "logged": self.logged,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queued": self._queue.qsize(),
+        }
+
+
+def create_draft_logger(mode=DEFAULT_LOG_MODE, log_file=DEFAULT_LOG_FILE):
+    """
+    Crea el registro de drafts para el modo indicado.
+
+    Parámetros:
+    - mode (str): "json" (líneas JSON, por defecto), "console" (tablas de `rich`) u "off".
+    - log_file (str): Fichero de las líneas JSON; si está vacío, se escriben en stdout.
+
+    Retorna:
+    - DraftLogger o None si el registro está desactivado.
+    """
+    if mode == "json":
+        return DraftLogger(JsonLinesSink(log_file))
+    if mode == "console":
+        return DraftLogger(RichConsoleSink())
+    if mode in ("", "off", "none"):
+        return None
+    raise ValueError(f"Unknown draft log mode: {mode}")
@@ -0,0 +1,277 @@
+"""
+Módulo encargado de la búsqueda local con anticipación (lookahead) para las fases 2 y 3 del draft.
+
+En las fases 2 y 3 se eligen dos brawlers sabiendo que el rival responde a continuación. En lugar de dejar
+que la IA lo razone de forma informal, este módulo explora el árbol de picks restante del draft con
+minimax y poda alfa-beta, usando como función de evaluación los counters, tiers y picks recomendados del
+mapa (los datos cargados por `load_data` y `load_maps`, a través del `BrawlerRegistry`).
+
+- Los estados se codifican con dos bitsets (picks de cada equipo) y el índice del turno, que es la clave
+  de la tabla de transposiciones.
+- La profundidad se aumenta de forma iterativa mientras quede presupuesto de tiempo; si se agota, se
+  devuelve el resultado de la última profundidad completada.
+- En cada nodo solo se consideran los `beam` mejores candidatos según una heurística rápida, porque el
+  número de parejas posibles con todo el roster es demasiado grande.
+
+Clases:
+- DraftSearch: Búsqueda alfa-beta con tabla de transposiciones e iterative deepening.
+
+Funciones:
+- format_lookahead(result): Convierte el resultado de la búsqueda en texto para añadirlo al prompt.
+"""
+import os
+import time
+from itertools import combinations
+from app.services.scoring_service import TIER_WEIGHTS, FIRST_TEAM_SLOTS, SECOND_TEAM_SLOTS
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_TIME_BUDGET = float(os.getenv("LOOKAHEAD_TIME_BUDGET", "0.5"))
+DEFAULT_BEAM = int(os.getenv("LOOKAHEAD_BEAM", "10"))
+LOOKAHEAD_IN_PROMPT = os.getenv("LOOKAHEAD_IN_PROMPT", "0") == "1"
+
+FIRST_TEAM = 0
+SECOND_TEAM = 1
+
+# Turnos que quedan desde cada fase: (equipo que elige, número de brawlers)
+REMAINING_TURNS = {
+    2: ((SECOND_TEAM, 2), (FIRST_TEAM, 2), (SECOND_TEAM, 1)),
+    3: ((FIRST_TEAM, 2), (SECOND_TEAM, 1)),
+}
+
+# Tipos de entrada de la tabla de transposiciones
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class _SearchTimeout(Exception):
+    """Se ha agotado el presupuesto de tiempo de la búsqueda."""
+
+
+class DraftSearch:
+    """Búsqueda alfa-beta sobre el resto del draft con tabla de transposiciones."""
+
+    def __init__(self, registry, counter_weight=2.0, map_weight=3.0):
+        self.registry = registry
+        self.counter_weight = counter_weight
+        self.map_weight = map_weight
+
+        # Fuerza base de cada brawler por mapa: peso del tier + bonus si es pick recomendado del mapa
+        tier_strength = [TIER_WEIGHTS.get(tier, 0.0) for tier in registry.tier_of]
+        self.strength_by_map = {}
+        for map_name, masks in registry.map_masks.items():
+            recommended = masks["first_pick"] | masks["other_picks"] | masks["last_pick"]
+            self.strength_by_map[map_name] = [
+                tier_strength[brawler_id] + (map_weight if (recommended >> brawler_id) & 1 else 0.0)
+                for brawler_id in range(registry.size)
+            ]
+
+    def search(self, phase, selected_map, banned_brawlers, picks, time_budget=DEFAULT_TIME_BUDGET, beam=DEFAULT_BEAM, top=5):
+        """
+        Busca las mejores jugadas para el equipo que elige en `phase` (2 o 3).
+
+        Parámetros:
+        - phase (int): Fase del draft (2 o 3).
+        - selected_map (str): Nombre del mapa seleccionado.
+        - banned_brawlers (list): Brawlers baneados.
+        - picks (list): Picks realizados hasta el momento, en orden de slot.
+        - time_budget (float): Segundos disponibles para la búsqueda.
+        - beam (int): Candidatos considerados en cada nodo.
+        - top (int): Número de jugadas a devolver.
+
+        Retorna:
+        - dict: Profundidad alcanzada, nodos visitados, tiempo y las mejores jugadas con su valor y la
+          respuesta esperada del rival.
+        """
+        if phase not in REMAINING_TURNS:
+            raise ValueError(f"Lookahead is only available for phases 2 and 3, not {phase}.")
+        if selected_map not in self.strength_by_map:
+            raise ValueError(f"The selected map '{selected_map}' is not found in the 'maps' dictionary.")
+
+        registry = self.registry
+        ids = registry.ids
+        for name in list(banned_brawlers) + list(picks):
+            if name not in ids:
+                raise ValueError(f"Unknown brawler: {name}")
+
+        teams = [
+            registry.mask(picks[slot] for slot in FIRST_TEAM_SLOTS if slot < len(picks)),
+            registry.mask(picks[slot] for slot in SECOND_TEAM_SLOTS if slot < len(picks)),
+        ]
+        available = registry.available_mask(registry.mask(banned_brawlers), registry.mask(picks))
+
+        start = time.perf_counter()
+        run = _SearchRun(self, self.strength_by_map[selected_map], REMAINING_TURNS[phase], beam, start + time_budget)
+        best = []
+        depth_reached = 0
+
+        for depth in range(1, len(run.turns) + 1):
+            try:
+                best = run.search_root(teams, available, depth, top, check_time=depth > 1)
+                depth_reached = depth
+            except _SearchTimeout:
+                break
+
+        return {
+            "phase": phase,
+            "depth_reached": depth_reached,
+            "max_depth": len(run.turns),
+            "nodes": run.nodes,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "best": best,
+        }
+
+
+class _SearchRun:
+    """Estado de una búsqueda concreta (tabla de transposiciones, nodos, límite de tiempo)."""
+
+    def __init__(self, engine, strength, turns, beam, deadline):
+        self.registry = engine.registry
+        self.counter_weight = engine.counter_weight
+        self.strength = strength
+        self.turns = turns
+        self.root_team = turns[0][0]
+        self.beam = beam
+        self.deadline = deadline
+        self.table = {}
+        self.nodes = 0
+
+    def _evaluate(self, teams):
+        """Valor del estado desde el punto de vista del equipo que elige en la raíz."""
+        strength = self.strength
+        counters_of = self.registry.counters_of
+        values = []
+
+        for own, enemy in ((teams[0], teams[1]), (teams[1], teams[0])):
+            value = 0.0
+            mask = own
+            while mask:
+                low_bit = mask & -mask
+                brawler_id = low_bit.bit_length() - 1
+                value += strength[brawler_id] + self.counter_weight * (counters_of[brawler_id] & enemy).bit_count()
+                mask ^= low_bit
+            values.append(value)
+
+        value = values[0] - values[1]
+        return value if self.root_team == FIRST_TEAM else -value
+
+    def _candidates(self, teams, team, available):
+        """Devuelve los `beam` mejores candidatos para `team`, ordenados por una heurística rápida."""
+        strength = self.strength
+        counters_of = self.registry.counters_of
+        countered_by = self.registry.countered_by
+        enemy = teams[1 - team]
+
+        scored = []
+        mask = available
+        while mask:
+            low_bit = mask & -mask
+            brawler_id = low_bit.bit_length() - 1
+            heuristic = strength[brawler_id] + self.counter_weight * (
+                (counters_of[brawler_id] & enemy).bit_count() - (countered_by[brawler_id] & enemy).bit_count()
+            )
+            scored.append((heuristic, brawler_id))
+            mask ^= low_bit
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [brawler_id for _, brawler_id in scored[:self.beam]]
+
+    def _moves(self, teams, turn, available):
+        """Genera las jugadas (bitsets de 1 o 2 brawlers) del turno indicado, las más prometedoras primero."""
+        team, count = self.turns[turn]
+        candidates = self._candidates(teams, team, available)
+        if count == 1:
+            return [1 << brawler_id for brawler_id in candidates]
+        return [(1 << first) | (1 << second) for first, second in combinations(candidates, 2)]
+
+    def _alphabeta(self, teams, available, turn, depth, alpha, beta, check_time):
+        """Minimax con poda alfa-beta y tabla de transposiciones."""
+        self.nodes += 1
+        if check_time and not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise _SearchTimeout()
+
+        if depth == 0 or turn == len(self.turns):
+            return self._evaluate(teams)
+
+        key = (teams[0], teams[1], turn)
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_value, entry_flag, tt_move = entry
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_value
+                if entry_flag == LOWER:
+                    alpha = max(alpha, entry_value)
+                elif entry_flag == UPPER:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value
+
+        team = self.turns[turn][0]
+        maximizing = team == self.root_team
+        moves = self._moves(teams, turn, available)
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        alpha_orig, beta_orig = alpha, beta
+        best_value = float("-inf") if maximizing else float("inf")
+        best_move = None
+
+        for move in moves:
+            child = list(teams)
+            child[team] |= move
+            value = self._alphabeta(child, available & ~move, turn + 1, depth - 1, alpha, beta, check_time)
+
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move = value, move
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = UPPER
+        elif best_value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best_value, flag, best_move)
+        return best_value
+
+    def search_root(self, teams, available, depth, top, check_time):
+        """Evalúa cada jugada de la raíz con ventana completa para poder ordenar las `top` mejores."""
+        team = self.turns[0][0]
+        results = []
+
+        for move in self._moves(teams, 0, available):
+            child = list(teams)
+            child[team] |= move
+            value = self._alphabeta(child, available & ~move, 1, depth - 1, float("-inf"), float("inf"), check_time)
+
+            # Respuesta esperada del rival: la mejor jugada guardada en la tabla para el estado hijo
+            reply_entry = self.table.get((child[0], child[1], 1))
+            reply = reply_entry[3] if reply_entry is not None and reply_entry[3] is not None else 0
+            results.append((value, move, reply))
+
+        results.sort(key=lambda item: -item[0])
+        return [
+            {
+                "brawlers": self.registry.names_of(move),
+                "value": round(value, 2),
+                "expected_reply": self.registry.names_of(reply),
+            }
+            for value, move, reply in results[:top]
+        ]
+
+
+def format_lookahead(result):
+    """Convierte el resultado de `DraftSearch.search` en una sección de texto para el prompt."""
+    lines = [f"LOCAL LOOKAHEAD ANALYSIS (minimax search {result['depth_reached']} turns ahead, higher value is better for the team picking now):"]
+    for option in result["best"]:
+        reply = ", ".join(option["expected_reply"]) or "-"
+        lines.append(f"- {' + '.join(option['brawlers'])}: value {option['value']}, expected enemy reply: {reply}.")
+    return "\n".join(lines) + "\n"
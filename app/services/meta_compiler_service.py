@@ -0,0 +1,168 @@
+"""
+Módulo encargado de la instantánea binaria ("compilada") de una temporada del meta.
+
+Cargar una temporada desde los ficheros de texto obliga a parsear `meta.txt` dos veces (nombres y
+counters), `categories.txt`, `tier.txt` y `maps.txt`, y a generar después los prefijos del prompt de cada
+(mapa, fase). La compilación hace ese trabajo una sola vez y guarda el resultado ya resuelto en un fichero
+binario (`marshal`):
+- Brawlers con su categoría, su tier y sus counters como índices a la lista de brawlers.
+- Mapas con sus listas de picks recomendados como índices.
+- Plantillas de los prompts y prefijos estáticos ya generados para cada (mapa, fase).
+
+El fichero empieza por una cabecera con un identificador, la versión del formato y la versión de Python
+(el formato de `marshal` puede cambiar entre versiones de Python), y guarda la versión del meta (el hash
+del contenido de los ficheros de texto) y la versión del código (el hash de los módulos que parsean los
+ficheros y generan los prefijos, `CODE_MODULES`) con las que se compiló. Si alguna no coincide con la
+actual, la instantánea está obsoleta y no se usa.
+
+Funciones:
+- code_version(): Devuelve el hash del código que determina el contenido de las instantáneas.
+- write_compiled_meta(path, snapshot): Compila una `MetaSnapshot` y la guarda en `path`.
+- read_compiled_meta(path, version): Lee una instantánea compilada y reconstruye sus datos, o None si no es válida.
+"""
+import os
+import sys
+import time
+import struct
+import hashlib
+import marshal
+from importlib.util import find_spec
+from app.models.classes import Brawler, Map
+from app.utils.prompts import PromptTemplates
+
+# Identificador del fichero y versión del formato (cambiarla invalida todas las instantáneas compiladas)
+COMPILED_MAGIC = b"BGMS"
+COMPILED_FORMAT_VERSION = 2
+
+# Módulos cuyo código determina el contenido de la instantánea: el parseo de los ficheros del meta, las
+# clases de los brawlers y mapas, las plantillas y prefijos del prompt, y la propia compilación
+CODE_MODULES = ("app.utils.config", "app.utils.prompts", "app.models.classes", "app.services.meta_compiler_service")
+
+# Cabecera: identificador, versión del formato y versión de Python (mayor, menor)
+HEADER = struct.Struct("<4sHBB")
+
+
+def _header():
+    """Devuelve la cabecera de las instantáneas compiladas con esta versión del formato y de Python."""
+    return HEADER.pack(COMPILED_MAGIC, COMPILED_FORMAT_VERSION, sys.version_info.major, sys.version_info.minor)
+
+
+_code_version = None
+
+def code_version():
+    """
+    Devuelve el hash del código de `CODE_MODULES` (se calcula una vez por proceso). Un cambio en ese código
+    invalida las instantáneas compiladas con el anterior, aunque los ficheros del meta no hayan cambiado.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for module in CODE_MODULES:
+            with open(find_spec(module).origin, "rb") as file:
+                digest.update(file.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def write_compiled_meta(path, snapshot):
+    """
+    Compila una instantánea del meta y la guarda en `path` (de forma atómica: se escribe en un fichero
+    temporal y se renombra).
+
+    Parámetros:
+    - path (str): Fichero de destino.
+    - snapshot (MetaSnapshot): Instantánea cargada desde los ficheros de texto.
+
+    Retorna:
+    - int: Tamaño en bytes del fichero escrito.
+    """
+    brawler_ids = {name: brawler_id for brawler_id, name in enumerate(snapshot.brawlers)}
+
+    def ids_of(brawler_list):
+        return tuple(brawler_ids[brawler.name] for brawler in brawler_list)
+
+    templates = snapshot.prompt_templates
+    payload = {
+        "season": snapshot.season,
+        "version": snapshot.version,
+        "code_version": code_version(),
+        "compiled_at": time.time(),
+        "brawlers": [
+            (brawler.name, brawler.category, brawler.tier, ids_of(brawler.counters))
+            for brawler in snapshot.brawlers.values()
+        ],
+        "maps": [
+            (map_obj.name, map_obj.mode, map_obj.has_indestructible_walls, ids_of(map_obj.first_pick),
+             ids_of(map_obj.last_pick), ids_of(map_obj.other_picks), map_obj.mid, map_obj.lane, map_obj.strategy)
+            for map_obj in snapshot.maps.values()
+        ],
+        "templates": (templates.prompt_1, dict(templates.phase_prompts), templates.prompt_3),
+        "prompt_prefixes": dict(snapshot.prompt_prefixes),
+    }
+    data = _header() + marshal.dumps(payload)
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+    return len(data)
+
+
+def read_compiled_meta(path, version):
+    """
+    Lee una instantánea compilada y reconstruye los brawlers, los mapas, las plantillas y los prefijos.
+
+    Parámetros:
+    - path (str): Fichero de la instantánea compilada.
+    - version (str): Versión actual de los ficheros de texto (`compute_meta_version`).
+
+    Retorna:
+    - dict | None: `brawlers`, `maps`, `prompt_templates` y `prompt_prefixes`, o None si el fichero no
+      existe, es de otro formato o de otra versión de Python, está dañado o está obsoleto (otra versión
+      de los ficheros del meta o del código).
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    if data[:HEADER.size] != _header():
+        return None
+    try:
+        payload = marshal.loads(memoryview(data)[HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != version or payload.get("code_version") != code_version():
+        return None
+
+    # Los counters y los picks de los mapas ya están resueltos: solo hay que enlazar los objetos
+    brawlers = {}
+    for name, category, tier, _ in payload["brawlers"]:
+        brawler = brawlers[name] = Brawler(name, category)
+        brawler.tier = tier
+
+    brawler_list = list(brawlers.values())
+    for brawler, (_, _, _, counter_ids) in zip(brawler_list, payload["brawlers"]):
+        brawler.set_counters(brawler_list[counter_id] for counter_id in counter_ids)
+
+    maps = {}
+    for name, mode, walls, first_pick, last_pick, other_picks, mid, lane, strategy in payload["maps"]:
+        maps[name] = Map(
+            name, mode, walls,
+            [brawler_list[brawler_id] for brawler_id in first_pick],
+            [brawler_list[brawler_id] for brawler_id in last_pick],
+            [brawler_list[brawler_id] for brawler_id in other_picks],
+            mid, lane, strategy
+        )
+
+    prompt_1, phase_prompts, prompt_3 = payload["templates"]
+    return {
+        "brawlers": brawlers,
+        "maps": maps,
+        "prompt_templates": PromptTemplates(prompt_1, phase_prompts, prompt_3),
+        "prompt_prefixes": payload["prompt_prefixes"],
+    }
@@ -0,0 +1,416 @@
+"""
+Módulo encargado de los datos del meta (brawlers, mapas y estructuras derivadas) y de su recarga en caliente.
+
+Todo lo que se construye a partir de los ficheros de la temporada activa y de los prompts (`brawlers`,
+`maps`, `BrawlerRegistry`, `ScoringEngine`, `DraftSearch` y las plantillas) se agrupa en una instantánea
+inmutable, `MetaSnapshot`. La API guarda la instantánea activa en `app.state.meta` y la sustituye de una
+sola asignación cuando cambian los ficheros, así que nunca se ve un estado a medio cargar.
+
+Cada petición fija al entrar la instantánea activa (`MetaSnapshotMiddleware`) y la usa hasta el final,
+aunque mientras tanto se cargue una nueva. La versión usada se devuelve en la cabecera `X-Meta-Version`.
+
+Si existe una instantánea compilada de la temporada (`scripts/compile_meta.py`, en `META_SNAPSHOT_DIR`) y
+corresponde a la versión actual de los ficheros, se carga directamente sin parsear los ficheros de texto;
+si no existe o está obsoleta, se cargan los ficheros de texto como siempre.
+
+Además de la temporada activa (`META_SEASON`), cualquier otra carpeta `data/meta/<temporada>` se puede
+pedir por petición. Esas temporadas se cargan la primera vez que se usan y solo se mantienen en memoria
+las `META_MAX_SEASONS` usadas más recientemente, así que no cuestan nada al arrancar.
+
+Clases:
+- MetaSnapshot: Instantánea inmutable de los datos del meta con su versión.
+- MetaReloader: Vigila las carpetas del meta y de los prompts y recarga la instantánea cuando cambian.
+- MetaSnapshotMiddleware: Middleware ASGI que fija la instantánea de cada petición y añade la cabecera de versión.
+- SeasonRegistry: Descubre las temporadas de `data/meta` y carga bajo demanda las que no son la activa (LRU).
+
+Funciones:
+- load_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir): Carga los datos (de la instantánea compilada o de los ficheros de texto) y construye una instantánea nueva.
+- compile_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir): Carga la temporada de los ficheros de texto y guarda su instantánea compilada.
+- compiled_snapshot_path(season, snapshot_dir): Devuelve el fichero de la instantánea compilada de una temporada.
+- discover_seasons(meta_root): Devuelve las carpetas de temporada con los ficheros necesarios.
+- folder_signature(folders): Devuelve una firma (nombre, fecha de modificación y tamaño) de los ficheros.
+"""
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import NamedTuple, Any
+from app.utils.config import load_data, load_maps, get_static_prompt_prefixes
+from app.utils.prompts import load_prompt_templates
+from app.models.registry import BrawlerRegistry
+from app.services.scoring_service import ScoringEngine
+from app.services.lookahead_service import DraftSearch
+from app.services.persistent_cache_service import compute_meta_version
+from app.services.meta_compiler_service import read_compiled_meta, write_compiled_meta
+
+# Segundos entre cada comprobación de los ficheros (0 desactiva la recarga en caliente)
+DEFAULT_RELOAD_INTERVAL = float(os.getenv("META_RELOAD_INTERVAL", "2"))
+
+# Temporada activa y número de temporadas adicionales que se mantienen cargadas a la vez
+DEFAULT_SEASON = os.getenv("META_SEASON", "mar2025")
+DEFAULT_MAX_SEASONS = int(os.getenv("META_MAX_SEASONS", "2"))
+
+# Carpeta de las instantáneas compiladas (vacío para no usarlas y cargar siempre los ficheros de texto)
+DEFAULT_SNAPSHOT_DIR = os.getenv("META_SNAPSHOT_DIR", "data/compiled") or None
+
+# Ficheros de cada temporada; `categories.txt` se puede heredar de la temporada activa
+REQUIRED_SEASON_FILES = ("meta.txt", "tier.txt", "maps.txt")
+INHERITABLE_SEASON_FILES = ("categories.txt",)
+
+# Cabecera de la respuesta con la versión del meta usada
+META_VERSION_HEADER = b"x-meta-version"
+
+
+class MetaSnapshot(NamedTuple):
+    """Instantánea de los datos del meta. Ni la tupla ni los diccionarios se modifican una vez creada."""
+    season: str
+    version: str
+    brawlers: Any
+    maps: Any
+    registry: BrawlerRegistry
+    scoring_engine: ScoringEngine
+    draft_search: DraftSearch
+    prompt_templates: Any
+    prompt_prefixes: Any
+    source: str
+    loaded_at: float
+
+
+def compiled_snapshot_path(season, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """Devuelve el fichero de la instantánea compilada de la temporada."""
+    return os.path.join(snapshot_dir, f"{season}.snapshot")
+
+
+def load_meta_snapshot(meta_folder, prompts_folder="data/prompts", fallback_folder=None, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    Carga los datos del meta y de los prompts y construye una instantánea nueva.
+
+    Si hay una instantánea compilada de la temporada para la versión actual de los ficheros, se usa
+    directamente; si no, se cargan los ficheros de texto.
+
+    Parámetros:
+    - meta_folder (str): Carpeta de la temporada.
+    - prompts_folder (str): Carpeta con los prompts.
+    - fallback_folder (str): Carpeta de la que se heredan los ficheros opcionales que falten
+      (`categories.txt`), normalmente la temporada activa.
+    - snapshot_dir (str): Carpeta de las instantáneas compiladas, o None para cargar siempre los ficheros de texto.
+
+    Lanza:
+    - FileNotFoundError: Si falta algún fichero.
+    - ValueError: Si los datos cargados están vacíos.
+    """
+    categories_file = f"{meta_folder}/categories.txt"
+    inherited = ()
+    if not os.path.exists(categories_file) and fallback_folder is not None:
+        categories_file = f"{fallback_folder}/categories.txt"
+        inherited = (categories_file,)
+
+    season = os.path.basename(os.path.normpath(meta_folder))
+    # La versión se calcula siempre sobre los ficheros de texto: es lo que detecta una instantánea obsoleta
+    version = compute_meta_version(meta_folder, prompts_folder, inherited)
+
+    compiled = read_compiled_meta(compiled_snapshot_path(season, snapshot_dir), version) if snapshot_dir else None
+    if compiled is not None:
+        brawlers = compiled["brawlers"]
+        maps = compiled["maps"]
+        prompt_templates = compiled["prompt_templates"]
+        prompt_prefixes = compiled["prompt_prefixes"]
+        source = "compiled"
+    else:
+        brawlers = load_data(f"{meta_folder}/meta.txt", categories_file, f"{meta_folder}/tier.txt")
+        maps = load_maps(f"{meta_folder}/maps.txt", brawlers)
+        if not brawlers or not maps:
+            raise ValueError(f"No brawlers or maps could be loaded from '{meta_folder}'")
+        prompt_templates = load_prompt_templates(prompts_folder)
+        prompt_prefixes = get_static_prompt_prefixes(maps, brawlers, prompt_templates)
+        source = "text"
+
+    registry = BrawlerRegistry(brawlers, maps)
+    return MetaSnapshot(
+        season=season,
+        version=version,
+        brawlers=MappingProxyType(brawlers),
+        maps=MappingProxyType(maps),
+        registry=registry,
+        scoring_engine=ScoringEngine(registry),
+        draft_search=DraftSearch(registry),
+        prompt_templates=prompt_templates,
+        prompt_prefixes=MappingProxyType(prompt_prefixes),
+        source=source,
+        loaded_at=time.time()
+    )
+
+
+def compile_meta_snapshot(meta_folder, prompts_folder="data/prompts", fallback_folder=None, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    Carga la temporada desde los ficheros de texto y guarda su instantánea compilada.
+
+    Retorna:
+    - tuple: (MetaSnapshot cargada, fichero escrito, tamaño en bytes).
+    """
+    snapshot = load_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir=None)
+    path = compiled_snapshot_path(snapshot.season, snapshot_dir)
+    size = write_compiled_meta(path, snapshot)
+    return snapshot, path, size
+
+
+def discover_seasons(meta_root):
+    """
+    Devuelve las temporadas de `meta_root`: las subcarpetas con todos los ficheros obligatorios.
+
+    Retorna:
+    - dict: Nombre de la temporada -> carpeta.
+    """
+    seasons = {}
+    for name in sorted(os.listdir(meta_root)):
+        folder = os.path.join(meta_root, name)
+        if os.path.isdir(folder) and all(os.path.isfile(os.path.join(folder, file_name)) for file_name in REQUIRED_SEASON_FILES):
+            seasons[name] = folder
+    return seasons
+
+
+def folder_signature(folders):
+    """Devuelve una tupla con el nombre, la fecha de modificación y el tamaño de cada fichero de las carpetas."""
+    signature = []
+    for folder in folders:
+        for file_name in sorted(os.listdir(folder)):
+            file_path = os.path.join(folder, file_name)
+            if os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                signature.append((file_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class MetaReloader:
+    """
+    Vigila las carpetas del meta y de los prompts y, cuando cambian, construye en segundo plano una
+    instantánea nueva y la activa en `state.meta`.
+
+    Para no cargar ficheros a medio escribir, solo se recarga cuando la firma de las carpetas ha cambiado
+    y se mantiene igual durante dos comprobaciones seguidas. Si la carga falla, se mantiene la instantánea
+    anterior. Cada recarga (`meta_reloaded`) o fallo (`meta_reload_failed`) se anota en el registro estructurado.
+    """
+
+    def __init__(self, state, meta_folder, prompts_folder="data/prompts", interval=DEFAULT_RELOAD_INTERVAL):
+        """
+        Parámetros:
+        - state: `app.state`, donde está la instantánea activa (`meta`) y las cachés a invalidar.
+        - meta_folder (str): Carpeta de la temporada activa.
+        - prompts_folder (str): Carpeta con los prompts.
+        - interval (float): Segundos entre comprobaciones.
+        """
+        self.state = state
+        self.meta_folder = meta_folder
+        self.prompts_folder = prompts_folder
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._signature = folder_signature((meta_folder, prompts_folder))
+        self._lock = asyncio.Lock()
+
+    def log(self, event, **fields):
+        """
+        Encola el evento en el registro estructurado (`state.draft_logger`), si está activado; sin registro,
+        el resultado de la última recarga sigue disponible en `stats()`.
+        """
+        draft_logger = getattr(self.state, "draft_logger", None)
+        if draft_logger is not None:
+            draft_logger.log(event, **fields)
+
+    async def swap(self, snapshot):
+        """
+        Activa la instantánea e invalida las cachés que dependen de la versión anterior. La asignación y las
+        cachés en memoria se cambian en el event loop (las rutas las usan sin locks); solo la caché persistente,
+        que escribe en disco lo pendiente, se actualiza en un hilo.
+        """
+        self.state.meta = snapshot
+        self.state.draft_cache.clear()
+        # Las demás temporadas comparten los prompts: se vuelven a cargar al usarlas
+        self.state.seasons.clear()
+        self.reloads += 1
+        if self.state.persistent_cache is not None:
+            await asyncio.to_thread(self.state.persistent_cache.set_meta_version, snapshot.version)
+
+    async def reload(self):
+        """
+        Construye una instantánea nueva fuera del event loop y la activa si su versión es distinta.
+
+        Retorna:
+        - bool: True si se ha activado una instantánea nueva.
+        """
+        async with self._lock:
+            try:
+                snapshot = await asyncio.to_thread(load_meta_snapshot, self.meta_folder, self.prompts_folder)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.log("meta_reload_failed", error=self.last_error, version=self.state.meta.version)
+                return False
+
+            self.last_error = None
+            if snapshot.version == self.state.meta.version:
+                return False
+
+            await self.swap(snapshot)
+            self.log("meta_reloaded", version=snapshot.version, source=snapshot.source)
+            return True
+
+    async def run(self):
+        """Bucle de vigilancia; se ejecuta como tarea de fondo mientras la API está en marcha."""
+        pending = None
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                signature = await asyncio.to_thread(folder_signature, (self.meta_folder, self.prompts_folder))
+            except OSError:
+                continue
+
+            if signature == self._signature:
+                pending = None
+            elif signature != pending:
+                # Ha cambiado: esperar a la siguiente comprobación por si se sigue escribiendo
+                pending = signature
+            else:
+                self._signature = signature
+                pending = None
+                await self.reload()
+
+    def stats(self):
+        """Devuelve un diccionario con el estado de la recarga en caliente."""
+        meta = self.state.meta
+        return {
+            "version": meta.version,
+            "source": meta.source,
+            "loaded_at": meta.loaded_at,
+            "brawlers": len(meta.brawlers),
+            "maps": len(meta.maps),
+            "reload_interval": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class MetaSnapshotMiddleware:
+    """
+    Middleware ASGI que fija la instantánea activa al empezar cada petición (`request.state.meta`) y
+    añade su versión en la cabecera `X-Meta-Version` de la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_state = scope.setdefault("state", {})
+        request_state["meta"] = scope["app"].state.meta
+
+        async def send_with_version(message):
+            if message["type"] == "http.response.start":
+                # La ruta puede haber cambiado la instantánea (otra temporada), así que se lee al responder
+                version = request_state["meta"].version.encode("latin-1")
+                message["headers"] = list(message.get("headers", [])) + [(META_VERSION_HEADER, version)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_version)
+
+
+class SeasonRegistry:
+    """
+    Registro de temporadas. La activa es siempre `state.meta` (la que se recarga en caliente); el resto
+    se cargan bajo demanda, en un hilo, y se guardan en una caché LRU de `max_resident` temporadas.
+    """
+
+    def __init__(self, state, meta_root, default_season=DEFAULT_SEASON, prompts_folder="data/prompts", max_resident=DEFAULT_MAX_SEASONS):
+        """
+        Parámetros:
+        - state: `app.state`, con la instantánea de la temporada activa en `meta`.
+        - meta_root (str): Carpeta con una subcarpeta por temporada (`data/meta`).
+        - default_season (str): Temporada activa, usada cuando la petición no indica ninguna.
+        - prompts_folder (str): Carpeta con los prompts.
+        - max_resident (int): Temporadas no activas que se mantienen cargadas a la vez.
+        """
+        self.state = state
+        self.meta_root = meta_root
+        self.default_season = default_season
+        self.prompts_folder = prompts_folder
+        self.max_resident = max_resident
+        self.loads = 0
+        self.evictions = 0
+        self._seasons = discover_seasons(meta_root)
+        self._resident = OrderedDict()  # temporada -> MetaSnapshot
+        self._locks = {}                # temporada -> asyncio.Lock (una sola carga por temporada)
+        self._generation = 0            # Cambia con cada `clear`: las cargas empezadas antes no se guardan
+
+    def seasons(self):
+        """Devuelve los nombres de las temporadas disponibles."""
+        return list(self._seasons)
+
+    async def get(self, season=None):
+        """
+        Devuelve la instantánea de la temporada, cargándola si no está en memoria.
+
+        Lanza:
+        - ValueError: Si la temporada no existe.
+        """
+        if season is None or season == self.default_season:
+            return self.state.meta
+
+        snapshot = self._resident.get(season)
+        if snapshot is not None:
+            self._resident.move_to_end(season)
+            return snapshot
+
+        if season not in self._seasons:
+            # Puede haberse añadido una carpeta nueva desde el arranque
+            self._seasons = await asyncio.to_thread(discover_seasons, self.meta_root)
+            if season not in self._seasons:
+                raise ValueError(f"Unknown season '{season}'. Available seasons: {', '.join(self._seasons)}")
+
+        lock = self._locks.setdefault(season, asyncio.Lock())
+        async with lock:
+            # Otra petición puede haberla cargado mientras esperábamos
+            snapshot = self._resident.get(season)
+            if snapshot is not None:
+                return snapshot
+
+            generation = self._generation
+            snapshot = await asyncio.to_thread(
+                load_meta_snapshot,
+                self._seasons[season],
+                self.prompts_folder,
+                self._seasons.get(self.default_season)
+            )
+            self.loads += 1
+            if generation != self._generation:
+                # Se recargó el meta durante la carga: la instantánea usa los prompts anteriores y no se guarda
+                return snapshot
+            self._resident[season] = snapshot
+            while len(self._resident) > self.max_resident:
+                self._resident.popitem(last=False)
+                self.evictions += 1
+            return snapshot
+
+    def clear(self):
+        """
+        Descarga las temporadas no activas (se volverán a cargar al usarlas) y descarta las cargas en curso.
+        Se llama desde el event loop, igual que `get` y `stats`.
+        """
+        self._resident.clear()
+        self._generation += 1
+
+    def stats(self):
+        """Devuelve un diccionario con las temporadas disponibles y las cargadas."""
+        return {
+            "default_season": self.default_season,
+            "available": list(self._seasons),
+            "resident": {season: snapshot.version for season, snapshot in self._resident.items()},
+            "max_resident": self.max_resident,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,249 @@
+"""
+Módulo encargado de las métricas de la API en formato Prometheus (`GET /metrics`).
+
+Todo se calcula dentro del proceso, sin dependencias ni servicios externos: contadores, gauges e
+histogramas con etiquetas, guardados en memoria y convertidos al formato de texto de Prometheus al
+consultarlos. Las métricas se pueden actualizar desde el event loop o desde los hilos del threadpool.
+
+Métricas del pipeline del draft:
+- `brawlgpt_draft_stage_seconds{stage}`: Latencia de cada etapa (`prompt_build`, `threadpool_wait`,
+  `llm_queue_wait`, `llm_call`, `llm_stream`, `llm_first_suggestion`, `parse`, `lookahead`, `persistent_cache_get`, `persistent_cache_set`).
+- `brawlgpt_draft_request_seconds{endpoint, cached}`: Latencia total de cada petición.
+- `brawlgpt_draft_requests_total{endpoint, map, phase}`: Peticiones por mapa y fase.
+- `brawlgpt_cache_lookups_total{result}`: Consultas a la caché (`memory_hit`, `persistent_hit`, `miss`).
+- `brawlgpt_llm_calls_total{outcome}`, `brawlgpt_llm_in_flight` y `brawlgpt_llm_empty_parses_total`: Llamadas
+  a la IA, llamadas en curso y respuestas sin ninguna sugerencia válida.
+- `brawlgpt_llm_hedges_sent_total`, `brawlgpt_llm_hedges_won_total` y `brawlgpt_llm_hedges_skipped_total`: Llamadas
+  extra lanzadas porque la primera tardaba demasiado, las que respondieron antes que la primera y las que no se
+  lanzaron por falta de presupuesto (`hedging_service`).
+- `brawlgpt_llm_scheduler_concurrency_limit`, `brawlgpt_llm_scheduler_queued{lane}`,
+  `brawlgpt_llm_scheduler_rejected_total` y `brawlgpt_llm_rate_limited_total`: Límite de concurrencia adaptativo,
+  llamadas en cola por carril de prioridad, llamadas rechazadas con 429 por no poder salir a tiempo y 429
+  recibidos del proveedor (`scheduler_service`). La espera en la cola es la etapa `llm_queue_wait`.
+- `brawlgpt_fallbacks_total`: Respuestas con la recomendación local.
+- `brawlgpt_threadpool_*`: Ocupación del threadpool (hilos en uso, límite y tareas esperando).
+
+Clases:
+- Counter: Contador con etiquetas.
+- Gauge: Valor que sube y baja, con etiquetas.
+- Histogram: Histograma acumulado por buckets, con etiquetas.
+- MetricsRegistry: Conjunto de métricas que se exportan juntas.
+
+Funciones:
+- run_in_threadpool_timed(stage, func, *args): Ejecuta `func` en el threadpool midiendo la espera en cola y la ejecución.
+- update_threadpool_metrics(): Actualiza las métricas del threadpool (se llama al exportar).
+- render_metrics(): Devuelve todas las métricas en el formato de texto de Prometheus.
+"""
+import time
+import threading
+import anyio.to_thread
+
+# Tipo de contenido del formato de texto de Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets de latencia (segundos): desde las etapas locales (décimas de milisegundo) hasta la IA (decenas de segundos)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+
+def _escape(value):
+    """Escapa el valor de una etiqueta para el formato de texto de Prometheus."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    """Devuelve el bloque de etiquetas `{a="1",b="2"}` (vacío si no hay ninguna)."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    """Formatea un número como lo espera Prometheus."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador con etiquetas: solo puede aumentar."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Las métricas sin etiquetas se exportan desde el principio (con valor 0)
+        self._values = {} if self.labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Suma `amount` a la serie con los valores de etiqueta `labels`."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Devuelve el valor actual de la serie."""
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name + _labels(self.labelnames, labels), value) for labels, value in values]
+
+
+class Gauge(Counter):
+    """Valor que puede subir y bajar (llamadas en curso, hilos ocupados, etc.)."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        """Resta `amount` a la serie."""
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        """Fija el valor de la serie."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """Histograma con buckets acumulados, suma y número de observaciones por serie."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # etiquetas -> [cuenta por bucket..., suma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Registra una observación (en segundos) en la serie con los valores de etiqueta `labels`."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labels):
+        """Devuelve el número de observaciones de la serie."""
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            all_series = [(labels, list(series)) for labels, series in self._series.items()]
+
+        samples = []
+        for labels, series in all_series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                samples.append((self.name + "_bucket" + _labels(self.labelnames, labels, f'le="{_number(bound)}"'), cumulative))
+            samples.append((self.name + "_bucket" + _labels(self.labelnames, labels, 'le="+Inf"'), series[-1]))
+            samples.append((self.name + "_sum" + _labels(self.labelnames, labels), series[-2]))
+            samples.append((self.name + "_count" + _labels(self.labelnames, labels), series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Conjunto de métricas que se exportan juntas en `GET /metrics`."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        """Añade la métrica al registro y la devuelve."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Devuelve todas las métricas en el formato de texto de Prometheus."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{sample} {_number(value)}" for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Registro de la API y métricas del pipeline del draft
+REGISTRY = MetricsRegistry()
+
+DRAFT_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "brawlgpt_draft_stage_seconds", "Latency of each stage of the draft pipeline.", ("stage",)))
+DRAFT_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "brawlgpt_draft_request_seconds", "Total latency of draft requests.", ("endpoint", "cached")))
+DRAFT_REQUESTS = REGISTRY.register(Counter(
+    "brawlgpt_draft_requests_total", "Draft requests by endpoint, map and phase.", ("endpoint", "map", "phase")))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "brawlgpt_cache_lookups_total", "Recommendation cache lookups by result.", ("result",)))
+LLM_CALLS = REGISTRY.register(Counter(
+    "brawlgpt_llm_calls_total", "LLM calls by outcome.", ("outcome",)))
+LLM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "brawlgpt_llm_in_flight", "LLM calls currently in flight."))
+LLM_EMPTY_PARSES = REGISTRY.register(Counter(
+    "brawlgpt_llm_empty_parses_total", "LLM responses without any valid suggestion line."))
+LLM_HEDGES_SENT = REGISTRY.register(Counter(
+    "brawlgpt_llm_hedges_sent_total", "Hedge LLM calls sent because the first call exceeded the latency percentile."))
+LLM_HEDGES_WON = REGISTRY.register(Counter(
+    "brawlgpt_llm_hedges_won_total", "Hedge LLM calls that finished before the original call."))
+LLM_HEDGES_SKIPPED = REGISTRY.register(Counter(
+    "brawlgpt_llm_hedges_skipped_total", "Hedge LLM calls not sent because the hedge budget was exhausted."))
+LLM_SCHEDULER_LIMIT = REGISTRY.register(Gauge(
+    "brawlgpt_llm_scheduler_concurrency_limit", "Current adaptive limit of concurrent LLM calls."))
+LLM_SCHEDULER_QUEUED = REGISTRY.register(Gauge(
+    "brawlgpt_llm_scheduler_queued", "LLM calls waiting in the scheduler queue by priority lane.", ("lane",)))
+LLM_SCHEDULER_REJECTED = REGISTRY.register(Counter(
+    "brawlgpt_llm_scheduler_rejected_total", "LLM calls rejected because they could not start before the queue deadline."))
+LLM_RATE_LIMITED = REGISTRY.register(Counter(
+    "brawlgpt_llm_rate_limited_total", "LLM calls rejected by the provider with a 429 (quota exhausted)."))
+FALLBACKS = REGISTRY.register(Counter(
+    "brawlgpt_fallbacks_total", "Responses answered with the local recommendation."))
+THREADPOOL_BORROWED = REGISTRY.register(Gauge(
+    "brawlgpt_threadpool_threads_busy", "Threadpool threads currently running a task."))
+THREADPOOL_TOTAL = REGISTRY.register(Gauge(
+    "brawlgpt_threadpool_threads_limit", "Maximum number of threadpool threads."))
+THREADPOOL_WAITING = REGISTRY.register(Gauge(
+    "brawlgpt_threadpool_tasks_waiting", "Tasks waiting for a free threadpool thread."))
+
+
+async def run_in_threadpool_timed(stage, func, *args):
+    """
+    Ejecuta `func(*args)` en el threadpool, como `run_in_threadpool`, y registra cuánto ha esperado en cola
+    (`threadpool_wait`) y cuánto ha tardado en ejecutarse (`stage`).
+    """
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        DRAFT_STAGE_SECONDS.observe(started - submitted, "threadpool_wait")
+        try:
+            return func(*args)
+        finally:
+            DRAFT_STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+
+    return await anyio.to_thread.run_sync(timed)
+
+
+def update_threadpool_metrics():
+    """Actualiza las métricas del threadpool de AnyIO (el que usa `run_in_threadpool`). Se llama desde el event loop."""
+    statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+    THREADPOOL_BORROWED.set(statistics.borrowed_tokens)
+    THREADPOOL_TOTAL.set(statistics.total_tokens)
+    THREADPOOL_WAITING.set(statistics.tasks_waiting)
+
+
+def render_metrics():
+    """Devuelve todas las métricas de la API en el formato de texto de Prometheus."""
+    update_threadpool_metrics()
+    return REGISTRY.render()
@@ -0,0 +1,219 @@
+"""
+Módulo encargado de la caché persistente (SQLite) de las recomendaciones de Gemini.
+
+Complementa a la caché en memoria de `cache_service`: las recomendaciones ya pagadas a Gemini se
+guardan en un fichero SQLite local y sobreviven a los reinicios de la API.
+
+Cada entrada se guarda junto a una "versión del meta", calculada a partir del contenido de
+`data/meta/<temporada>` y de `data/prompts`. Si cambia el meta o algún prompt, la versión cambia y
+las entradas antiguas dejan de usarse automáticamente (y se eliminan al compactar).
+
+Clases:
+- SQLiteRecommendationCache: Caché en disco con modo WAL, escrituras por lotes y expulsión por tamaño.
+
+Funciones:
+- compute_meta_version(meta_folder, prompts_folder, extra_files): Calcula el hash de versión del meta y los prompts.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Valores por defecto, configurables con variables de entorno
+DEFAULT_CACHE_DB = os.getenv("DRAFT_CACHE_DB", "")
+DEFAULT_MAX_ENTRIES = int(os.getenv("DRAFT_CACHE_DB_MAX_ENTRIES", "50000"))
+DEFAULT_BATCH_SIZE = int(os.getenv("DRAFT_CACHE_DB_BATCH_SIZE", "32"))
+
+
+def compute_meta_version(meta_folder, prompts_folder="data/prompts", extra_files=()):
+    """
+    Calcula una versión (hash SHA-256 corto) a partir del contenido de los ficheros del meta y de los prompts.
+
+    Parámetros:
+    - meta_folder (str): Carpeta de la temporada, por ejemplo `data/meta/mar2025`.
+    - prompts_folder (str): Carpeta con los prompts.
+    - extra_files (iterable): Ficheros de fuera de esas carpetas que también se usan (p. ej. las
+      categorías heredadas de otra temporada).
+
+    Retorna:
+    - str: Hash hexadecimal de 16 caracteres.
+    """
+    digest = hashlib.sha256()
+
+    for file_path in extra_files:
+        digest.update(file_path.encode("utf-8"))
+        with open(file_path, "rb") as file:
+            digest.update(file.read())
+
+    for folder in (meta_folder, prompts_folder):
+        for file_name in sorted(os.listdir(folder)):
+            file_path = os.path.join(folder, file_name)
+            if not os.path.isfile(file_path):
+                continue
+            digest.update(file_name.encode("utf-8"))
+            with open(file_path, "rb") as file:
+                digest.update(file.read())
+
+    return digest.hexdigest()[:16]
+
+
+def serialize_key(cache_key):
+    """Convierte la clave canónica del draft (tupla) en un texto estable para SQLite."""
+    return json.dumps(cache_key, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteRecommendationCache:
+    """Caché persistente de recomendaciones sobre un fichero SQLite."""
+
+    def __init__(self, db_path, meta_version, max_entries=DEFAULT_MAX_ENTRIES, batch_size=DEFAULT_BATCH_SIZE):
+        self.db_path = db_path
+        self.meta_version = meta_version
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}  # Escrituras pendientes: clave serializada -> respuesta en JSON
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS recommendations ("
+            " meta_version TEXT NOT NULL,"
+            " draft_key TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (meta_version, draft_key))"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_recommendations_created ON recommendations (created_at)"
+        )
+        self._connection.commit()
+
+    def get(self, cache_key):
+        """Devuelve la respuesta guardada para `cache_key` en la versión actual del meta, o None."""
+        draft_key = serialize_key(cache_key)
+
+        with self._lock:
+            pending = self._pending.get(draft_key)
+            if pending is None:
+                row = self._connection.execute(
+                    "SELECT response FROM recommendations WHERE meta_version = ? AND draft_key = ?",
+                    (self.meta_version, draft_key)
+                ).fetchone()
+                pending = row[0] if row else None
+
+            if pending is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return json.loads(pending)
+
+    def set(self, cache_key, response):
+        """Encola una respuesta para guardarla; se escribe en disco cuando se completa el lote."""
+        with self._lock:
+            self._pending[serialize_key(cache_key)] = json.dumps(response, ensure_ascii=False)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def set_meta_version(self, meta_version):
+        """
+        Cambia la versión del meta (al recargarlo en caliente). Lo pendiente se escribe antes con la
+        versión anterior, y las entradas antiguas dejan de usarse.
+        """
+        with self._lock:
+            self._flush_locked()
+            self.meta_version = meta_version
+
+    def flush(self):
+        """Escribe en disco todas las entradas pendientes."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """Escribe el lote pendiente en una única transacción y aplica la expulsión por tamaño."""
+        if not self._pending:
+            return
+
+        now = time.time()
+        rows = [(self.meta_version, draft_key, response, now) for draft_key, response in self._pending.items()]
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO recommendations (meta_version, draft_key, response, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        self._pending.clear()
+        self._evict_locked()
+
+    def _evict_locked(self):
+        """Elimina las entradas más antiguas si se supera `max_entries`."""
+        total = self._connection.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM recommendations WHERE rowid IN "
+                    "(SELECT rowid FROM recommendations ORDER BY created_at LIMIT ?)",
+                    (excess,)
+                )
+
+    def compact(self):
+        """
+        Compacta la base de datos: escribe lo pendiente, borra las entradas de versiones antiguas
+        del meta, aplica la expulsión por tamaño y ejecuta `VACUUM`.
+
+        Retorna:
+        - dict: Número de entradas borradas y restantes.
+        """
+        with self._lock:
+            self._flush_locked()
+            with self._connection:
+                stale = self._connection.execute(
+                    "DELETE FROM recommendations WHERE meta_version != ?", (self.meta_version,)
+                ).rowcount
+            self._evict_locked()
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._connection.execute("VACUUM")
+            remaining = self._connection.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+
+        return {"stale_removed": stale, "remaining": remaining}
+
+    def clear(self):
+        """Borra todas las entradas (de cualquier versión) y devuelve cuántas había."""
+        with self._lock:
+            self._pending.clear()
+            with self._connection:
+                removed = self._connection.execute("DELETE FROM recommendations").rowcount
+            return removed
+
+    def stats(self):
+        """Devuelve un diccionario con el estado de la caché persistente."""
+        with self._lock:
+            total = self._connection.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+            current = self._connection.execute(
+                "SELECT COUNT(*) FROM recommendations WHERE meta_version = ?", (self.meta_version,)
+            ).fetchone()[0]
+            return {
+                "path": self.db_path,
+                "meta_version": self.meta_version,
+                "entries": total,
+                "current_version_entries": current,
+                "pending_writes": len(self._pending),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self):
+        """Escribe lo pendiente y cierra la conexión."""
+        with self._lock:
+            self._flush_locked()
+            self._connection.close()
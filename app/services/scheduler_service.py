@@ -0,0 +1,375 @@
+"""
+Módulo que implementa el planificador de las llamadas salientes a la IA, consciente de la cuota.
+
+Gemini limita las peticiones por minuto (RPM) y los tokens por minuto (TPM); al pasarse, las llamadas fallan
+con un 429 y los usuarios reciben la recomendación local o un error. El planificador se sitúa entre las rutas
+y `call_gemini` y decide cuándo sale cada llamada:
+- Dos token buckets con el RPM y el TPM configurados (`LLM_RPM`, `LLM_TPM`; 0 = sin límite). Los tokens de
+  cada llamada se estiman a partir de la longitud del prompt más los de la respuesta (`estimate_tokens`).
+- Carriles de prioridad por fase: las llamadas en cola salen por orden de prioridad (primero la fase 4, el
+  último pick, y por último la fase 1) y, dentro de un carril, por orden de llegada.
+- Concurrencia adaptativa AIMD: el límite de llamadas a la vez sube de uno en uno por cada ventana de
+  llamadas correctas y se reduce a la mitad cuando el proveedor responde 429.
+- Plazo máximo de espera (`LLM_QUEUE_TIMEOUT`): si la espera estimada (por la cuota o, con la concurrencia
+  llena, por las llamadas en curso y en cola) lo supera, la llamada se rechaza al momento con
+  `QuotaExceededError` (la API responde 429 con `Retry-After`) en lugar de hacer esperar al usuario.
+
+La espera en la cola se mide en la etapa `llm_queue_wait` y, dentro de una traza, con un span del mismo nombre.
+
+Clases:
+- QuotaExceededError: La llamada no puede salir dentro del plazo; lleva los segundos recomendados de espera.
+- TokenBucket: Token bucket con reposición continua.
+- QuotaScheduler: Planificador con buckets de RPM y TPM, carriles de prioridad y concurrencia AIMD.
+
+Funciones:
+- estimate_tokens(prompt): Estima los tokens (prompt y respuesta) de una llamada.
+- phase_priority(phase): Devuelve el carril de prioridad de una fase del draft.
+- is_rate_limit_error(error): Indica si un error es un 429 (cuota agotada) del proveedor.
+
+Notas:
+- La prioridad es estricta: con la cuota saturada, las fases tempranas esperan hasta agotar su plazo y
+  reciben el 429, mientras las de último pick siguen saliendo.
+- Las llamadas extra del hedging (`hedging_service`) van dentro de la misma llamada planificada y no se
+  descuentan de los buckets; su presupuesto (`LLM_HEDGE_BUDGET`) ya las limita.
+- Con el circuit breaker abierto las rutas no pasan por el planificador; si se abre mientras una llamada
+  espera en la cola, la llamada no sale (`CircuitOpenError`) y su cuota se devuelve a los buckets.
+"""
+import os
+import math
+import time
+import heapq
+import asyncio
+from itertools import count
+from app.services.gemini_service import prompt_size
+from app.services.tracing_service import span
+from app.services.circuit_breaker_service import CircuitOpenError
+from app.services.metrics_service import (
+    DRAFT_STAGE_SECONDS, LLM_SCHEDULER_LIMIT, LLM_SCHEDULER_QUEUED, LLM_SCHEDULER_REJECTED, LLM_RATE_LIMITED
+)
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_RPM = float(os.getenv("LLM_RPM", "0"))
+DEFAULT_TPM = float(os.getenv("LLM_TPM", "0"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "100"))
+DEFAULT_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+DEFAULT_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))
+DEFAULT_OUTPUT_TOKENS = int(os.getenv("LLM_OUTPUT_TOKENS", os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "") or "300"))
+
+# Caracteres por token aproximados del prompt (en inglés)
+CHARS_PER_TOKEN = 4
+
+# Segundos de cuota que los buckets pueden acumular (ráfaga máxima tras un periodo tranquilo)
+BURST_SECONDS = 10
+
+# Duración supuesta de una llamada hasta medir la primera, y peso de cada llamada nueva en la media móvil
+INITIAL_CALL_SECONDS = 1.0
+CALL_SECONDS_WEIGHT = 0.2
+
+# Carril de cada fase (0 = sale primero): el último pick no puede esperar
+PHASE_PRIORITY = {4: 0, 3: 1, 2: 2, 1: 3}
+LANES = ("phase4", "phase3", "phase2", "phase1", "other")
+
+
+class QuotaExceededError(Exception):
+    """La llamada no puede salir dentro del plazo sin pasarse de la cuota."""
+
+    def __init__(self, retry_after, message="LLM quota exhausted"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket con `rate` tokens por segundo y capacidad `capacity` (ráfaga máxima)."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Segundos hasta que haya `amount` tokens disponibles (0 si ya los hay)."""
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount):
+        """Descuenta `amount` tokens (hay que comprobar antes `wait_time`)."""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount):
+        """Devuelve `amount` tokens de una llamada que no llegó a salir."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Unlimited:
+    """Bucket sin límite (RPM o TPM a 0)."""
+
+    capacity = math.inf
+
+    def wait_time(self, amount):
+        return 0.0
+
+    def take(self, amount):
+        pass
+
+    def refund(self, amount):
+        pass
+
+
+def estimate_tokens(prompt, output_tokens=DEFAULT_OUTPUT_TOKENS):
+    """Estima los tokens de una llamada: los del prompt (por su longitud) más los de la respuesta."""
+    return math.ceil(prompt_size(prompt) / CHARS_PER_TOKEN) + output_tokens
+
+
+def phase_priority(phase):
+    """Devuelve el carril de prioridad de la fase (0 = el más prioritario); las fases desconocidas van al último."""
+    return PHASE_PRIORITY.get(phase, len(PHASE_PRIORITY))
+
+
+def is_rate_limit_error(error):
+    """Indica si el error es un 429 del proveedor (cuota agotada)."""
+    return getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+class QuotaScheduler:
+    """Planificador de las llamadas a la IA con buckets de RPM y TPM, carriles de prioridad y concurrencia AIMD."""
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 min_concurrency=DEFAULT_MIN_CONCURRENCY, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        """
+        Parámetros:
+        - rpm (float): Peticiones por minuto permitidas (0 = sin límite).
+        - tpm (float): Tokens por minuto permitidos (0 = sin límite).
+        - max_concurrency (int): Límite máximo de llamadas a la vez (y valor inicial).
+        - min_concurrency (int): Límite mínimo al que se puede reducir la concurrencia.
+        - queue_timeout (float): Segundos máximos que una llamada puede esperar en la cola.
+
+        Lanza:
+        - ValueError: Si no se cumple 1 <= `min_concurrency` <= `max_concurrency`.
+        """
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError(
+                f"Invalid LLM concurrency limits: min {min_concurrency}, max {max_concurrency} (need 1 <= min <= max)"
+            )
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.queue_timeout = queue_timeout
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.decreases = 0
+        self._requests = TokenBucket(rpm / 60, max(1.0, rpm / 60 * BURST_SECONDS)) if rpm > 0 else _Unlimited()
+        self._tokens = TokenBucket(tpm / 60, tpm / 60 * BURST_SECONDS) if tpm > 0 else _Unlimited()
+        self._queue = []          # Heap de (prioridad, orden de llegada, tokens, future)
+        self._sequence = count()
+        self._timer = None        # Reintento del reparto cuando los buckets se repongan
+        self._last_decrease = 0.0
+        self.call_seconds = INITIAL_CALL_SECONDS  # Media móvil de la duración de las llamadas correctas
+        LLM_SCHEDULER_LIMIT.set(self.limit)
+
+    def estimate_wait(self, tokens, priority):
+        """
+        Estima los segundos que esperaría en la cola una llamada de `tokens` tokens con prioridad `priority`,
+        contando las llamadas en cola que saldrían antes que ella: lo que tardan los buckets en reponer su cuota
+        o, con la concurrencia llena, las tandas de llamadas (de la duración media observada) hasta que le toque.
+        """
+        requests_ahead = 1
+        tokens_ahead = tokens
+        for queued_priority, _, queued_tokens, future in self._queue:
+            if queued_priority <= priority and not future.done():
+                requests_ahead += 1
+                tokens_ahead += queued_tokens
+
+        limit = int(self.limit)
+        waiting_for_slot = requests_ahead - max(0, limit - self.active)
+        concurrency_wait = math.ceil(waiting_for_slot / limit) * self.call_seconds if waiting_for_slot > 0 else 0.0
+        return max(self._requests.wait_time(requests_ahead), self._tokens.wait_time(tokens_ahead), concurrency_wait)
+
+    def admit(self, tokens, priority):
+        """
+        Comprueba si una llamada puede salir dentro del plazo.
+
+        Lanza:
+        - QuotaExceededError: Si la espera estimada supera `queue_timeout`.
+        """
+        wait = self.estimate_wait(tokens, priority)
+        if wait > self.queue_timeout:
+            self.rejected += 1
+            LLM_SCHEDULER_REJECTED.inc()
+            raise QuotaExceededError(wait)
+
+    def _update_queue_metrics(self):
+        queued = [0] * len(LANES)
+        for priority, _, _, future in self._queue:
+            if not future.done():
+                queued[min(priority, len(LANES) - 1)] += 1
+        for lane, value in zip(LANES, queued):
+            LLM_SCHEDULER_QUEUED.set(value, lane)
+
+    def _dispatch(self):
+        """Da paso a las llamadas en cola, por prioridad, mientras haya concurrencia y cuota disponibles."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            priority, _, tokens, future = self._queue[0]
+            if future.done():
+                # Llamada que agotó su plazo o se canceló
+                heapq.heappop(self._queue)
+                continue
+            if self.active >= int(self.limit):
+                break
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                break
+            heapq.heappop(self._queue)
+            self._take(tokens)
+            future.set_result(None)
+        self._update_queue_metrics()
+
+    def _take(self, tokens):
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self.active += 1
+        self.admitted += 1
+
+    async def _acquire(self, tokens, priority):
+        """
+        Espera (como mucho `queue_timeout` segundos) a que la llamada pueda salir, ocupa su plaza y devuelve los
+        tokens descontados del bucket de TPM.
+        """
+        # Una llamada mayor que la ráfaga del bucket de TPM nunca cabría: cuenta como la ráfaga entera
+        tokens = min(tokens, self._tokens.capacity)
+        self.admit(tokens, priority)
+
+        # Sin cola y con plaza y cuota, sale directamente
+        if not self._queue and self.active < int(self.limit) and max(self._requests.wait_time(1), self._tokens.wait_time(tokens)) == 0:
+            self._take(tokens)
+            DRAFT_STAGE_SECONDS.observe(0.0, "llm_queue_wait")
+            return tokens
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+
+        try:
+            with span("llm_queue_wait", lane=LANES[min(priority, len(LANES) - 1)], tokens=tokens):
+                await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                # Se le dio paso justo al vencer el plazo
+                return tokens
+            future.cancel()
+            self.rejected += 1
+            LLM_SCHEDULER_REJECTED.inc()
+            self._update_queue_metrics()
+            raise QuotaExceededError(self.estimate_wait(tokens, priority) or 1.0) from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(started, None)
+            else:
+                future.cancel()
+            raise
+        finally:
+            DRAFT_STAGE_SECONDS.observe(time.monotonic() - started, "llm_queue_wait")
+        return tokens
+
+    def _release(self, started, succeeded, error=None, refund=None):
+        """
+        Libera la plaza de una llamada y ajusta la concurrencia según su resultado (AIMD): sube tras una llamada
+        correcta, se reduce a la mitad tras un 429 y no cambia con otros errores o cancelaciones. Con `refund`
+        (tokens), la llamada no llegó a salir y se devuelve su cuota a los buckets.
+        """
+        self.active -= 1
+        if refund is not None:
+            self.admitted -= 1
+            self._requests.refund(1)
+            self._tokens.refund(refund)
+        if error is not None and is_rate_limit_error(error):
+            self.rate_limited += 1
+            LLM_RATE_LIMITED.inc()
+            # Solo se reduce una vez por tanda: los 429 de llamadas que salieron antes de la última reducción no cuentan
+            if started >= self._last_decrease:
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+        elif succeeded:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self.call_seconds += CALL_SECONDS_WEIGHT * (time.monotonic() - started - self.call_seconds)
+        LLM_SCHEDULER_LIMIT.set(self.limit)
+        self._dispatch()
+
+    async def run(self, func, tokens, priority):
+        """
+        Ejecuta `func()` (una función que devuelve una corrutina) cuando la cuota y la concurrencia lo permiten.
+
+        Lanza:
+        - QuotaExceededError: Si la llamada no puede salir dentro de `queue_timeout`.
+        - Cualquier excepción lanzada por la llamada.
+        """
+        tokens = await self._acquire(tokens, priority)
+        started = time.monotonic()
+        try:
+            result = await func()
+        except CircuitOpenError:
+            # El circuito se abrió mientras esperaba en la cola: la llamada no salió y no gasta cuota
+            self._release(started, False, refund=tokens)
+            raise
+        except Exception as e:
+            self._release(started, False, e)
+            raise
+        except BaseException:
+            self._release(started, False)
+            raise
+        self._release(started, True)
+        return result
+
+    async def stream(self, func, tokens, priority):
+        """Como `run`, pero para un generador asíncrono: la plaza se ocupa hasta que termina el flujo."""
+        tokens = await self._acquire(tokens, priority)
+        started = time.monotonic()
+        try:
+            async for chunk in func():
+                yield chunk
+        except CircuitOpenError:
+            self._release(started, False, refund=tokens)
+            raise
+        except Exception as e:
+            self._release(started, False, e)
+            raise
+        except BaseException:
+            self._release(started, False)
+            raise
+        self._release(started, True)
+
+    def stats(self):
+        """Devuelve un diccionario con el estado del planificador."""
+        queued = {lane: 0 for lane in LANES}
+        for priority, _, _, future in self._queue:
+            if not future.done():
+                queued[LANES[min(priority, len(LANES) - 1)]] += 1
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "concurrency_limit": round(self.limit, 2),
+            "active": self.active,
+            "queued": queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "concurrency_decreases": self.decreases,
+            "call_seconds": round(self.call_seconds, 3),
+        }
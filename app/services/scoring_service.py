@@ -0,0 +1,140 @@
+"""
+Módulo encargado de puntuar localmente, con NumPy, todos los brawlers disponibles de un draft.
+
+Los counters de `meta.txt` y `categories.txt` forman una matriz booleana N×N. Al cargar los datos se
+construye esa matriz junto con un vector de pesos por tier y, para cada mapa, los vectores de picks
+recomendados por fase (`Map.first_pick`, `Map.other_picks` y `Map.last_pick`). Puntuar un draft es una
+única pasada vectorizada sobre todos los brawlers.
+
+Clases:
+- ScoringEngine: Motor de puntuación construido a partir del `BrawlerRegistry`.
+
+Funciones:
+- split_picks(phase, picks): Separa los picks en los del equipo que elige ahora y los del rival.
+"""
+import numpy as np
+
+# Peso de cada tier (los brawlers sin tier valen 0)
+TIER_WEIGHTS = {"S": 5.0, "A": 4.0, "B": 3.0, "C": 2.0, "D": 1.0}
+
+# Lista de picks recomendados del mapa que se usa en cada fase
+PHASE_MAP_LISTS = {1: "first_pick", 2: "other_picks", 3: "other_picks", 4: "last_pick"}
+
+# Slots de cada equipo en el orden de picks: el que empieza elige 1º, 4º y 5º; el otro 2º, 3º y 6º
+FIRST_TEAM_SLOTS = (0, 3, 4)
+SECOND_TEAM_SLOTS = (1, 2, 5)
+
+
+def split_picks(phase, picks):
+    """
+    Separa los picks (en orden de slot) en los del equipo que elige en esta fase y los del rival.
+
+    En las fases impares elige el equipo que empezó el draft y en las pares el otro.
+
+    Retorna:
+    - tuple: (picks propios, picks enemigos).
+    """
+    own_slots, enemy_slots = (FIRST_TEAM_SLOTS, SECOND_TEAM_SLOTS) if phase % 2 else (SECOND_TEAM_SLOTS, FIRST_TEAM_SLOTS)
+    own = [picks[slot] for slot in own_slots if slot < len(picks)]
+    enemies = [picks[slot] for slot in enemy_slots if slot < len(picks)]
+    return own, enemies
+
+
+class ScoringEngine:
+    """Puntúa todos los brawlers disponibles de un draft en una pasada vectorizada."""
+
+    def __init__(self, registry, counter_weight=2.0, countered_weight=2.0, tier_weight=1.0, map_weight=3.0):
+        self.registry = registry
+        self.counter_weight = counter_weight
+        self.countered_weight = countered_weight
+        self.tier_weight = tier_weight
+        self.map_weight = map_weight
+
+        size = registry.size
+
+        # counter_matrix[i, j] es True si el brawler i counterea al brawler j
+        self.counter_matrix = np.zeros((size, size), dtype=bool)
+        for brawler_id, mask in enumerate(registry.countered_by):
+            self.counter_matrix[self._mask_to_vector(mask), brawler_id] = True
+
+        self.tier_vector = np.array([TIER_WEIGHTS.get(tier, 0.0) for tier in registry.tier_of])
+
+        # map_vectors[mapa][lista] es un vector booleano con los picks recomendados del mapa
+        self.map_vectors = {
+            map_name: {list_name: self._mask_to_vector(mask) for list_name, mask in masks.items()}
+            for map_name, masks in registry.map_masks.items()
+        }
+        self.names = np.array(registry.names, dtype=object)
+
+    def _mask_to_vector(self, mask):
+        """Convierte un bitset del registro en un vector booleano de NumPy."""
+        size = self.registry.size
+        # Bytes del entero en orden little-endian: el bit i del bitset es el bit i del vector
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=np.uint8), bitorder="little")
+        return bits[:size].astype(bool)
+
+    def _ids(self, names):
+        """Devuelve los identificadores de los nombres conocidos, como array de NumPy."""
+        ids = self.registry.ids
+        return np.array([ids[name] for name in names if name in ids], dtype=np.intp)
+
+    def score(self, phase, selected_map, banned_brawlers, picks, top=None):
+        """
+        Puntúa todos los brawlers disponibles para el equipo que elige en `phase`.
+
+        Para cada brawler disponible calcula:
+        - counters: cuántos picks enemigos counterea.
+        - countered_by: cuántos picks enemigos lo counterean.
+        - tier: peso de su tier.
+        - map_bonus: 1 si está en la lista de picks recomendados del mapa para esta fase.
+
+        Parámetros:
+        - phase (int): Fase del draft (1 a 4).
+        - selected_map (str): Nombre del mapa seleccionado.
+        - banned_brawlers (list): Brawlers baneados.
+        - picks (list): Picks realizados hasta el momento, en orden de slot.
+        - top (int): Número máximo de resultados (None para todos).
+
+        Retorna:
+        - list: Diccionarios ordenados de mayor a menor puntuación.
+        """
+        if phase not in PHASE_MAP_LISTS:
+            raise ValueError(f"Fase no válida: {phase}. Debe estar entre 1 y 4.")
+        if selected_map not in self.map_vectors:
+            raise ValueError(f"The selected map '{selected_map}' is not found in the 'maps' dictionary.")
+
+        _, enemy_picks = split_picks(phase, picks)
+        enemy_ids = self._ids(enemy_picks)
+
+        available = np.ones(self.registry.size, dtype=bool)
+        available[self._ids(banned_brawlers)] = False
+        available[self._ids(picks)] = False
+
+        counters = self.counter_matrix[:, enemy_ids].sum(axis=1)
+        countered_by = self.counter_matrix[enemy_ids, :].sum(axis=0)
+        map_bonus = self.map_vectors[selected_map][PHASE_MAP_LISTS[phase]]
+
+        scores = (
+            self.counter_weight * counters
+            - self.countered_weight * countered_by
+            + self.tier_weight * self.tier_vector
+            + self.map_weight * map_bonus
+        )
+
+        candidate_ids = np.flatnonzero(available)
+        # Orden estable: a igual puntuación se mantiene el orden del registro
+        ranked_ids = candidate_ids[np.argsort(-scores[candidate_ids], kind="stable")]
+        if top is not None:
+            ranked_ids = ranked_ids[:top]
+
+        return [
+            {
+                "brawler": self.names[brawler_id],
+                "score": round(float(scores[brawler_id]), 2),
+                "counters": int(counters[brawler_id]),
+                "countered_by": int(countered_by[brawler_id]),
+                "tier": self.registry.tier_of[brawler_id],
+                "map_bonus": bool(map_bonus[brawler_id]),
+            }
+            for brawler_id in ranked_ids
+        ]
@@ -0,0 +1,78 @@
+"""
+Módulo encargado de agrupar ("single-flight") las peticiones idénticas que están en curso.
+
+Cuando entra un mapa popular llegan ráfagas del mismo draft en el mismo segundo. En lugar de lanzar una
+llamada a Gemini por cada una, la primera petición (líder) lanza la llamada y las demás con la misma
+clave esperan a su resultado.
+
+Clases:
+- SingleFlight: Comparte una única llamada en curso entre todas las peticiones con la misma clave.
+
+Notas:
+- Si la llamada falla, la excepción se propaga a todas las peticiones que la esperaban.
+- Si una petición se cancela (p. ej. el cliente cierra la conexión), solo deja de esperar ella; la llamada
+  compartida solo se cancela cuando ya no queda nadie esperándola.
+"""
+import asyncio
+
+
+class _Call:
+    """Llamada en curso y número de peticiones que la esperan."""
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa las llamadas asíncronas concurrentes con la misma clave en una sola."""
+
+    def __init__(self):
+        self.calls = 0       # Llamadas reales ejecutadas
+        self.coalesced = 0   # Llamadas ahorradas (peticiones que reutilizaron una llamada en curso)
+        self._calls = {}     # clave -> _Call
+
+    async def do(self, key, func):
+        """
+        Ejecuta `func()` (una función que devuelve una corrutina) una sola vez por clave en curso.
+
+        Parámetros:
+        - key: Clave hashable que identifica la llamada (p. ej. la clave canónica del draft).
+        - func (callable): Función sin argumentos que devuelve la corrutina a ejecutar.
+
+        Retorna:
+        - El resultado de la corrutina, compartido por todas las peticiones con la misma clave.
+        """
+        call = self._calls.get(key)
+
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # `shield` evita que la cancelación de una petición cancele la llamada compartida
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key, call):
+        """Elimina la llamada terminada, salvo que ya se haya sustituido por otra."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        """Devuelve un diccionario con las métricas del agrupamiento."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,332 @@
+"""
+Módulo encargado de las trazas por petición: una traza por petición con un span por cada etapa del draft.
+
+Las métricas de `GET /metrics` dicen cuánto tardan las etapas en conjunto; las trazas permiten ver un draft
+lento en concreto. `TracingMiddleware` abre el span raíz de cada petición (continuando la traza de la
+cabecera `traceparent` si el cliente la envía, formato W3C Trace Context) y devuelve el identificador de la
+traza en la cabecera `X-Trace-Id`. Dentro de la petición, `span(name, **attributes)` abre un span hijo del
+span activo; fuera de una traza (p. ej. en la versión de consola) no hace nada.
+
+El span activo se guarda en una `ContextVar`, así que pasa solo a las tareas de asyncio y a las funciones
+que se ejecutan en el threadpool.
+
+Clases:
+- Span: Operación con nombre, identificadores, duración, atributos y estado.
+- Tracer: Crea los spans raíz y envía los spans terminados al exportador.
+- InMemorySpanExporter: Guarda los últimos spans en memoria (consulta con `GET /admin/traces/{trace_id}` y pruebas).
+- FileSpanExporter: Escribe cada span como una línea JSON en un fichero, desde un hilo de fondo.
+- TracingMiddleware: Middleware ASGI que abre el span raíz de cada petición y devuelve `X-Trace-Id`.
+
+Funciones:
+- span(name, **attributes): Abre un span hijo del span activo (context manager).
+- start_span(name, **attributes): Crea un span hijo del span activo sin activarlo (para generadores asíncronos).
+- set_attributes(**attributes): Añade atributos al span activo, si lo hay.
+- current_span(): Devuelve el span activo, o None si no hay traza.
+- activate(active_span): Convierte `active_span` en el span activo dentro del bloque (context manager).
+- parse_traceparent(value): Extrae el identificador de traza y el del span padre de una cabecera `traceparent`.
+- create_span_exporter(mode, trace_file): Crea el exportador configurado, o None si las trazas están desactivadas.
+"""
+import os
+import re
+import time
+import collections
+import contextvars
+from contextlib import contextmanager
+from app.services.log_service import DraftLogger, JsonLinesSink
+
+# Configuración por defecto, modificable con variables de entorno
+DEFAULT_TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "memory").lower()
+DEFAULT_TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+DEFAULT_TRACE_MEMORY_SPANS = int(os.getenv("TRACE_MEMORY_SPANS", "10000"))
+
+# Cabeceras de propagación (entrada) y de respuesta
+TRACEPARENT_HEADER = b"traceparent"
+TRACE_ID_HEADER = b"x-trace-id"
+
+# `traceparent`: versión 00, identificador de traza (32 hex), span padre (16 hex) y flags (2 hex)
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Span activo en la tarea o hilo actual
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(size):
+    """Devuelve un identificador aleatorio de `size` bytes en hexadecimal."""
+    return os.urandom(size).hex()
+
+
+def parse_traceparent(value):
+    """
+    Extrae el identificador de traza y el del span padre de una cabecera `traceparent`.
+
+    Retorna:
+    - tuple | None: (`trace_id`, `parent_id`), o None si la cabecera no es válida.
+    """
+    match = TRACEPARENT_PATTERN.match(value.strip().lower()) if value else None
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+class Span:
+    """Operación de una traza: nombre, identificadores, inicio, duración, atributos y estado."""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "start_time", "duration_ms", "attributes", "status", "_started")
+
+    def __init__(self, tracer, name, trace_id, parent_id=None, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration_ms = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self._started = time.perf_counter()
+
+    def set(self, key, value):
+        """Añade o cambia un atributo del span."""
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        """Marca el span como fallido con el tipo y el mensaje de la excepción."""
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        """Termina el span y lo envía al exportador."""
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        self.tracer.export(self)
+
+    @property
+    def traceparent(self):
+        """Cabecera `traceparent` con este span como padre."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """Crea los spans raíz de las peticiones y envía los spans terminados al exportador."""
+
+    def __init__(self, exporter=None):
+        """
+        Parámetros:
+        - exporter: Destino de los spans (`InMemorySpanExporter`, `FileSpanExporter` o None para no guardarlos).
+        """
+        self.exporter = exporter
+        self.spans = 0
+
+    def start_span(self, name, traceparent=None, **attributes):
+        """
+        Abre el span raíz de una petición. Si `traceparent` es válida, el span continúa esa traza.
+
+        Retorna:
+        - Span: Span raíz (hay que activarlo con `activate` y terminarlo con `end`).
+        """
+        parent = parse_traceparent(traceparent)
+        trace_id, parent_id = parent if parent is not None else (_new_id(16), None)
+        return Span(self, name, trace_id, parent_id, attributes)
+
+    def export(self, finished_span):
+        self.spans += 1
+        if self.exporter is not None:
+            self.exporter.export(finished_span)
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def stats(self):
+        """Devuelve un diccionario con las métricas de las trazas."""
+        return {
+            "exporter": type(self.exporter).__name__ if self.exporter is not None else None,
+            "spans": self.spans,
+        }
+
+
+def current_span():
+    """Devuelve el span activo, o None si no hay ninguna traza en curso."""
+    return _current_span.get()
+
+
+@contextmanager
+def activate(active_span):
+    """Hace que `active_span` sea el span activo dentro del bloque."""
+    token = _current_span.set(active_span)
+    try:
+        yield active_span
+    finally:
+        _current_span.reset(token)
+
+
+class _NoopSpan:
+    """Span que no guarda nada, usado fuera de una traza."""
+
+    def set(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Abre un span hijo del span activo durante el bloque; si el bloque lanza una excepción, el span se marca
+    como fallido. Fuera de una traza devuelve un span que no hace nada.
+
+    Ejemplo:
+        with span("llm_call", prompt_chars=len(prompt)) as llm_span:
+            ...
+            llm_span.set("suggestions", len(suggestions))
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(parent.tracer, name, parent.trace_id, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def start_span(name, **attributes):
+    """
+    Crea un span hijo del span activo sin convertirlo en el activo; hay que terminarlo con `end()`. Sirve
+    para medir operaciones que cruzan varios `yield` de un generador asíncrono. Fuera de una traza devuelve
+    un span que no hace nada.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.tracer, name, parent.trace_id, parent.span_id, attributes)
+
+
+def set_attributes(**attributes):
+    """Añade atributos al span activo, si hay una traza en curso."""
+    active_span = _current_span.get()
+    if active_span is not None:
+        active_span.attributes.update(attributes)
+
+
+class InMemorySpanExporter:
+    """Guarda los últimos `max_spans` spans en memoria."""
+
+    def __init__(self, max_spans=DEFAULT_TRACE_MEMORY_SPANS):
+        self._spans = collections.deque(maxlen=max_spans)
+
+    def export(self, finished_span):
+        self._spans.append(finished_span.to_dict())
+
+    def get_trace(self, trace_id):
+        """Devuelve los spans guardados de una traza, en orden de inicio."""
+        return sorted((s for s in list(self._spans) if s["trace_id"] == trace_id), key=lambda s: s["start_time"])
+
+    def spans(self):
+        """Devuelve todos los spans guardados."""
+        return list(self._spans)
+
+    def clear(self):
+        self._spans.clear()
+
+    def close(self):
+        pass
+
+
+class FileSpanExporter:
+    """Escribe cada span como una línea JSON en un fichero; la escritura la hace el hilo de fondo de un `DraftLogger`."""
+
+    def __init__(self, trace_file=DEFAULT_TRACE_FILE):
+        self._logger = DraftLogger(JsonLinesSink(trace_file))
+
+    def export(self, finished_span):
+        self._logger.log("span", **finished_span.to_dict())
+
+    def close(self):
+        self._logger.close()
+
+
+def create_span_exporter(mode=DEFAULT_TRACE_EXPORTER, trace_file=DEFAULT_TRACE_FILE):
+    """
+    Crea el exportador de spans para el modo indicado.
+
+    Parámetros:
+    - mode (str): "memory" (últimos spans en memoria, por defecto), "file" (líneas JSON) u "off".
+    - trace_file (str): Fichero de las líneas JSON en el modo "file".
+
+    Retorna:
+    - InMemorySpanExporter | FileSpanExporter | None: None si las trazas no se guardan.
+    """
+    if mode == "memory":
+        return InMemorySpanExporter()
+    if mode == "file":
+        return FileSpanExporter(trace_file)
+    if mode in ("", "off", "none"):
+        return None
+    raise ValueError(f"Unknown trace exporter: {mode}")
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre el span raíz de cada petición con `app.state.tracer` (continuando la traza de
+    `traceparent` si la hay) y devuelve su identificador en la cabecera `X-Trace-Id`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", ()):
+            if name == TRACEPARENT_HEADER:
+                traceparent = value.decode("latin-1")
+                break
+
+        tracer = scope["app"].state.tracer
+        root = tracer.start_span("http.request", traceparent, method=scope["method"], path=scope["path"])
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                root.set("status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = "error"
+                message["headers"] = list(message.get("headers", [])) + [(TRACE_ID_HEADER, root.trace_id.encode("latin-1"))]
+            await send(message)
+
+        with activate(root):
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            except BaseException as e:
+                root.record_error(e)
+                raise
+            finally:
+                root.end()
@@ -2,34 +2,38 @@
 Módulo de configuración y utilidades generales para el sistema de draft.
 
 Funciones:
-- clean_console(): Limpia la consola dependiendo del sistema operativo.
 - load_brawlers(archive): Carga los brawlers desde un archivo de texto.
 - load_categories(archive, brawlers): Carga las categorías de los brawlers.
 - assign_counters(archive, brawlers, categories): Asigna los counters de cada brawler.
 - assign_tier(tier_file, brawlers): Asigna el tier de cada brawler.
 - load_data(meta, categories, tier): Carga toda la información de los brawlers en un diccionario.
+- load_env_file(env_file): Carga las variables del fichero `.env` en el entorno, si existe.
 - load_maps(file_path, brawlers): Carga los mapas con sus características y brawlers recomendados.
-- load_brawlers_from_file(file_path): Carga solo los nombres de los brawlers en una lista.
-- get_team(): Obtiene el equipo que comienza el draft.
-- get_map(maps_dict): Obtiene el mapa seleccionado.
-- get_phase(): Obtiene la fase del draft actual.
-- complete(text, state): Autocompleta nombres de brawlers.
 - get_draft_summary(phase, team, banned_brawlers, picks, brawlers): Genera un resumen del draft para la IA.
 - get_categories_summary(brawlers, banned_brawlers): Genera un resumen de las categorías de brawlers en formato de lista con comas, excluyendo los brawlers baneados.
-- generate_final_prompt(phase, selected_map, maps, brawlers, banned_brawlers, team, picks, "prompts", "final_prompt"): Genera un archivo final con el prompt completo para la IA.
+- generate_final_prompt(phase, selected_map, maps, brawlers, banned_brawlers, team, picks, templates): Genera el prompt completo para la IA a partir de las plantillas precargadas.
+- get_static_prompt_prefix(phase, selected_map, maps, brawlers, templates): Genera la parte del prompt que solo depende del mapa y la fase.
+- get_static_prompt_prefixes(maps, brawlers, templates): Genera la parte estática del prompt de todos los (mapa, fase).
+- generate_prompt_parts(phase, selected_map, maps, brawlers, banned_brawlers, team, picks, templates, meta_version, prefixes): Genera el prompt dividido en instrucción de sistema, prefijo estático y sufijo dinámico.
 """
 import os
-from termcolor import colored
+import sys
 from app.models.classes import Brawler, Map
+from app.utils.prompts import get_prompt_templates, DraftPrompt, PHASE_PROMPTS
 
-# Función para limpiar la consola
-def clean_console():
-    """Función para limpiar consola."""
-    # Verificamos el sistema operativo y ejecutamos el comando correspondiente
-    if os.name == 'posix':  # Linux o macOS
-        os.system('clear')
-    elif os.name == 'nt':  # Windows
-        os.system('cls')
+# Fichero `.env` de la raíz del proyecto
+ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".env")
+
+def load_env_file(env_file=ENV_FILE):
+    """
+    Carga las variables del fichero `.env` en el entorno, sin sobrescribir las que ya están definidas.
+
+    `python-dotenv` solo se importa si el fichero existe, así que no cuesta nada al arrancar cuando la
+    configuración llega por variables de entorno.
+    """
+    if os.path.isfile(env_file):
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
 
 # Paso 1: Crear brawlers desde meta.txt (solo los nombres)
 def load_brawlers(archive):
@@ -40,8 +44,9 @@ def load_brawlers(archive):
         for line in file:
             # Limpiar la línea y separar el nombre del brawler (antes de los dos puntos)
             line = line.strip()
-            name = line.split(": ")[0]
-            brawlers[name.strip()] = Brawler(name.strip())
+            # Los nombres se internan para compartirlos entre temporadas cargadas a la vez
+            name = sys.intern(line.split(": ")[0].strip())
+            brawlers[name] = Brawler(name)
 
     return brawlers
 
@@ -55,7 +60,7 @@ def load_categories(archive, brawlers):
             for line in file:
                 if ":" in line:
                     category, brawler_list = line.strip().split(":")
-                    category = category.strip()
+                    category = sys.intern(category.strip())
                     brawlers_list = [b.strip() for b in brawler_list.split("|")]
                     
                     # Guardar la categoría en el diccionario
@@ -143,11 +148,11 @@ def load_maps(file_path, brawlers):
             continue  # Saltar líneas vacías
         # Si encontramos el nombre del mapa (línea que no tiene - o algo más después de : )
         if ":" in line and not line.startswith("-"):
-            map_name = line.split(":")[0].strip()  # Extraer el nombre del mapa
+            map_name = sys.intern(line.split(":")[0].strip())  # Extraer el nombre del mapa
             current_map = Map(name=map_name, mode="", has_indestructible_walls=False)
             maps[map_name] = current_map  # Guardar el mapa en el diccionario
         elif line.startswith("- Mode:"):
-            current_map.mode = line.split(":")[1].strip()
+            current_map.mode = sys.intern(line.split(":")[1].strip())
         elif line.startswith("- Has indestructive walls:"):
             current_map.has_indestructible_walls = line.split(":")[1].strip().lower() == "yes"
         elif line.startswith("- 1st Pick:"):
@@ -167,96 +172,22 @@ def load_maps(file_path, brawlers):
                 brawlers[name.strip()] for name in other_picks if name.strip() in brawlers
             ]
         elif line.startswith("- Mid:"):
-            current_map.mid = line.split(":")[1].strip()
+            current_map.mid = sys.intern(line.split(":")[1].strip())
         elif line.startswith("- Lane:"):
-            current_map.lane = line.split(":")[1].strip()
+            current_map.lane = sys.intern(line.split(":")[1].strip())
         elif line.startswith("- Estrategy:"):
-            current_map.strategy = line.split(":")[1].strip()
+            current_map.strategy = sys.intern(line.split(":")[1].strip())
 
     return maps
 
 
-def load_brawlers_from_file(file_path):
-    """Función para cargar solo los nombres de los brawlers en una lista"""
-    brawlers = []
-    with open(file_path, 'r', encoding='utf-8')  as file:
-        for line in file:
-            # Extraer el nombre del brawler antes de los dos puntos
-            brawler_name = line.split(":")[0].strip()
-            brawlers.append(brawler_name)
-    return brawlers
-
-def get_team():
-    """Recoge el equipo que empieza eligiendo y el mapa seleccionado, con el diccionario de mapas."""
-    valid_teams = ['blue', 'red']  # Valid teams
-
-    team_completed = False
-    while not team_completed:
-        print(f"Which team starts picking? ({colored('Blue', 'blue')}/{colored('Red', 'red')}):")
-        team = input().strip().lower()  # Read input and convert to lowercase to normalize
-        if team in valid_teams:  # Check if the response is valid
-            team_completed = True
-            clean_console()
-        else:
-            clean_console()
-            print(f"Invalid team name. Please enter {colored('Blue', 'blue')} or {colored('Red', 'red')}.")
-    return team
-
-def get_map(maps_dict):
-    """Recoge el mapa seleccionado, con el diccionario de mapas."""
-    map_completed = False
-    selected_map = None
-    while not map_completed:
-        print("\nWhich map has been selected? (enter the name of the map):")
-        print("\nAvailable maps:")
-        for map_name, map_obj in maps_dict.items():
-            print(f"{map_name} ({map_obj.mode})")  # Print map name and its game mode
-
-        map_name = input().strip()  # Read input
-
-        # Check if the map exists in the dictionary
-        if map_name in maps_dict:
-            selected_map = maps_dict[map_name]
-            map_completed = True
-            clean_console()
-        else:
-            clean_console()
-            print(f"'{map_name}' is not a valid map. Please choose a valid map.")
-
-    return selected_map.name
-
-def get_phase():
-    """Obtiene la fase del draft, pidiendo un número del 1 al 4 con explicaciones claras."""
-    phase_completed = False
-    while not phase_completed:
-        print(f"Please enter the draft phase ({colored('1', 'cyan')}-{colored('4', 'cyan')}) based on your current stage:")
-        print(f"{colored('1', 'cyan')}: First phase - Choose the 1st pick. This is the first pick of the draft.")
-        print(f"{colored('2', 'cyan')}: Second phase - Choose the 2nd and 3rd picks. This is the second part of the draft.")
-        print(f"{colored('3', 'cyan')}: Third phase - Choose the 4th and 5th picks. This is the third part of the draft.")
-        print(f"{colored('4', 'cyan')}: Fourth phase - Choose the last pick. This is the final pick of the draft.")
-
-        # Solicitar al usuario el número de la fase
-        phase = input("Enter the phase number (1-4): ").strip()
-
-        # Verificar si la entrada es un número entero entre 1 y 4
-        if phase.isdigit() and int(phase) in [1, 2, 3, 4]:
-            phase_completed = True
-            clean_console()
-        else:
-            clean_console()
-            print("Invalid input! Please enter a valid integer between 1 and 4.")
-
-    return int(phase)
-
-def complete(text, state):
-    """Función de autocompletado para readline."""
-    brawlers = load_brawlers_from_file('meta.txt')
-    options = [brawler for brawler in brawlers if brawler.lower().startswith(text.lower())]
-    return options[state] if state < len(options) else None
-
 def get_draft_summary(phase, team, banned_brawlers, picks, brawlers):
     """Genera un string optimizado para la IA con el resumen del draft, que se añadirá al prompt."""
 
+    # Conjuntos para que las comprobaciones de pertenencia sean O(1)
+    banned_set = frozenset(banned_brawlers)
+    picked_set = frozenset(picks)
+
     summary = []
     summary.append("CURRENT DRAFT")
 
@@ -345,7 +276,8 @@ def get_draft_summary(phase, team, banned_brawlers, picks, brawlers):
 
         for pick in enemy_picks:
             if pick in brawlers:
-                counters_str = ", ".join([counter.name for counter in brawlers[pick].counters if counter.name not in banned_brawlers and counter.name not in enemy_picks])
+                excluded = banned_set.union(enemy_picks)
+                counters_str = ", ".join([counter.name for counter in brawlers[pick].counters if counter.name not in excluded])
                 summary.append(f"{pick} is countered by {counters_str}.")
             else:
                 summary.append(f"No counters found for {pick}.")
@@ -353,17 +285,18 @@ def get_draft_summary(phase, team, banned_brawlers, picks, brawlers):
     # Añadir información de los brawlers disponibles
     selection_word = "selection" if phase in [1, 4] else "selections"
     summary.append(f"\nAvailable Brawlers (Your {selection_word} must be from this list, with their tier in parentheses):")
-    summary.append(", ".join([f"{brawler.name} ({brawler.tier})" for name, brawler in brawlers.items() if name not in banned_brawlers and name not in picks]) + ".")
+    summary.append(", ".join([f"{brawler.name} ({brawler.tier})" for name, brawler in brawlers.items() if name not in banned_set and name not in picked_set]) + ".")
 
     return "\n".join(summary)
 
 def get_categories_summary(brawlers, banned_brawlers):
     """Genera un resumen de las categorías de brawlers en formato de lista con comas, excluyendo los brawlers baneados."""
     categories = {}
+    banned_set = frozenset(banned_brawlers)
 
     # Agrupar brawlers por su categoría, excluyendo los baneados
     for brawler in brawlers.values():
-        if brawler.category and brawler.name not in banned_brawlers:  # Solo incluir si el brawler tiene categoría y no está baneado
+        if brawler.category and brawler.name not in banned_set:  # Solo incluir si el brawler tiene categoría y no está baneado
             if brawler.category not in categories:
                 categories[brawler.category] = []
             categories[brawler.category].append(brawler.name)
@@ -378,70 +311,41 @@ def get_categories_summary(brawlers, banned_brawlers):
 
     return summary
 
-def generate_final_prompt(phase, selected_map, maps, brawlers, banned_brawlers, team, picks, prompts_path="data/prompts", output_folder="final_prompt"):
+def generate_final_prompt(phase, selected_map, maps, brawlers, banned_brawlers, team, picks, templates=None):
     """
-    Genera un archivo final combinando los prompts en el orden correcto:
+    Genera el prompt final combinando los prompts en el orden correcto:
     1. prompt_1.txt
     2. prompt_2.x.txt (según la fase)
     3. prompt_3.txt
     4. Información del mapa seleccionado
     5. Información de los brawlers disponibles (sin los baneados)
 
+    Las plantillas se toman de memoria (`PromptTemplates`), por lo que no se hace ninguna lectura de disco.
+
     Parámetros:
     - phase (int): Fase del draft (1 a 4).
     - selected_map (str): Nombre del mapa seleccionado.
     - maps (dict): Diccionario con los objetos Map.
     - brawlers (dict): Diccionario con los objetos Brawler.
     - banned_brawlers (list): Lista de brawlers baneados en esta partida.
-    - prompts_folder (str): Carpeta donde están los prompts.
-    - output_folder (str): Carpeta donde se guardará el archivo final.
+    - team (str): Equipo que comenzó el draft ('blue' o 'red').
+    - picks (list): Lista de picks realizados hasta el momento.
+    - templates (PromptTemplates): Plantillas precargadas. Si es None, se usan las de `data/prompts`.
     """
+    if templates is None:
+        templates = get_prompt_templates()
 
-    # Definir las rutas de las carpetas
-    current_directory = os.getcwd()
-    final_path = os.path.join(current_directory, output_folder)
-
-    # Crear la carpeta de salida si no existe
-    os.makedirs(final_path, exist_ok=True)
-
-    # Mapear el archivo de la fase correspondiente
-    phase_prompts = {
-        1: "prompt_2.1.txt",
-        2: "prompt_2.23.txt",
-        3: "prompt_2.45.txt",
-        4: "prompt_2.6.txt"
-    }
-
-    # Obtener el nombre correcto del archivo de fase
-    prompt_2_filename = phase_prompts.get(phase)
-
-    if not prompt_2_filename:
-        raise ValueError(f"Fase no válida: {phase}. Debe estar entre 1 y 4.")
-
-    # Definir rutas de los archivos de los prompts
-    prompt_1_path = os.path.join(prompts_path, "prompt_1.txt")
-    prompt_2_path = os.path.join(prompts_path, prompt_2_filename)
-    prompt_3_path = os.path.join(prompts_path, "prompt_3.txt")
-    final_prompt_path = os.path.join(final_path, "final_prompt.txt")
-
-    # Función para leer archivos de texto
-    def read_file(file_path):
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
-        with open(file_path, "r", encoding="utf-8") as file:
-            return file.read()
-
-    # Leer los archivos en orden correcto
+    # Unir las plantillas en orden correcto (lanza ValueError si la fase no es válida)
     final_content = (
-        read_file(prompt_1_path) + "\n\n" +
-        read_file(prompt_2_path) + "\n\n" +
-        read_file(prompt_3_path) + "\n\n"
+        templates.prompt_1 + "\n\n" +
+        templates.phase_prompt(phase) + "\n\n" +
+        templates.prompt_3 + "\n\n"
     )
 
     # Agregar la información del draft usando la función get_draft_summary()
     draft_summary_text = get_draft_summary(phase, team, banned_brawlers, picks, brawlers)
 
-    # Añadir el resumen del draft al archivo final
+    # Añadir el resumen del draft al prompt final
     final_content += draft_summary_text + "\n\n"
 
     # Añadir resumen de categorías
@@ -454,10 +358,66 @@ def generate_final_prompt(phase, selected_map, maps, brawlers, banned_brawlers,
     else:
         raise ValueError(f"The selected map '{selected_map}' is not found in the 'maps' dictionary.")
 
-    # Guardar el archivo final
-    #with open(final_prompt_path, "w", encoding="utf-8") as final_file:
-    #    final_file.write(final_content)
+    return final_content
+
+def get_static_prompt_prefix(phase, selected_map, maps, brawlers, templates=None):
+    """
+    Genera la parte estática del prompt para un (mapa, fase): prompt de la fase, `prompt_3.txt`,
+    resumen de categorías e información del mapa. No depende de los bans ni de los picks, por lo que
+    es idéntica byte a byte entre peticiones y se puede cachear en el proveedor de la IA.
+    """
+    if templates is None:
+        templates = get_prompt_templates()
+
+    if selected_map not in maps:
+        raise ValueError(f"The selected map '{selected_map}' is not found in the 'maps' dictionary.")
+
+    return (
+        templates.phase_prompt(phase) + "\n\n" +
+        templates.prompt_3 + "\n\n" +
+        get_categories_summary(brawlers, []) + "\n" +
+        "Selected Map Information\n" +
+        str(maps[selected_map]) + "\n\n"
+    )
 
-    #print(f"Final prompt file created at: {final_prompt_path}")
+def get_static_prompt_prefixes(maps, brawlers, templates=None):
+    """
+    Genera la parte estática del prompt (`get_static_prompt_prefix`) de todos los mapas y fases.
 
-    return final_content
+    Retorna:
+    - dict: (mapa, fase) -> prefijo estático.
+    """
+    if templates is None:
+        templates = get_prompt_templates()
+
+    return {
+        (map_name, phase): get_static_prompt_prefix(phase, map_name, maps, brawlers, templates)
+        for map_name in maps
+        for phase in PHASE_PROMPTS
+    }
+
+def generate_prompt_parts(phase, selected_map, maps, brawlers, banned_brawlers, team, picks, templates=None, meta_version=None, prefixes=None):
+    """
+    Genera el prompt del draft dividido en tres partes (ver `DraftPrompt`):
+    1. Instrucción de sistema: prompt_1.txt
+    2. Prefijo estático por (mapa, fase): prompt_2.x.txt, prompt_3.txt, categorías y mapa
+    3. Sufijo dinámico: resumen del draft (bans, picks, counters y brawlers disponibles)
+
+    Si se indica `meta_version` (que ya incluye los prompts), se usa en la clave del prefijo en lugar de la
+    versión de las plantillas, porque el prefijo también depende de los brawlers y los mapas.
+
+    Si se indica `prefixes` (de `get_static_prompt_prefixes`, ya generados al cargar el meta), el prefijo
+    se toma de ahí en lugar de volver a generarlo.
+
+    Retorna:
+    - DraftPrompt: Prompt dividido, con la clave del prefijo para la caché de contexto.
+    """
+    if templates is None:
+        templates = get_prompt_templates()
+
+    prefix = prefixes.get((selected_map, phase)) if prefixes is not None else None
+    if prefix is None:
+        prefix = get_static_prompt_prefix(phase, selected_map, maps, brawlers, templates)
+    suffix = get_draft_summary(phase, team, banned_brawlers, picks, brawlers) + "\n"
+
+    return DraftPrompt(templates.prompt_1, prefix, suffix, (meta_version or templates.version, selected_map, phase))
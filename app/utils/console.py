@@ -0,0 +1,103 @@
+"""
+Módulo con las utilidades de la versión de consola (`scripts/main_console.py`): limpiar la consola y pedir
+al usuario el mapa, la fase y el equipo.
+
+La API no importa este módulo, así que `termcolor` no forma parte de su arranque.
+
+Funciones:
+- clean_console(): Limpia la consola dependiendo del sistema operativo.
+- load_brawlers_from_file(file_path): Carga solo los nombres de los brawlers en una lista.
+- get_team(): Obtiene el equipo que comienza el draft.
+- get_map(maps_dict): Obtiene el mapa seleccionado.
+- get_phase(): Obtiene la fase del draft actual.
+- complete(text, state): Autocompleta nombres de brawlers.
+"""
+import os
+from termcolor import colored
+
+# Función para limpiar la consola
+def clean_console():
+    """Función para limpiar consola."""
+    # Verificamos el sistema operativo y ejecutamos el comando correspondiente
+    if os.name == 'posix':  # Linux o macOS
+        os.system('clear')
+    elif os.name == 'nt':  # Windows
+        os.system('cls')
+
+def load_brawlers_from_file(file_path):
+    """Función para cargar solo los nombres de los brawlers en una lista"""
+    brawlers = []
+    with open(file_path, 'r', encoding='utf-8')  as file:
+        for line in file:
+            # Extraer el nombre del brawler antes de los dos puntos
+            brawler_name = line.split(":")[0].strip()
+            brawlers.append(brawler_name)
+    return brawlers
+
+def get_team():
+    """Recoge el equipo que empieza eligiendo y el mapa seleccionado, con el diccionario de mapas."""
+    valid_teams = ['blue', 'red']  # Valid teams
+
+    team_completed = False
+    while not team_completed:
+        print(f"Which team starts picking? ({colored('Blue', 'blue')}/{colored('Red', 'red')}):")
+        team = input().strip().lower()  # Read input and convert to lowercase to normalize
+        if team in valid_teams:  # Check if the response is valid
+            team_completed = True
+            clean_console()
+        else:
+            clean_console()
+            print(f"Invalid team name. Please enter {colored('Blue', 'blue')} or {colored('Red', 'red')}.")
+    return team
+
+def get_map(maps_dict):
+    """Recoge el mapa seleccionado, con el diccionario de mapas."""
+    map_completed = False
+    selected_map = None
+    while not map_completed:
+        print("\nWhich map has been selected? (enter the name of the map):")
+        print("\nAvailable maps:")
+        for map_name, map_obj in maps_dict.items():
+            print(f"{map_name} ({map_obj.mode})")  # Print map name and its game mode
+
+        map_name = input().strip()  # Read input
+
+        # Check if the map exists in the dictionary
+        if map_name in maps_dict:
+            selected_map = maps_dict[map_name]
+            map_completed = True
+            clean_console()
+        else:
+            clean_console()
+            print(f"'{map_name}' is not a valid map. Please choose a valid map.")
+
+    return selected_map.name
+
+def get_phase():
+    """Obtiene la fase del draft, pidiendo un número del 1 al 4 con explicaciones claras."""
+    phase_completed = False
+    while not phase_completed:
+        print(f"Please enter the draft phase ({colored('1', 'cyan')}-{colored('4', 'cyan')}) based on your current stage:")
+        print(f"{colored('1', 'cyan')}: First phase - Choose the 1st pick. This is the first pick of the draft.")
+        print(f"{colored('2', 'cyan')}: Second phase - Choose the 2nd and 3rd picks. This is the second part of the draft.")
+        print(f"{colored('3', 'cyan')}: Third phase - Choose the 4th and 5th picks. This is the third part of the draft.")
+        print(f"{colored('4', 'cyan')}: Fourth phase - Choose the last pick. This is the final pick of the draft.")
+
+        # Solicitar al usuario el número de la fase
+        phase = input("Enter the phase number (1-4): ").strip()
+
+        # Verificar si la entrada es un número entero entre 1 y 4
+        if phase.isdigit() and int(phase) in [1, 2, 3, 4]:
+            phase_completed = True
+            clean_console()
+        else:
+            clean_console()
+            print("Invalid input! Please enter a valid integer between 1 and 4.")
+
+    return int(phase)
+
+def complete(text, state):
+    """Función de autocompletado para readline."""
+    brawlers = load_brawlers_from_file('meta.txt')
+    options = [brawler for brawler in brawlers if brawler.lower().startswith(text.lower())]
+    return options[state] if state < len(options) else None
@@ -0,0 +1,126 @@
+"""
+Módulo encargado de parsear la respuesta de Gemini con expresiones regulares precompiladas.
+
+Cada sugerencia de la IA es una línea con el formato
+"[Brawler Name] | [Percentage]% | [Explanation in English] | [Explanation in Spanish]". Las
+variantes que devuelve el modelo en la práctica también se aceptan:
+- Numeradas ("1. Hank | ...", "1) Hank | ...") o con viñeta ("- Hank | ...").
+- Con negritas de markdown en cualquier campo ("**Hank**", "**70%**").
+- Con el brawler y el porcentaje repetidos antes de la explicación en español
+  ("Hank | 70% | ENG | Hank | 70% | ESP").
+
+Todas las expresiones regulares se compilan una sola vez al importar el módulo y una respuesta
+completa se recorre en una única pasada (`finditer` en modo multilínea).
+
+Funciones:
+- parse_suggestions(text): Devuelve la lista de sugerencias de una respuesta completa.
+- parse_suggestion_line(line): Convierte una línea en una sugerencia, o None si no tiene el formato.
+
+Clases:
+- SuggestionStreamParser: Parser incremental que recibe fragmentos de texto y devuelve las sugerencias
+  de cada línea en cuanto está completa.
+"""
+import re
+
+# Línea de sugerencia. Solo se usan espacios y tabuladores (nunca `\s`) para que ninguna coincidencia
+# cruce de una línea a otra al recorrer la respuesta completa. Los grupos son voraces y sin
+# retroceso; los espacios y negritas sobrantes se limpian después.
+SUGGESTION_PATTERN = re.compile(
+    r"^[ \t]*"
+    r"(?:[-*•][ \t]+)?"             # Viñeta opcional
+    r"(?:\**\d+[.)]\**)?"           # Número opcional ("1.", "1)", "**1.**")
+    r"([^|\n]*)\|"                  # Brawler o pareja de brawlers
+    r"[ \t]*\**(\d+)[ \t]*%\**[ \t]*\|"  # Probabilidad
+    r"([^|\n]*)\|"                  # Explicación en inglés
+    r"([^\n]*)",                    # Explicación en español (hasta el final de la línea)
+    re.MULTILINE
+)
+
+# Brawler y porcentaje repetidos al principio de la explicación en español
+DUPLICATE_PREFIX_PATTERN = re.compile(r"^\s*(?P<brawlers>[^|]*?)\s*\|\s*\**(?P<probability>\d+)\s*%\**\s*\|\s*")
+
+
+def _clean(text):
+    """Elimina las negritas de markdown y los espacios sobrantes."""
+    return text.replace("**", "").strip() if "**" in text else text.strip()
+
+
+def _build_suggestion(match):
+    """Construye el diccionario de la sugerencia a partir de una coincidencia de `SUGGESTION_PATTERN`."""
+    brawlers, probability, explanation_usa, explanation_esp = match.groups()
+    brawlers = _clean(brawlers)
+    probability = int(probability)
+    explanation_usa = _clean(explanation_usa)
+    explanation_esp = _clean(explanation_esp)
+
+    # Quitar el brawler y el porcentaje si el modelo los ha repetido antes de la explicación en español
+    duplicate = "|" in explanation_esp and DUPLICATE_PREFIX_PATTERN.match(explanation_esp)
+    if duplicate and _clean(duplicate.group("brawlers")) == brawlers and int(duplicate.group("probability")) == probability:
+        explanation_esp = explanation_esp[duplicate.end():].strip()
+
+    return {
+        "brawlers": brawlers,
+        "probability": probability,
+        "explanationUSA": explanation_usa,
+        "explanationESP": explanation_esp
+    }
+
+
+def parse_suggestions(text):
+    """
+    Devuelve las sugerencias de una respuesta completa de Gemini, en una única pasada.
+
+    Parámetros:
+    - text (str): Texto devuelto por la API.
+
+    Retorna:
+    - list: Sugerencias con brawlers, probabilidad y explicaciones, en el orden de la respuesta.
+    """
+    return [_build_suggestion(match) for match in SUGGESTION_PATTERN.finditer(text)]
+
+
+def parse_suggestion_line(line):
+    """
+    Convierte una línea de la respuesta de Gemini en una sugerencia.
+
+    Retorna:
+    - dict | None: Sugerencia o None si la línea no tiene el formato esperado.
+    """
+    match = SUGGESTION_PATTERN.match(line)
+    return _build_suggestion(match) if match else None
+
+
+class SuggestionStreamParser:
+    """
+    Parser incremental: recibe los fragmentos de texto de una respuesta en streaming y devuelve las
+    sugerencias de cada línea en cuanto se completa. El resultado final es el mismo que el de
+    `parse_suggestions` sobre el texto completo.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """
+        Añade un fragmento de texto.
+
+        Retorna:
+        - list: Sugerencias de las líneas que se han completado con este fragmento.
+        """
+        self._buffer += chunk
+        end = self._buffer.rfind("\n")
+        if end == -1:
+            return []
+
+        complete, self._buffer = self._buffer[:end + 1], self._buffer[end + 1:]
+        return parse_suggestions(complete)
+
+    def close(self):
+        """
+        Indica que la respuesta ha terminado.
+
+        Retorna:
+        - list: Sugerencias de la última línea (la que no termina en salto de línea), si la hay.
+        """
+        remaining, self._buffer = self._buffer, ""
+        return parse_suggestions(remaining)
@@ -0,0 +1,118 @@
+"""
+Módulo que gestiona las plantillas de los prompts de la IA.
+
+Las plantillas (`prompt_1.txt`, `prompt_2.x.txt` de cada fase y `prompt_3.txt`) se leen y validan una sola
+vez al arrancar la API y se mantienen en memoria, de forma que construir un prompt no hace ninguna
+lectura de disco. Si falta alguna plantilla, la API falla al arrancar en lugar de devolver un error a un
+usuario en mitad de un draft.
+
+Clases:
+- PromptTemplates: Conjunto inmutable de plantillas con un hash de versión.
+- DraftPrompt: Prompt de un draft dividido en instrucción de sistema, prefijo estático y sufijo dinámico.
+
+Funciones:
+- load_prompt_templates(prompts_path): Carga y valida todas las plantillas de una carpeta.
+- get_prompt_templates(prompts_path): Devuelve las plantillas de una carpeta, cargándolas solo la primera vez.
+"""
+import os
+import hashlib
+from types import MappingProxyType
+from typing import NamedTuple, Tuple
+
+# Archivo de la parte 2 del prompt según la fase del draft
+PHASE_PROMPTS = MappingProxyType({
+    1: "prompt_2.1.txt",
+    2: "prompt_2.23.txt",
+    3: "prompt_2.45.txt",
+    4: "prompt_2.6.txt"
+})
+
+# Plantillas ya cargadas, por carpeta
+_loaded_templates = {}
+
+
+class PromptTemplates:
+    """Plantillas de los prompts cargadas en memoria. No se pueden modificar una vez creadas."""
+
+    __slots__ = ("prompt_1", "phase_prompts", "prompt_3", "version")
+
+    def __init__(self, prompt_1, phase_prompts, prompt_3):
+        object.__setattr__(self, "prompt_1", prompt_1)
+        object.__setattr__(self, "phase_prompts", MappingProxyType(dict(phase_prompts)))
+        object.__setattr__(self, "prompt_3", prompt_3)
+
+        # Hash de versión: cambia si cambia el contenido de cualquier plantilla
+        digest = hashlib.sha256()
+        for text in (prompt_1, *[phase_prompts[phase] for phase in sorted(phase_prompts)], prompt_3):
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        object.__setattr__(self, "version", digest.hexdigest()[:16])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PromptTemplates is immutable")
+
+    def phase_prompt(self, phase):
+        """Devuelve la plantilla de la fase indicada o lanza `ValueError` si la fase no es válida."""
+        if phase not in self.phase_prompts:
+            raise ValueError(f"Fase no válida: {phase}. Debe estar entre 1 y 4.")
+        return self.phase_prompts[phase]
+
+
+class DraftPrompt(NamedTuple):
+    """
+    Prompt de un draft dividido para aprovechar la caché de contexto del proveedor.
+
+    - system_instruction: `prompt_1.txt`, igual para todas las peticiones.
+    - prefix: Parte estática para un mismo (mapa, fase): prompt de la fase, `prompt_3.txt`,
+      categorías y mapa. Es idéntica byte a byte entre peticiones.
+    - suffix: Parte dinámica con el resumen del draft (bans, picks, counters y disponibles).
+    - prefix_key: Clave que identifica el prefijo: (versión del meta o de las plantillas, mapa, fase).
+    """
+    system_instruction: str
+    prefix: str
+    suffix: str
+    prefix_key: Tuple[str, str, int]
+
+    @property
+    def text(self):
+        """Prompt completo en un solo texto, para backends sin instrucción de sistema."""
+        return self.system_instruction + "\n\n" + self.prefix + self.suffix
+
+
+def load_prompt_templates(prompts_path="data/prompts"):
+    """
+    Lee y valida todas las plantillas de la carpeta indicada.
+
+    Parámetros:
+    - prompts_path (str): Carpeta donde están los prompts.
+
+    Retorna:
+    - PromptTemplates: Plantillas cargadas en memoria.
+
+    Lanza:
+    - FileNotFoundError: Si falta alguna plantilla.
+    - ValueError: Si alguna plantilla está vacía.
+    """
+    def read_template(file_name):
+        file_path = os.path.join(prompts_path, file_name)
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        with open(file_path, "r", encoding="utf-8") as file:
+            content = file.read()
+        if not content.strip():
+            raise ValueError(f"La plantilla está vacía: {file_path}")
+        return content
+
+    return PromptTemplates(
+        read_template("prompt_1.txt"),
+        {phase: read_template(file_name) for phase, file_name in PHASE_PROMPTS.items()},
+        read_template("prompt_3.txt")
+    )
+
+
+def get_prompt_templates(prompts_path="data/prompts"):
+    """Devuelve las plantillas de `prompts_path`, cargándolas y validándolas solo la primera vez."""
+    templates = _loaded_templates.get(prompts_path)
+    if templates is None:
+        templates = _loaded_templates[prompts_path] = load_prompt_templates(prompts_path)
+    return templates
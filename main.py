@@ -4,27 +4,107 @@ Este script define una API en FastAPI para gestionar un sistema de draft en Braw
 Características:
 - Carga los datos de brawlers y mapas desde archivos de texto al iniciar la API.
 - Define la estructura de la API y registra las rutas desde `draft_routes.py`.
-- Usa `app.state` para almacenar `maps` y `brawlers` y hacerlos accesibles globalmente.
+- Guarda en `app.state.meta` una instantánea inmutable de los datos del meta (`maps`, `brawlers`, registro,
+  motores locales y plantillas) y la recarga en caliente cuando cambian los ficheros de la temporada activa.
 - Permite recibir información de la fase actual del draft, el equipo que elige, los bans y picks previos.
 - Gestiona la lógica del draft y envía los datos a la API de Gemini para obtener recomendaciones.
 
 Rutas disponibles:
 - `POST /draft`: Recibe datos del draft y devuelve el resumen del draft junto con la recomendación de Gemini.
+- `POST /draft/stream`: Como `POST /draft`, pero envía cada sugerencia como evento SSE en cuanto se genera.
+- `POST /draft/batch`: Recomendaciones de varios drafts en una sola petición, con concurrencia limitada.
+- `POST /draft/score`: Puntúa localmente todos los brawlers disponibles del draft (sin IA).
+- `POST /draft/lookahead`: Búsqueda local alfa-beta de las mejores parejas en las fases 2 y 3.
+- `GET /admin/cache` y `DELETE /admin/cache`: Consultan y vacían la caché de recomendaciones.
+- `GET /admin/singleflight`: Devuelve cuántas llamadas a Gemini se han ahorrado agrupando peticiones idénticas.
+- `GET /admin/context-cache`: Devuelve las métricas de la caché de contexto del proveedor.
+- `GET /admin/circuit-breaker`: Devuelve el estado del circuit breaker de Gemini.
+- `GET /admin/hedging`: Devuelve las llamadas extra a Gemini lanzadas para recortar la cola de latencia.
+- `GET /admin/scheduler`: Devuelve el estado del planificador de llamadas a Gemini (cuota, cola por fase y concurrencia).
+- `POST /admin/cache/compact`: Compacta la caché persistente en SQLite (si está activada con `DRAFT_CACHE_DB`).
+- `GET /admin/meta` y `POST /admin/meta/reload`: Consultan la versión del meta activa y fuerzan su recarga.
+- `GET /admin/seasons`: Devuelve las temporadas disponibles y las que están cargadas en memoria.
+- `GET /admin/traces/{trace_id}`: Devuelve los spans de una traza (etapas del draft con su duración y atributos).
+- `GET /metrics`: Métricas en formato Prometheus (latencia de cada etapa del draft, caché, IA y threadpool).
+
+Todas las respuestas llevan la cabecera `X-Meta-Version` con la versión del meta usada y `X-Trace-Id` con
+el identificador de su traza (que continúa la de la cabecera `traceparent` si el cliente la envía).
 
 Requiere una clave API de Gemini para funcionar correctamente.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
+# Cargar `.env` antes que los módulos de la API, que leen su configuración del entorno al importarse
+from app.utils.config import load_env_file
+load_env_file()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.draft_routes import router as draft_router
-from app.utils.config import load_data, load_maps
+from app.routes.admin_routes import router as admin_router
+from app.routes.metrics_routes import router as metrics_router
+from app.services.cache_service import RecommendationCache
+from app.services.singleflight_service import SingleFlight
+from app.services.circuit_breaker_service import CircuitBreaker
+from app.services.context_cache_service import create_context_cache_manager
+from app.services.persistent_cache_service import SQLiteRecommendationCache, DEFAULT_CACHE_DB
+from app.services.meta_service import load_meta_snapshot, MetaReloader, MetaSnapshotMiddleware, SeasonRegistry, DEFAULT_SEASON
+from app.services.llm_service import create_llm_backend
+from app.services.hedging_service import create_hedged_caller
+from app.services.scheduler_service import QuotaScheduler
+from app.services.log_service import create_draft_logger
+from app.services.tracing_service import Tracer, TracingMiddleware, create_span_exporter
+
+# Carpeta con una subcarpeta por temporada y carpeta de la temporada activa (`META_SEASON`)
+META_ROOT = "data/meta"
+META_FOLDER = f"{META_ROOT}/{DEFAULT_SEASON}"
+
+# Carpeta de los prompts
+PROMPTS_FOLDER = "data/prompts"
+
+# Cargar los datos al iniciar la API: brawlers, mapas, registro con bitsets, motor de puntuación,
+# búsqueda con anticipación y plantillas de los prompts (si falta algún fichero, la API no arranca).
+# Si hay una instantánea compilada al día (`scripts/compile_meta.py`), se carga en lugar de los ficheros de texto
+meta = load_meta_snapshot(META_FOLDER, PROMPTS_FOLDER)
 
-# Cargar los datos al iniciar la API (solo una vez)
-brawlers = load_data("data/meta/mar2025/meta.txt", "data/meta/mar2025/categories.txt", "data/meta/mar2025/tier.txt")
-maps = load_maps("data/meta/mar2025/maps.txt", brawlers)
+def log_warmup_failure(task):
+    """
+    Anota en el registro estructurado (`llm_warmup_failed`) el error de la precarga del cliente de la IA.
+    El error no impide arrancar: la primera llamada vuelve a intentar crear el cliente.
+    """
+    if task.cancelled() or task.exception() is None:
+        return
+    error = task.exception()
+    if app.state.draft_logger is not None:
+        app.state.draft_logger.log("llm_warmup_failed", backend=type(app.state.llm_backend).__name__, error=f"{type(error).__name__}: {error}")
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Ciclo de vida de la API: crea el cliente de la IA en segundo plano (la API ya atiende peticiones
+    mientras tanto), vigila los ficheros del meta mientras está en marcha y, al apagarse, cierra las
+    conexiones con la IA y escribe en disco la caché persistente, los registros y los spans pendientes.
+    """
+    warmup = asyncio.create_task(app.state.llm_backend.load())
+    warmup.add_done_callback(log_warmup_failure)
+    reloader = app.state.meta_reloader
+    watcher = asyncio.create_task(reloader.run()) if reloader.interval > 0 else None
+    yield
+    warmup.cancel()
+    if watcher is not None:
+        watcher.cancel()
+    await app.state.llm_backend.close()
+    # Los cierres escriben en disco y pueden esperar a su hilo de fondo: van en un hilo para no bloquear el event loop
+    if app.state.persistent_cache is not None:
+        await asyncio.to_thread(app.state.persistent_cache.close)
+    if app.state.draft_logger is not None:
+        await asyncio.to_thread(app.state.draft_logger.close)
+    await asyncio.to_thread(app.state.tracer.close)
 
 # Inicializar la aplicación FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configuración de CORS
 app.add_middleware(
@@ -32,12 +112,59 @@ app.add_middleware(
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Meta-Version", "X-Trace-Id"]
+)
+
+# Fijar la instantánea del meta de cada petición y devolver su versión en `X-Meta-Version`
+app.add_middleware(MetaSnapshotMiddleware)
+
+# Abrir la traza de cada petición (continuando `traceparent`) y devolver su identificador en `X-Trace-Id`
+app.add_middleware(TracingMiddleware)
+
+# Instantánea activa de los datos del meta; se sustituye entera al recargar
+app.state.meta = meta
+
+# Resto de temporadas de `data/meta`, cargadas solo cuando una petición las pide (`season`)
+app.state.seasons = SeasonRegistry(app.state, META_ROOT, DEFAULT_SEASON, PROMPTS_FOLDER)
+
+# Caché en memoria de las recomendaciones de Gemini (tamaño y TTL configurables por entorno)
+app.state.draft_cache = RecommendationCache()
+
+# Caché persistente opcional en SQLite, versionada con el contenido del meta y de los prompts
+app.state.persistent_cache = (
+    SQLiteRecommendationCache(DEFAULT_CACHE_DB, meta.version) if DEFAULT_CACHE_DB else None
 )
 
-# Almacenar `brawlers` y `maps` en `app.state` para que estén disponibles globalmente
-app.state.brawlers = brawlers
-app.state.maps = maps
+# Agrupación de peticiones idénticas en curso (una sola llamada a Gemini por draft)
+app.state.draft_singleflight = SingleFlight()
+
+# Backend de la IA compartido por todas las peticiones (`LLM_BACKEND`: Gemini con pool de conexiones o stub local)
+app.state.llm_backend = create_llm_backend()
+
+# Llamada extra a la IA cuando la primera supera el percentil de latencia reciente (`LLM_HEDGE`, desactivada por defecto)
+app.state.llm_hedger = create_hedged_caller()
+
+# Planificador de las llamadas a la IA: cuota de RPM y TPM (`LLM_RPM`, `LLM_TPM`), prioridad por fase y
+# concurrencia adaptativa; si una llamada no puede salir a tiempo, la petición recibe un 429
+app.state.llm_scheduler = QuotaScheduler()
+
+# Caché de contexto del proveedor para el prefijo estático de cada (mapa, fase) (`GEMINI_CONTEXT_CACHE`)
+app.state.context_cache = create_context_cache_manager(llm_backend=app.state.llm_backend)
+
+# Circuit breaker alrededor de Gemini (si se abre, se responde con la recomendación local)
+app.state.circuit_breaker = CircuitBreaker()
+
+# Registro estructurado de los drafts (líneas JSON escritas por un hilo de fondo, `DRAFT_LOG`)
+app.state.draft_logger = create_draft_logger()
+
+# Trazas por petición con un span por etapa del draft (`TRACE_EXPORTER`: memoria, fichero JSON u `off`)
+app.state.tracer = Tracer(create_span_exporter())
+
+# Recarga en caliente del meta al cambiar los ficheros (`META_RELOAD_INTERVAL`, 0 la desactiva)
+app.state.meta_reloader = MetaReloader(app.state, META_FOLDER, PROMPTS_FOLDER)
 
 # Registrar las rutas de la API
 app.include_router(draft_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
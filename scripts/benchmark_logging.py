@@ -0,0 +1,85 @@
+"""
+Benchmark del registro de cada petición: tablas de `rich` en el hilo de la petición frente al registro
+estructurado en cola (`DraftLogger`).
+
+Simula lo que hace cada petición a `/draft` en un servidor sin terminal (la salida va a `os.devnull`):
+- Antes: `print_draft_summary` y `print_json` construyen las tablas de `rich` y las escriben en stdout.
+- Ahora: dos llamadas a `DraftLogger.log`, que solo encolan; el hilo de fondo escribe las líneas JSON.
+
+Mide el tiempo por petición con un solo hilo y el tiempo total con varios hilos a la vez (donde las
+escrituras en stdout compiten por el mismo lock), y comprueba que se escriben todos los registros.
+
+Uso:
+    python scripts/benchmark_logging.py [peticiones] [hilos]
+"""
+
+import sys
+import os
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Obtener la ruta del directorio raíz del proyecto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.draft_service import print_draft_summary, print_json
+from app.services.log_service import DraftLogger, JsonLinesSink
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+selected_map, phase, team = "Center Stage", 4, "blue"
+banned_brawlers = ["Hank", "Penny", "Sandy", "Cordelius", "Juju", "Ollie"]
+picks = ["Bea", "Frank", "Mr. P", "Griff", "Barley"]
+response = {"gemini_suggestions": [
+    {"brawlers": name, "probability": probability, "explanationUSA": "Strong pick into the enemy team composition.", "explanationESP": "Buena elección contra la composición rival."}
+    for name, probability in (("Poco", 40), ("Buster", 25), ("Berry", 15), ("Gale", 12), ("Kit", 8))
+]}
+
+
+def rich_request():
+    """Registro de una petición con las tablas de `rich` (como hacía la API)."""
+    print_draft_summary(selected_map, phase, team, banned_brawlers, picks)
+    print_json(response)
+
+
+def make_logged_request(logger):
+    """Devuelve el registro de una petición con el `DraftLogger` (como hace ahora la API)."""
+    def logged_request():
+        logger.log("draft_summary", season="mar2025", map=selected_map, phase=phase, team=team, banned_brawlers=banned_brawlers, picks=picks)
+        logger.log("draft_suggestions", season="mar2025", map=selected_map, phase=phase, fallback=False, suggestions=response["gemini_suggestions"])
+    return logged_request
+
+
+def run(request, count, workers):
+    """Ejecuta `count` peticiones repartidas en `workers` hilos y devuelve los segundos que tardan."""
+    start = time.perf_counter()
+    if workers == 1:
+        for _ in range(count):
+            request()
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            for _ in executor.map(lambda _: request(), range(count)):
+                pass
+    return time.perf_counter() - start
+
+
+results = []
+with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+    for workers in (1, threads):
+        rich_seconds = run(rich_request, requests, workers)
+
+        logger = DraftLogger(JsonLinesSink(os.devnull), max_queue=4 * requests)
+        logged_seconds = run(make_logged_request(logger), requests, workers)
+        drain_start = time.perf_counter()
+        logger.close()
+        drain_seconds = time.perf_counter() - drain_start
+        stats = logger.stats()
+        assert stats["written"] == stats["logged"] == 2 * requests and stats["dropped"] == 0, stats
+
+        results.append((workers, rich_seconds, logged_seconds, drain_seconds))
+
+print(f"{requests} requests, output to {os.devnull}\n")
+print(f"{'Threads':<9}{'rich (µs/req)':>15}{'queued (µs/req)':>17}{'Speedup':>10}{'Background drain (ms)':>23}")
+for workers, rich_seconds, logged_seconds, drain_seconds in results:
+    print(f"{workers:<9}{rich_seconds / requests * 1e6:>15.1f}{logged_seconds / requests * 1e6:>17.1f}{rich_seconds / logged_seconds:>9.1f}x{drain_seconds * 1e3:>23.1f}")
@@ -0,0 +1,92 @@
+"""
+Benchmark del parser precompilado de la respuesta de Gemini frente al parser anterior.
+
+Usa el corpus `scripts/parser_corpus.json`, con las formas de respuesta que devuelve el modelo
+(numeradas, con negritas, con prefijo duplicado, con texto antes y después, etc.) y las sugerencias
+esperadas de cada una.
+
+- Comprueba que el parser nuevo devuelve las sugerencias esperadas, tanto con la respuesta completa
+  como recibiéndola en fragmentos de tamaño aleatorio (`SuggestionStreamParser`).
+- Indica en cuántos casos acierta el parser anterior.
+- Mide el tiempo de ambos parsers sobre todo el corpus.
+
+Uso:
+    python scripts/benchmark_parser.py [iteraciones]
+"""
+
+import sys
+import os
+import re
+import json
+import random
+import timeit
+
+# Obtener la ruta del directorio raíz del proyecto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.parser import parse_suggestions, SuggestionStreamParser
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+with open(os.path.join(os.path.dirname(__file__), "parser_corpus.json"), "r", encoding="utf-8") as file:
+    corpus = json.load(file)
+
+
+def legacy_parse(response_text):
+    """Parser anterior: `re.match` sin compilar por línea y una regex nueva por sugerencia."""
+    suggestions = []
+    for line in response_text.strip().split("\n"):
+        match = re.match(r"(\d+\.)?\s*(.*?)\s*\|\s*(\d+)%\s*\|\s*(.*?)\s*\|\s*(.*)", line)
+        if match:
+            brawlers = match.group(2).strip().replace("**", "").strip()
+            probability = int(match.group(3))
+            explanation_usa = match.group(4).strip().replace("**", "").strip()
+            explanation_esp = match.group(5).strip().replace("**", "").strip()
+            duplicate_pattern = rf"^\s*{re.escape(brawlers)}\s*\|\s*{probability}%\s*\|"
+            explanation_esp = re.sub(duplicate_pattern, "", explanation_esp).strip()
+            suggestions.append({
+                "brawlers": brawlers,
+                "probability": probability,
+                "explanationUSA": explanation_usa,
+                "explanationESP": explanation_esp
+            })
+    return suggestions
+
+
+def stream_parse(text, rng):
+    """Parsea `text` recibiéndolo en fragmentos de tamaño aleatorio."""
+    parser = SuggestionStreamParser()
+    suggestions = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 24)
+        suggestions.extend(parser.feed(text[position:position + size]))
+        position += size
+    suggestions.extend(parser.close())
+    return suggestions
+
+
+# Comprobar el parser nuevo y la robustez de ambos sobre el corpus
+rng = random.Random(0)
+legacy_ok = 0
+print(f"{'Case':<26}{'Expected':>10}{'New':>6}{'Legacy':>8}")
+for case in corpus:
+    new = parse_suggestions(case["response"])
+    legacy = legacy_parse(case["response"])
+    assert new == case["expected"], f"{case['name']}: {new}"
+    for _ in range(20):
+        assert stream_parse(case["response"], rng) == case["expected"], f"{case['name']} (stream)"
+    legacy_ok += legacy == case["expected"]
+    print(f"{case['name']:<26}{len(case['expected']):>10}{'ok':>6}{'ok' if legacy == case['expected'] else 'FAIL':>8}")
+
+print(f"\nNew parser: {len(corpus)}/{len(corpus)} cases, legacy parser: {legacy_ok}/{len(corpus)} cases\n")
+
+# Medir el tiempo sobre todo el corpus
+responses = [case["response"] for case in corpus]
+legacy_time = min(timeit.repeat(lambda: [legacy_parse(text) for text in responses], number=iterations, repeat=3))
+new_time = min(timeit.repeat(lambda: [parse_suggestions(text) for text in responses], number=iterations, repeat=3))
+
+print(f"{'Parser':<10}{'µs / corpus':>14}")
+print(f"{'Legacy':<10}{legacy_time / iterations * 1e6:>14.1f}")
+print(f"{'New':<10}{new_time / iterations * 1e6:>14.1f}")
+print(f"\nSpeedup: {legacy_time / new_time:.2f}x")
@@ -0,0 +1,68 @@
+"""
+Benchmark del registro de brawlers con bitsets frente a los objetos `Brawler` y las listas.
+
+Compara, para un draft de fase 4 en la temporada activa:
+- Filtrado de brawlers disponibles (sin bans ni picks).
+- Consulta de counters de los picks enemigos excluyendo bans y picks.
+- Construcción de la clave de caché del draft.
+
+Uso:
+    python scripts/benchmark_registry.py [iteraciones]
+"""
+
+import sys
+import os
+import timeit
+
+# Obtener la ruta del directorio raíz del proyecto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.config import load_data, load_maps
+from app.models.registry import BrawlerRegistry
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+brawlers = load_data("data/meta/mar2025/meta.txt", "data/meta/mar2025/categories.txt", "data/meta/mar2025/tier.txt")
+maps = load_maps("data/meta/mar2025/maps.txt", brawlers)
+registry = BrawlerRegistry(brawlers, maps)
+
+selected_map = next(iter(maps))
+banned_brawlers = ["Hank", "Penny", "Sandy", "Cordelius", "Juju", "Ollie"]
+picks = ["Bea", "Frank", "Mr. P", "Griff", "Barley"]
+enemy_picks = [picks[0], picks[3], picks[4]]
+
+
+def objects_available():
+    return [name for name in brawlers if name not in banned_brawlers and name not in picks]
+
+def bitset_available():
+    return registry.available_mask(registry.mask(banned_brawlers), registry.mask(picks))
+
+def objects_counters():
+    return [[counter.name for counter in brawlers[pick].counters if counter.name not in banned_brawlers and counter.name not in enemy_picks] for pick in enemy_picks]
+
+def bitset_counters():
+    excluded = registry.mask(banned_brawlers) | registry.mask(enemy_picks)
+    return [registry.countered_by_mask(pick) & ~excluded for pick in enemy_picks]
+
+def objects_key():
+    return (selected_map, 4, tuple(sorted(set(banned_brawlers))), tuple(picks))
+
+def bitset_key():
+    return registry.draft_key(selected_map, 4, banned_brawlers, picks)
+
+
+# Comprobar que ambas implementaciones dan el mismo resultado
+assert sorted(objects_available()) == sorted(registry.names_of(bitset_available()))
+assert [sorted(names) for names in objects_counters()] == [sorted(registry.names_of(mask)) for mask in bitset_counters()]
+
+print(f"{len(brawlers)} brawlers, {len(maps)} maps, {iterations} iterations\n")
+print(f"{'Operation':<22}{'Objects (µs)':>14}{'Bitsets (µs)':>14}{'Speedup':>10}")
+for label, objects_func, bitset_func in (
+    ("Available brawlers", objects_available, bitset_available),
+    ("Enemy counters", objects_counters, bitset_counters),
+    ("Draft cache key", objects_key, bitset_key),
+):
+    objects_time = timeit.timeit(objects_func, number=iterations) / iterations * 1e6
+    bitset_time = timeit.timeit(bitset_func, number=iterations) / iterations * 1e6
+    print(f"{label:<22}{objects_time:>14.2f}{bitset_time:>14.2f}{objects_time / bitset_time:>9.1f}x")
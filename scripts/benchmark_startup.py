@@ -0,0 +1,73 @@
+"""
+Benchmark del arranque: carga de la temporada desde los ficheros de texto frente a la instantánea compilada.
+
+Compila la temporada en una carpeta temporal, comprueba que las dos cargas producen los mismos datos
+(brawlers, counters, mapas y prefijos del prompt) y mide:
+- La carga en un proceso nuevo (lo que paga la API en cada arranque en frío), sin contar los imports.
+- La carga repetida en el mismo proceso.
+
+Uso:
+    python scripts/benchmark_startup.py [temporada] [procesos]
+"""
+
+import sys
+import os
+import json
+import tempfile
+import statistics
+import subprocess
+import timeit
+
+# Obtener la ruta del directorio raíz del proyecto
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from app.services.meta_service import load_meta_snapshot, compile_meta_snapshot, DEFAULT_SEASON
+
+season = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SEASON
+processes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+meta_folder = os.path.join(ROOT, "data", "meta", season)
+fallback_folder = os.path.join(ROOT, "data", "meta", DEFAULT_SEASON)
+prompts_folder = os.path.join(ROOT, "data", "prompts")
+
+# Código que mide, en un proceso nuevo, solo la primera carga (los imports quedan fuera)
+COLD_LOAD = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+from app.services.meta_service import load_meta_snapshot
+start = time.perf_counter()
+snapshot = load_meta_snapshot({meta!r}, {prompts!r}, {fallback!r}, snapshot_dir={snapshot_dir!r})
+print(json.dumps({{"seconds": time.perf_counter() - start, "source": snapshot.source}}))
+"""
+
+
+def cold_load(snapshot_dir):
+    """Devuelve la mediana (ms) de la primera carga en `processes` procesos nuevos y el origen de los datos."""
+    code = COLD_LOAD.format(root=ROOT, meta=meta_folder, prompts=prompts_folder, fallback=fallback_folder, snapshot_dir=snapshot_dir)
+    results = [json.loads(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout) for _ in range(processes)]
+    return statistics.median(result["seconds"] for result in results) * 1e3, results[0]["source"]
+
+
+with tempfile.TemporaryDirectory() as snapshot_dir:
+    _, path, size = compile_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir)
+
+    # Comprobar que las dos cargas dan los mismos datos
+    text = load_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir=None)
+    compiled = load_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir)
+    assert (text.source, compiled.source) == ("text", "compiled")
+    assert [str(brawler) for brawler in text.brawlers.values()] == [str(brawler) for brawler in compiled.brawlers.values()]
+    assert [str(map_obj) for map_obj in text.maps.values()] == [str(map_obj) for map_obj in compiled.maps.values()]
+    assert dict(text.prompt_prefixes) == dict(compiled.prompt_prefixes)
+    assert text.registry.countered_by == compiled.registry.countered_by
+
+    print(f"Season {season}: {len(text.brawlers)} brawlers, {len(text.maps)} maps, snapshot {size} bytes\n")
+
+    warm_text = min(timeit.repeat(lambda: load_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir=None), number=20, repeat=5)) / 20 * 1e3
+    warm_compiled = min(timeit.repeat(lambda: load_meta_snapshot(meta_folder, prompts_folder, fallback_folder, snapshot_dir), number=20, repeat=5)) / 20 * 1e3
+    cold_text, _ = cold_load(None)
+    cold_compiled, source = cold_load(snapshot_dir)
+    assert source == "compiled"
+
+print(f"{'Load':<28}{'Text (ms)':>12}{'Compiled (ms)':>16}{'Speedup':>10}")
+print(f"{'Cold (new process, median)':<28}{cold_text:>12.2f}{cold_compiled:>16.2f}{cold_text / cold_compiled:>9.2f}x")
+print(f"{'Warm (same process, best)':<28}{warm_text:>12.2f}{warm_compiled:>16.2f}{warm_text / warm_compiled:>9.2f}x")
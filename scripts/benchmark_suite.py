@@ -0,0 +1,244 @@
+"""
+Suite de microbenchmarks del camino crítico del draft, con referencias en JSON y comparación.
+
+Mide, con el meta real (1x) y con metas sintéticos de 10x y 100x brawlers y mapas (`synthetic_meta.py`):
+- `load_data` y `load_maps`: carga de los ficheros de texto de la temporada.
+- `get_draft_summary` y `get_categories_summary`: resumen del draft y de las categorías (un draft por fase y equipo).
+- `generate_final_prompt`: prompt completo de todos los mapas x fases.
+- `generate_prompt_parts`: prompt dividido con los prefijos precalculados (el que usa la API), de todos los mapas x fases.
+- `parse_gemini_response`: parseo de todas las respuestas de `scripts/parser_corpus.json` (no depende de la escala).
+
+Cada resultado es el tiempo por llamada (mediana y mínimo de varias rondas) con la clave `<función>@<escala>x`.
+Las operaciones lentas (p. ej. la carga a 100x) se miden en una sola ronda.
+
+Uso:
+    python scripts/benchmark_suite.py run [salida.json] [escalas]
+    python scripts/benchmark_suite.py compare <referencia.json> [resultados.json] [umbral]
+
+Ejemplos:
+    python scripts/benchmark_suite.py run benchmarks/baseline.json          # Guardar la referencia
+    python scripts/benchmark_suite.py run benchmarks/latest.json 1,10       # Solo 1x y 10x
+    python scripts/benchmark_suite.py compare benchmarks/baseline.json      # Medir ahora y comparar
+    python scripts/benchmark_suite.py compare benchmarks/baseline.json benchmarks/latest.json 0.1
+
+`compare` usa el mínimo por llamada de cada benchmark (el menos afectado por el ruido de la máquina), marca
+como regresión todo lo que sea más lento que la referencia en más del umbral (0.2 = 20 % por defecto) y
+termina con código 1 si hay alguna. Las referencias solo son comparables en la misma máquina.
+"""
+
+import sys
+import os
+import gc
+import json
+import time
+import platform
+import statistics
+import subprocess
+import tempfile
+
+# Obtener la ruta del directorio raíz del proyecto
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.config import (
+    load_data, load_maps, get_draft_summary, get_categories_summary, generate_final_prompt,
+    generate_prompt_parts, get_static_prompt_prefixes
+)
+from app.utils.prompts import load_prompt_templates, PHASE_PROMPTS
+from app.services.gemini_service import parse_gemini_response
+from synthetic_meta import write_synthetic_meta
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "latest.json")
+DEFAULT_THRESHOLD = 0.2
+
+# Tiempo mínimo de medida por benchmark y rondas como máximo
+MIN_TIME = 0.5
+MAX_ROUNDS = 200
+
+PROMPTS_FOLDER = os.path.join(ROOT, "data", "prompts")
+PARSER_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_corpus.json")
+
+
+def measure(round_function, calls):
+    """
+    Ejecuta `round_function` (que hace `calls` llamadas) durante al menos `MIN_TIME` segundos, con el
+    recolector de basura desactivado.
+
+    Retorna:
+    - tuple: (tiempo por llamada en microsegundos, resultado de la última ronda).
+    """
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        total = 0.0
+        while len(times) < MAX_ROUNDS:
+            start = time.perf_counter()
+            result = round_function()
+            elapsed = time.perf_counter() - start
+            times.append(elapsed)
+            total += elapsed
+            # Las rondas lentas se miden una sola vez; el resto, al menos 5 veces
+            if elapsed >= MIN_TIME or (total >= MIN_TIME and len(times) >= 5):
+                break
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        "median_us": statistics.median(times) / calls * 1e6,
+        "min_us": min(times) / calls * 1e6,
+        "calls": calls,
+        "rounds": len(times),
+    }, result
+
+
+def print_result(key, result):
+    print(f"{key:<34}{result['median_us']:>14.1f}{result['min_us']:>14.1f}{result['rounds']:>8}", flush=True)
+
+
+def sample_drafts(brawlers):
+    """Drafts deterministas de cada fase y equipo con los brawlers reales (los de la copia 0)."""
+    names = list(brawlers)
+    bans = names[:6]
+    picks = names[10:15]
+    drafts = []
+    for team in ("blue", "red"):
+        drafts.append((1, team, bans, []))
+        drafts.append((2, team, bans, picks[:1]))
+        drafts.append((3, team, bans, picks[:3]))
+        drafts.append((4, team, bans, picks[:5]))
+    return drafts
+
+
+def run_scale(scale, folder, templates, results):
+    """Mide los benchmarks que dependen del meta con el meta de `folder` (escala `scale`)."""
+    meta_file, categories_file, tier_file, maps_file = (os.path.join(folder, name) for name in ("meta.txt", "categories.txt", "tier.txt", "maps.txt"))
+
+    def record(name, round_function, calls):
+        key = f"{name}@{scale}x"
+        results[key], result = measure(round_function, calls)
+        print_result(key, results[key])
+        return result
+
+    # Los datos cargados en la última ronda se usan en el resto de benchmarks
+    brawlers = record("load_data", lambda: load_data(meta_file, categories_file, tier_file), 1)
+    maps = record("load_maps", lambda: load_maps(maps_file, brawlers), 1)
+
+    drafts = sample_drafts(brawlers)
+    record("get_draft_summary", lambda: [get_draft_summary(phase, team, bans, picks, brawlers) for phase, team, bans, picks in drafts], len(drafts))
+    record("get_categories_summary", lambda: [get_categories_summary(brawlers, bans) for _, _, bans, _ in drafts], len(drafts))
+
+    # Todos los mapas x fases, con el draft de esa fase
+    draft_by_phase = {phase: (team, bans, picks) for phase, team, bans, picks in drafts if team == "blue"}
+    cases = [(phase, map_name) + draft_by_phase[phase] for map_name in maps for phase in PHASE_PROMPTS]
+    record("generate_final_prompt", lambda: [
+        generate_final_prompt(phase, map_name, maps, brawlers, bans, team, picks, templates)
+        for phase, map_name, team, bans, picks in cases
+    ], len(cases))
+
+    prefixes = get_static_prompt_prefixes(maps, brawlers, templates)
+    record("generate_prompt_parts", lambda: [
+        generate_prompt_parts(phase, map_name, maps, brawlers, bans, team, picks, templates, "benchmark", prefixes)
+        for phase, map_name, team, bans, picks in cases
+    ], len(cases))
+
+    results[f"meta@{scale}x"] = {"brawlers": len(brawlers), "maps": len(maps)}
+
+
+def git_commit():
+    """Devuelve el commit actual del repositorio, o None si no se puede obtener."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scales=DEFAULT_SCALES):
+    """Ejecuta toda la suite y devuelve el documento JSON con los resultados."""
+    templates = load_prompt_templates(PROMPTS_FOLDER)
+    results = {}
+
+    print(f"{'Benchmark':<34}{'Median (µs)':>14}{'Min (µs)':>14}{'Rounds':>8}")
+    with open(PARSER_CORPUS, "r", encoding="utf-8") as file:
+        responses = [case["response"] for case in json.load(file)]
+    results["parse_gemini_response"], _ = measure(lambda: [parse_gemini_response(text) for text in responses], len(responses))
+    print_result("parse_gemini_response", results["parse_gemini_response"])
+
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        for scale in scales:
+            folder = os.path.join(temporary_folder, f"{scale}x")
+            write_synthetic_meta(scale, folder)
+            run_scale(scale, folder, templates, results)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scales": list(scales),
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Imprime la comparación de `current` con `baseline` y devuelve el número de regresiones (benchmarks
+    más lentos que la referencia en más de `threshold`).
+    """
+    print(f"Baseline: {baseline.get('commit')} ({baseline.get('created_at')}), current: {current.get('commit')} ({current.get('created_at')})\n")
+    print(f"{'Benchmark (min)':<34}{'Baseline (µs)':>15}{'Current (µs)':>15}{'Change':>9}")
+
+    regressions = 0
+    for key, base in baseline["results"].items():
+        result = current["results"].get(key)
+        if "min_us" not in base or result is None:
+            continue
+        change = result["min_us"] / base["min_us"] - 1
+        status = ""
+        if change > threshold:
+            status = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            status = "  improved"
+        print(f"{key:<34}{base['min_us']:>15.1f}{result['min_us']:>15.1f}{change:>+9.1%}{status}")
+
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def save(document, path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2)
+    print(f"\nResults written to {path}")
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if command == "run":
+        output = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_OUTPUT
+        scales = tuple(int(scale) for scale in sys.argv[3].split(",")) if len(sys.argv) > 3 else DEFAULT_SCALES
+        save(run_suite(scales), output)
+
+    elif command == "compare" and len(sys.argv) > 2:
+        baseline = load(sys.argv[2])
+        current = load(sys.argv[3]) if len(sys.argv) > 3 else run_suite(tuple(baseline["scales"]))
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_THRESHOLD
+        if len(sys.argv) <= 3:
+            print()
+        sys.exit(1 if compare(baseline, current, threshold) else 0)
+
+    else:
+        print(__doc__)
+        sys.exit(1)
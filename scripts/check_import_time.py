@@ -0,0 +1,83 @@
+"""
+Comprueba el tiempo de importación de la API con `python -X importtime`.
+
+Importa `main` (lo mismo que hace uvicorn al arrancar, incluida la carga del meta) en un proceso nuevo y
+falla (código de salida 1) si:
+- El tiempo total supera el presupuesto (`IMPORT_TIME_BUDGET_MS` o el primer argumento, en milisegundos).
+- Se importa alguno de los módulos que deben cargarse solo en el primer uso (`LAZY_MODULES`).
+
+Se toma el mejor de varios procesos para no depender del ruido de la máquina, y se muestran los imports
+directos de `main` más lentos.
+
+Uso:
+    python scripts/check_import_time.py [presupuesto_ms] [procesos]
+"""
+
+import sys
+import os
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else float(os.getenv("IMPORT_TIME_BUDGET_MS", "900"))
+processes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+# Módulos que no deben formar parte del arranque de la API
+LAZY_MODULES = ["google.genai", "rich", "termcolor"]
+if not os.path.isfile(os.path.join(ROOT, ".env")):
+    # Con fichero `.env`, `python-dotenv` se importa al arrancar para cargarlo
+    LAZY_MODULES.append("dotenv")
+
+
+def import_times():
+    """
+    Importa `main` en un proceso nuevo con `-X importtime`.
+
+    Retorna:
+    - list: (profundidad, nombre, tiempo acumulado en ms) de cada módulo importado por `main`, en orden
+      (el último es el propio `main`).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(1)
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # Cabecera
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        if depth == 0 and name.strip() != "main":
+            # Import del arranque del intérprete (`site`, etc.): no forma parte de `main`
+            modules = []
+            continue
+        modules.append((depth, name.strip(), int(cumulative) / 1000))
+    return modules
+
+
+runs = [import_times() for _ in range(processes)]
+best = min(runs, key=lambda modules: modules[-1][2])
+total_ms = best[-1][2]
+imported = {name for _, name, _ in best}
+
+print(f"Import time of main: {total_ms:.1f} ms (best of {processes}), budget {budget_ms:.0f} ms\n")
+print(f"{'Direct import':<50}{'Cumulative (ms)':>16}")
+direct = sorted(((name, ms) for depth, name, ms in best if depth == 1), key=lambda item: item[1], reverse=True)
+for name, ms in direct[:10]:
+    print(f"{name:<50}{ms:>16.1f}")
+
+failed = False
+eager = [name for name in LAZY_MODULES if name in imported]
+if eager:
+    print(f"\nFAIL: imported at startup but should be lazy: {', '.join(eager)}")
+    failed = True
+if total_ms > budget_ms:
+    print(f"\nFAIL: import time {total_ms:.1f} ms exceeds the budget of {budget_ms:.0f} ms")
+    failed = True
+
+if failed:
+    sys.exit(1)
+print("\nOK")
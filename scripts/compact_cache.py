@@ -0,0 +1,34 @@
+"""
+Script para compactar la caché persistente (SQLite) de recomendaciones.
+
+Borra las entradas de versiones antiguas del meta o de los prompts, aplica la expulsión por tamaño
+y ejecuta `VACUUM` para recuperar espacio en disco.
+
+Uso:
+    python scripts/compact_cache.py [ruta_db] [carpeta_meta]
+"""
+
+import sys
+import os
+
+# Obtener la ruta del directorio raíz del proyecto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.persistent_cache_service import SQLiteRecommendationCache, compute_meta_version, DEFAULT_CACHE_DB
+
+db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE_DB
+meta_folder = sys.argv[2] if len(sys.argv) > 2 else "data/meta/mar2025"
+
+if not db_path:
+    print("No cache database given: pass a path or set DRAFT_CACHE_DB.")
+    sys.exit(1)
+
+if not os.path.exists(db_path):
+    print(f"Cache database not found: {db_path}")
+    sys.exit(1)
+
+cache = SQLiteRecommendationCache(db_path, compute_meta_version(meta_folder))
+result = cache.compact()
+cache.close()
+
+print(f"Removed {result['stale_removed']} stale entries, {result['remaining']} remaining.")
@@ -0,0 +1,40 @@
+"""
+Script para compilar las temporadas del meta en instantáneas binarias.
+
+Parsea una vez los ficheros de texto de cada temporada (`data/meta/<temporada>`) y guarda el resultado
+ya resuelto (counters, picks de los mapas, plantillas y prefijos del prompt) en
+`META_SNAPSHOT_DIR/<temporada>.snapshot`. Al arrancar, la API carga esa instantánea directamente en lugar
+de los ficheros de texto, salvo que estos hayan cambiado desde la compilación.
+
+Conviene ejecutarlo en el despliegue, después de actualizar los ficheros del meta o de los prompts.
+
+Uso:
+    python scripts/compile_meta.py [temporada ...]
+"""
+
+import sys
+import os
+
+# Obtener la ruta del directorio raíz del proyecto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.meta_service import compile_meta_snapshot, discover_seasons, DEFAULT_SEASON, DEFAULT_SNAPSHOT_DIR
+
+META_ROOT = "data/meta"
+PROMPTS_FOLDER = "data/prompts"
+
+if not DEFAULT_SNAPSHOT_DIR:
+    print("Compiled snapshots are disabled: set META_SNAPSHOT_DIR to a folder.")
+    sys.exit(1)
+
+seasons = discover_seasons(META_ROOT)
+selected = sys.argv[1:] or list(seasons)
+
+unknown = [season for season in selected if season not in seasons]
+if unknown:
+    print(f"Unknown seasons: {', '.join(unknown)}. Available seasons: {', '.join(seasons)}")
+    sys.exit(1)
+
+for season in selected:
+    snapshot, path, size = compile_meta_snapshot(seasons[season], PROMPTS_FOLDER, seasons.get(DEFAULT_SEASON))
+    print(f"{season}: version {snapshot.version}, {len(snapshot.brawlers)} brawlers, {len(snapshot.maps)} maps -> {path} ({size} bytes)")
@@ -0,0 +1,167 @@
+"""
+Servidor local que imita la API REST de Gemini, para pruebas de carga sin gastar cuota.
+
+Atiende `POST /v1beta/models/<modelo>:generateContent` y `POST /v1beta/models/<modelo>:streamGenerateContent`
+(SSE) con el mismo formato JSON que Gemini, y simula:
+- Latencia con una distribución configurable: `fixed:<ms>`, `uniform:<min_ms>:<max_ms>` o
+  `lognormal:<mediana_ms>:<sigma>` (cola larga, como la de Gemini).
+- Errores con una probabilidad configurable y los códigos indicados (p. ej. 429 y 503).
+- Respuestas a partir de plantillas: cada plantilla es el texto de la respuesta con huecos `{b1}`, `{b2}`...
+  que se rellenan con brawlers de la lista "Available Brawlers" del prompt, así que la respuesta se parsea
+  como una real.
+
+En streaming, la respuesta se envía en varios fragmentos repartidos a lo largo de la latencia simulada.
+
+`GET /stats` devuelve las peticiones atendidas, los errores simulados y las peticiones en curso.
+
+Uso:
+    python scripts/fake_gemini_server.py [--port 8765] [--latency lognormal:800:0.5] [--error-rate 0.02]
+                                         [--error-status 429,503] [--templates plantillas.json] [--seed 0]
+"""
+
+import re
+import json
+import math
+import random
+import asyncio
+import argparse
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Plantillas por defecto: una respuesta numerada y otra con negritas, como las que devuelve el modelo
+DEFAULT_TEMPLATES = [
+    "1. {b1} | 45% | Strong pick for this map. | Muy buena opción para este mapa.\n"
+    "2. {b2} | 30% | Counters the enemy picks. | Contrarresta los picks enemigos.\n"
+    "3. {b3} | 25% | Safe flexible choice. | Opción segura y flexible.\n",
+    "**{b1}** | **50%** | Controls the lane. | Controla la línea.\n"
+    "**{b2} + {b3}** | **35%** | Good synergy. | Buena sinergia.\n"
+    "**{b4}** | **15%** | Situational pick. | Pick situacional.\n",
+]
+
+# Lista de brawlers disponibles del prompt ("Nombre (Tier), Nombre (Tier), ...")
+AVAILABLE_PATTERN = re.compile(r"Available Brawlers[^\n]*\n([^\n]*)")
+BRAWLER_PATTERN = re.compile(r"([^,()]+?) \([A-Z]\)")
+FALLBACK_BRAWLERS = ["Hank", "Ollie", "Lou", "Stu", "Bea", "Max"]
+
+
+def parse_latency(spec):
+    """Convierte `fixed:<ms>`, `uniform:<min>:<max>` o `lognormal:<mediana>:<sigma>` en una función que devuelve segundos."""
+    kind, *values = spec.split(":")
+    values = [float(value) for value in values]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0] / 1000)
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Invalid latency distribution: {spec}")
+
+
+def prompt_text(body):
+    """Devuelve todo el texto de las partes del cuerpo de la petición (contenido e instrucción de sistema)."""
+    texts = []
+    for content in body.get("contents", []):
+        texts.extend(part.get("text", "") for part in content.get("parts", []))
+    return "\n".join(texts)
+
+
+def render_response(template, prompt, rng):
+    """Rellena los huecos `{bN}` de la plantilla con brawlers disponibles del prompt, sin repetir."""
+    match = AVAILABLE_PATTERN.search(prompt)
+    names = BRAWLER_PATTERN.findall(match.group(1)) if match else []
+    names = [name.strip() for name in names] or FALLBACK_BRAWLERS
+    chosen = rng.sample(names, min(len(names), 9))
+    while len(chosen) < 9:
+        chosen.append(rng.choice(names))
+    return template.format(**{f"b{index + 1}": name for index, name in enumerate(chosen)})
+
+
+def candidate(text, finished=True):
+    """Cuerpo JSON de Gemini con un candidato de texto."""
+    data = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        data["finishReason"] = "STOP"
+    return {"candidates": [data]}
+
+
+def create_app(latency="lognormal:800:0.5", error_rate=0.0, error_statuses=(503,), templates=None, seed=None):
+    """Crea la aplicación del servidor falso con la configuración indicada."""
+    app = FastAPI()
+    rng = random.Random(seed)
+    sample_latency = parse_latency(latency)
+    templates = templates or DEFAULT_TEMPLATES
+    stats = {"requests": 0, "streams": 0, "errors": 0, "in_flight": 0}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate(model_action: str, request: Request):
+        _, _, action = model_action.partition(":")
+        if action not in ("generateContent", "streamGenerateContent"):
+            return JSONResponse({"error": {"code": 404, "message": f"Unknown action: {action}", "status": "NOT_FOUND"}}, status_code=404)
+
+        body = await request.json()
+        stats["requests"] += 1
+        delay = sample_latency(rng)
+
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            status = rng.choice(error_statuses)
+            # Los errores también tardan (menos que una respuesta completa)
+            await asyncio.sleep(delay / 4)
+            return JSONResponse({"error": {"code": status, "message": "Simulated error", "status": "UNAVAILABLE" if status != 429 else "RESOURCE_EXHAUSTED"}}, status_code=status)
+
+        text = render_response(rng.choice(templates), prompt_text(body), rng)
+
+        if action == "generateContent":
+            stats["in_flight"] += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                stats["in_flight"] -= 1
+            return candidate(text)
+
+        stats["streams"] += 1
+        lines = text.splitlines(keepends=True)
+
+        async def events():
+            stats["in_flight"] += 1
+            try:
+                # El primer fragmento llega a mitad de la latencia y el resto se reparte hasta el final
+                await asyncio.sleep(delay / 2)
+                for index, line in enumerate(lines):
+                    if index:
+                        await asyncio.sleep(delay / 2 / max(len(lines) - 1, 1))
+                    yield f"data: {json.dumps(candidate(line, index == len(lines) - 1))}\r\n\r\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Gemini stand-in for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:800:0.5", help="fixed:<ms>, uniform:<min_ms>:<max_ms> or lognormal:<median_ms>:<sigma>")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a simulated error (0-1)")
+    parser.add_argument("--error-status", default="503", help="Comma-separated HTTP statuses of simulated errors")
+    parser.add_argument("--templates", help="JSON file with a list of response templates ({b1}, {b2}... are replaced by brawlers)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    templates = None
+    if args.templates:
+        with open(args.templates, "r", encoding="utf-8") as file:
+            templates = json.load(file)
+
+    app = create_app(args.latency, args.error_rate, tuple(int(status) for status in args.error_status.split(",")), templates, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,279 @@
+"""
+Prueba de carga de `/draft` contra un servidor falso de Gemini, sin gastar cuota.
+
+Arranca el servidor falso (`fake_gemini_server.py`) con la latencia, la tasa de errores y las plantillas
+indicadas y, para cada combinación de workers de uvicorn y concurrencia del cliente, arranca la API
+conectada a él (`loadtest_app.py`), le envía tráfico a un ritmo fijo (RPS objetivo, en lazo abierto) y
+mide:
+- Throughput (respuestas por segundo).
+- Percentiles de latencia (p50, p90, p95, p99 y máximo), medidos desde el momento en que la petición
+  tenía que salir: si el cliente está saturado, la espera también cuenta.
+- Tasa de errores (códigos distintos de 200 y fallos de conexión) y de recomendaciones locales (`fallback`).
+
+El tráfico es sintético (drafts aleatorios válidos de la temporada activa) o se reproduce de un registro:
+un fichero de líneas JSON con peticiones `DraftRequest` o con los eventos `draft_summary` del registro de
+drafts de la API (`DRAFT_LOG_FILE`).
+
+Uso:
+    python scripts/load_test.py [--rps 50] [--duration 30] [--workers 1,2,4] [--concurrency 32,128]
+                                [--latency lognormal:800:0.5] [--error-rate 0.02] [--error-status 429,503]
+                                [--replay drafts.jsonl] [--stream] [--output report.json]
+
+Ejemplo (ver cómo escala la API con 1 y 4 workers a 100 RPS y Gemini con 1 s de mediana):
+    python scripts/load_test.py --rps 100 --duration 20 --workers 1,4 --latency lognormal:1000:0.6
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import signal
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+# Obtener la ruta del directorio raíz del proyecto
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from app.utils.config import load_data, load_maps
+from app.services.meta_service import DEFAULT_SEASON
+
+API_KEY = "load-test"
+PICKS_BY_PHASE = {1: 0, 2: 1, 3: 3, 4: 5}
+
+
+def synthetic_drafts(count, seed):
+    """Genera `count` drafts aleatorios válidos (mapa, fase, equipo, bans y picks) de la temporada activa."""
+    folder = os.path.join(ROOT, "data", "meta", DEFAULT_SEASON)
+    brawlers = load_data(f"{folder}/meta.txt", f"{folder}/categories.txt", f"{folder}/tier.txt")
+    maps = list(load_maps(f"{folder}/maps.txt", brawlers))
+    names = list(brawlers)
+    rng = random.Random(seed)
+
+    drafts = []
+    for _ in range(count):
+        phase = rng.randint(1, 4)
+        chosen = rng.sample(names, rng.randint(0, 6) + PICKS_BY_PHASE[phase])
+        drafts.append({
+            "phase": phase,
+            "selected_map": rng.choice(maps),
+            "banned_brawlers": chosen[PICKS_BY_PHASE[phase]:],
+            "team": rng.choice(("blue", "red")),
+            "picks": chosen[:PICKS_BY_PHASE[phase]],
+        })
+    return drafts
+
+
+def replay_drafts(path):
+    """Lee los drafts de un fichero de líneas JSON (peticiones `DraftRequest` o eventos `draft_summary`)."""
+    drafts = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("event", "draft_summary") != "draft_summary":
+                continue
+            draft = {
+                "phase": record["phase"],
+                "selected_map": record.get("selected_map", record.get("map")),
+                "banned_brawlers": record.get("banned_brawlers", []),
+                "team": record.get("team", "blue"),
+                "picks": record.get("picks", []),
+            }
+            if record.get("season"):
+                draft["season"] = record["season"]
+            drafts.append(draft)
+
+    if not drafts:
+        raise ValueError(f"No drafts found in {path}")
+    return drafts
+
+
+def start_process(args, env=None):
+    """Arranca un proceso hijo en la raíz del proyecto, en su propio grupo para poder pararlo entero."""
+    return subprocess.Popen(args, cwd=ROOT, env={**os.environ, **(env or {})}, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def stop_process(process):
+    """Para un proceso hijo y sus workers."""
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+def wait_ready(url, process, timeout=60.0):
+    """Espera a que `url` responda; falla si el proceso termina antes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode}: {process.stderr.read().decode()[-2000:]}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def percentile(sorted_values, fraction):
+    """Percentil (por el método del rango más cercano) de una lista ya ordenada."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def send(client, path, draft, stream):
+    """Envía un draft y devuelve (código de estado, si se respondió con la recomendación local)."""
+    if not stream:
+        response = await client.post(path, json=draft)
+        if response.status_code != 200:
+            return response.status_code, False
+        return 200, bool(response.json().get("gemini_response", {}).get("fallback"))
+
+    fallback = False
+    async with client.stream("POST", path, json=draft) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: ") and '"fallback": true' in line:
+                fallback = True
+        return response.status_code, fallback
+
+
+async def drive(base_url, drafts, rps, duration, concurrency, stream):
+    """
+    Envía drafts a `rps` peticiones por segundo durante `duration` segundos, con como mucho `concurrency`
+    peticiones a la vez. Las peticiones salen en su momento previsto aunque las anteriores no hayan terminado
+    (lazo abierto); si se alcanza `concurrency`, esperan y esa espera cuenta en la latencia.
+    """
+    path = "/draft/stream" if stream else "/draft"
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    total = int(rps * duration)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"x-api-key": API_KEY}, timeout=120.0, limits=limits) as client:
+        async def one(scheduled, draft):
+            async with semaphore:
+                try:
+                    status, fallback = await send(client, path, draft, stream)
+                except httpx.HTTPError as e:
+                    status, fallback = type(e).__name__, False
+            results.append((time.perf_counter() - scheduled, status, fallback))
+
+        start = time.perf_counter()
+        tasks = []
+        for index in range(total):
+            scheduled = start + index / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(scheduled, drafts[index % len(drafts)])))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, status, _ in results if status == 200)
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = len(results) - statuses.get("200", 0)
+
+    return {
+        "requests": len(results),
+        "elapsed_s": elapsed,
+        "throughput_rps": statuses.get("200", 0) / elapsed,
+        "error_rate": errors / len(results) if results else 0.0,
+        "fallback_rate": sum(1 for _, status, fallback in results if status == 200 and fallback) / len(results) if results else 0.0,
+        "statuses": statuses,
+        "latency_ms": {
+            name: (percentile(latencies, fraction) * 1000 if latencies else None)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        },
+    }
+
+
+def run_configuration(args, drafts, workers, concurrency):
+    """Arranca la API con `workers` workers, le envía el tráfico y la para."""
+    app = start_process(
+        [sys.executable, "-m", "uvicorn", "scripts.loadtest_app:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        {
+            "BRAWLGPT_API_KEY": API_KEY,
+            "FAKE_GEMINI_URL": f"http://127.0.0.1:{args.fake_port}",
+            "DRAFT_LOG": "off",
+            "DRAFT_CACHE_DB": "",
+            "META_RELOAD_INTERVAL": "0",
+        }
+    )
+    try:
+        wait_ready(f"http://127.0.0.1:{args.app_port}/", app)
+        return asyncio.run(drive(f"http://127.0.0.1:{args.app_port}", drafts, args.rps, args.duration, concurrency, args.stream))
+    finally:
+        stop_process(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /draft against a local fake Gemini server.")
+    parser.add_argument("--rps", type=float, default=50, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic per configuration")
+    parser.add_argument("--workers", default="1", help="Comma-separated uvicorn worker counts to test")
+    parser.add_argument("--concurrency", default="64", help="Comma-separated client concurrency limits to test")
+    parser.add_argument("--replay", help="JSON-lines file with DraftRequest bodies or draft_summary log events")
+    parser.add_argument("--stream", action="store_true", help="Use POST /draft/stream instead of POST /draft")
+    parser.add_argument("--latency", default="lognormal:800:0.5", help="Fake Gemini latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake Gemini error probability")
+    parser.add_argument("--error-status", default="503", help="Comma-separated statuses of fake Gemini errors")
+    parser.add_argument("--templates", help="JSON file with fake Gemini response templates")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--app-port", type=int, default=8801)
+    parser.add_argument("--fake-port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    drafts = replay_drafts(args.replay) if args.replay else synthetic_drafts(max(1, int(args.rps * args.duration)), args.seed)
+
+    fake_command = [sys.executable, os.path.join("scripts", "fake_gemini_server.py"), "--port", str(args.fake_port),
+                    "--latency", args.latency, "--error-rate", str(args.error_rate), "--error-status", args.error_status, "--seed", str(args.seed)]
+    if args.templates:
+        fake_command += ["--templates", args.templates]
+    fake = start_process(fake_command)
+
+    report = {"rps": args.rps, "duration_s": args.duration, "latency": args.latency, "error_rate": args.error_rate,
+              "stream": args.stream, "traffic": args.replay or "synthetic", "runs": []}
+    try:
+        wait_ready(f"http://127.0.0.1:{args.fake_port}/stats", fake)
+
+        print(f"{len(drafts)} drafts ({report['traffic']}), {args.rps:g} RPS for {args.duration:g}s, fake Gemini latency {args.latency}, error rate {args.error_rate:g}\n")
+        print(f"{'Workers':>7}{'Conc.':>7}{'Reqs':>7}{'RPS':>8}{'Errors':>8}{'Fallback':>9}{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for workers in (int(value) for value in args.workers.split(",")):
+            for concurrency in (int(value) for value in args.concurrency.split(",")):
+                result = run_configuration(args, drafts, workers, concurrency)
+                report["runs"].append({"workers": workers, "concurrency": concurrency, **result})
+                latency = {name: (f"{value:.0f}" if value is not None else "-") for name, value in result["latency_ms"].items()}
+                print(f"{workers:>7}{concurrency:>7}{result['requests']:>7}{result['throughput_rps']:>8.1f}{result['error_rate']:>8.1%}{result['fallback_rate']:>9.1%}"
+                      f"{latency['p50']:>9}{latency['p90']:>9}{latency['p95']:>9}{latency['p99']:>9}{latency['max']:>9}", flush=True)
+                if result["error_rate"]:
+                    print(f"{'':>14}statuses: {result['statuses']}")
+
+        report["fake_gemini"] = httpx.get(f"http://127.0.0.1:{args.fake_port}/stats").json()
+    finally:
+        stop_process(fake)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+La API (`main.app`) conectada al servidor falso de Gemini (`fake_gemini_server.py`) en lugar de a Gemini.
+
+Apunta el backend de Gemini (`GEMINI_BASE_URL`) al servidor de `FAKE_GEMINI_URL` (por defecto
+`http://127.0.0.1:8765`) antes de importar la API, con una clave ficticia si no hay `GEMINI_API_KEY`. El resto
+de la API (cliente con pool de conexiones, caché, single-flight, circuit breaker, recomendación local...)
+funciona igual que en producción. Lo usa `scripts/load_test.py`, que lo arranca con uvicorn:
+
+    uvicorn scripts.loadtest_app:app --workers 4
+"""
+
+import os
+
+FAKE_GEMINI_URL = os.getenv("FAKE_GEMINI_URL", "http://127.0.0.1:8765")
+
+# La configuración se lee del entorno al importar los módulos de la API
+os.environ["LLM_BACKEND"] = "gemini"
+os.environ["GEMINI_BASE_URL"] = FAKE_GEMINI_URL
+os.environ.setdefault("GEMINI_API_KEY", "fake-gemini-key")
+os.environ.setdefault("GEMINI_POOL_SIZE", "1000")
+
+import main
+
+app = main.app
@@ -4,14 +4,16 @@ Este módulo importa funciones necesarias para la carga de datos, gestión de ma
 
 import sys
 import os
+import asyncio
 
 # Obtener la ruta del directorio raíz del proyecto
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.utils.config import load_data, load_maps, get_team, get_map, get_phase, clean_console, generate_final_prompt
+from app.utils.config import load_data, load_maps, generate_final_prompt
+from app.utils.console import get_team, get_map, get_phase, clean_console
 from app.services.draft_service import draft
 from app.services.gemini_service import call_gemini
-from app.services.draft_service import print_draft_summary
+from app.services.draft_service import print_draft_summary, print_json
 
 clean_console()
 
@@ -50,6 +52,9 @@ prompt = generate_final_prompt(phase, selected_map, maps, brawlers, banned_brawl
 print_draft_summary(phase, team, banned_brawlers, picks, brawlers)
 
 # Obtener respuesta de Gemini
-# Llama a `call_gemini()` que envía el prompt a la IA y recibe una respuesta con las mejores opciones, imprimiendola por pantalla.
-gemini_response = call_gemini(prompt)
+# Llama a `call_gemini()` que envía el prompt a la IA y recibe una respuesta con las mejores opciones.
+gemini_response = asyncio.run(call_gemini(prompt))
+
+# Imprimir las opciones de Gemini en una tabla
+print_json(gemini_response)
 
@@ -0,0 +1,111 @@
+"""
+Genera un meta sintético a escala (N veces los brawlers y los mapas de una temporada real).
+
+Cada brawler y cada mapa se copia N veces: la copia 0 conserva el nombre original y la copia k se llama
+"<nombre> <k>". Los counters, los picks de los mapas y los tiers de la copia k apuntan a brawlers de la
+misma copia, y las categorías incluyen todas las copias (así los counters por categoría también crecen).
+El resultado tiene los mismos cuatro ficheros que `data/meta/<temporada>`, con el mismo formato, así que
+se carga con las mismas funciones (`load_data`, `load_maps`, `load_meta_snapshot`...).
+
+Sirve para medir cómo escalan la carga, la construcción del prompt y la búsqueda cuando crezca el juego.
+
+Funciones:
+- write_synthetic_meta(scale, output_folder, source_folder): Escribe el meta a escala `scale` en `output_folder`.
+
+Uso:
+    python scripts/synthetic_meta.py <escala> <carpeta_destino> [carpeta_origen]
+"""
+
+import sys
+import os
+
+# Obtener la ruta del directorio raíz del proyecto
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from app.services.meta_service import DEFAULT_SEASON
+
+DEFAULT_SOURCE_FOLDER = os.path.join(ROOT, "data", "meta", DEFAULT_SEASON)
+
+# Campos de `maps.txt` con listas de brawlers
+MAP_PICK_FIELDS = ("- 1st Pick:", "- Last Pick:", "- Other Picks:")
+
+
+def _copy_name(name, copy):
+    """Nombre de la copia `copy` de un brawler o mapa."""
+    return name if copy == 0 else f"{name} {copy}"
+
+
+def _read_lines(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.rstrip("\n") for line in file]
+
+
+def write_synthetic_meta(scale, output_folder, source_folder=DEFAULT_SOURCE_FOLDER):
+    """
+    Escribe en `output_folder` un meta con `scale` copias de cada brawler y de cada mapa de `source_folder`.
+
+    Retorna:
+    - tuple: (número de brawlers, número de mapas) del meta generado.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+
+    meta_lines = [line for line in _read_lines(os.path.join(source_folder, "meta.txt")) if line.strip()]
+    category_lines = [line for line in _read_lines(os.path.join(source_folder, "categories.txt")) if ":" in line]
+    tier_lines = [line for line in _read_lines(os.path.join(source_folder, "tier.txt")) if line.strip()]
+    brawler_names = {line.split(": ")[0].strip() for line in meta_lines}
+    categories = {line.split(":")[0].strip() for line in category_lines}
+
+    def copy_list(names, copy):
+        # Los nombres de categoría (en los counters de `meta.txt`) se mantienen
+        return " | ".join(name if name in categories or name not in brawler_names else _copy_name(name, copy) for name in names)
+
+    # meta.txt: "Brawler: counter | Categoría | ..."
+    with open(os.path.join(output_folder, "meta.txt"), "w", encoding="utf-8") as file:
+        for copy in range(scale):
+            for line in meta_lines:
+                name, counters = line.split(": ", 1)
+                counter_names = [counter.strip() for counter in counters.split("|")]
+                file.write(f"{_copy_name(name.strip(), copy)}: {copy_list(counter_names, copy)}\n")
+
+    # categories.txt: "Categoría: brawler | brawler | ...", con todas las copias
+    with open(os.path.join(output_folder, "categories.txt"), "w", encoding="utf-8") as file:
+        for line in category_lines:
+            category, names = line.split(":", 1)
+            names = [name.strip() for name in names.split("|")]
+            file.write(f"{category.strip()}: " + " | ".join(_copy_name(name, copy) for copy in range(scale) for name in names) + "\n")
+
+    # tier.txt: "Tier: brawler | brawler | ...", con todas las copias
+    with open(os.path.join(output_folder, "tier.txt"), "w", encoding="utf-8") as file:
+        for line in tier_lines:
+            tier, names = line.split(": ", 1)
+            names = [name.strip() for name in names.split("|")]
+            file.write(f"{tier.strip()}: " + " | ".join(_copy_name(name, copy) for copy in range(scale) for name in names) + "\n")
+
+    # maps.txt: bloques "Mapa:" + campos, con los picks de la misma copia
+    map_lines = _read_lines(os.path.join(source_folder, "maps.txt"))
+    map_count = 0
+    with open(os.path.join(output_folder, "maps.txt"), "w", encoding="utf-8") as file:
+        for copy in range(scale):
+            for line in map_lines:
+                stripped = line.strip()
+                if ":" in stripped and not stripped.startswith("-"):
+                    file.write(f"{_copy_name(stripped.split(':')[0].strip(), copy)}:\n")
+                    map_count += 1
+                elif stripped.startswith(MAP_PICK_FIELDS):
+                    field, names = stripped.split(":", 1)
+                    file.write(f"{field}: {copy_list([name.strip() for name in names.split('|')], copy)}\n")
+                else:
+                    file.write(line + "\n")
+            file.write("\n")
+
+    return len(meta_lines) * scale, map_count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    brawler_count, map_count = write_synthetic_meta(int(sys.argv[1]), sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else DEFAULT_SOURCE_FOLDER)
+    print(f"Synthetic meta written to {sys.argv[2]}: {brawler_count} brawlers, {map_count} maps")